@@ -0,0 +1,38 @@
+"""
+API endpoints shared across apps
+"""
+from django.http import HttpResponse
+from ninja import Router, Query
+
+from .schemas import DashboardSchema, SyncSchema
+from .services import get_dashboard, get_changes
+from apps.accounts.schemas import MessageSchema
+from apps.core.auth import auth
+from apps.core.cache import cached_user_response
+from apps.core.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from apps.core.renderers import dumps
+from apps.core.sync import InvalidSyncTokenError
+
+router = Router()
+
+
+@router.get("/dashboard", response={200: DashboardSchema, 401: MessageSchema}, auth=auth)
+def dashboard(request, limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT)):
+    """Слоны, заказы и отправленные подарки пользователя одним запросом"""
+    # Auth handled by decorator - request.user is guaranteed authenticated
+    return cached_user_response(
+        request, "dashboard", str(limit), None,
+        lambda: get_dashboard(request.user, limit),
+    )
+
+
+@router.get("/sync", response={200: SyncSchema, 400: MessageSchema, 401: MessageSchema}, auth=auth)
+def sync(request, since: str = Query(...)):
+    """Изменения слонов, заказов и подарков после токена (reset=True — перезагрузить всё)"""
+    # Auth handled by decorator - request.user is guaranteed authenticated
+    # Без кэша ответов: каждый токен уникален, а ответ несёт новый токен
+    try:
+        changes = get_changes(request.user, since)
+    except InvalidSyncTokenError as e:
+        return 400, {"message": str(e)}
+    return HttpResponse(dumps(changes), content_type="application/json")
@@ -0,0 +1,133 @@
+"""
+Per-user versioned cache for API list responses.
+
+У каждого пользователя есть счётчик версии в Redis. Ответы списков
+кэшируются вместе с версией, на которой они были построены; сигналы
+сохранения Elephant, Order и GiftLink увеличивают версию, и старые
+записи перестают совпадать. Проверка кэша — один MGET (версия + ответ).
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+from apps.core.renderers import dumps
+from apps.core.conditional import make_etag, etag_matches, set_etag, not_modified
+
+RESPONSE_CACHE_TIMEOUT = 10 * 60  # 10 minutes
+
+
+def _version_key(user_id) -> str:
+    return f"user:{user_id}:version"
+
+
+def _init_version(user_id) -> int:
+    """
+    Инициализировать версию пользователя
+
+    Начальное значение основано на времени, поэтому после вытеснения ключа
+    из Redis новая версия не совпадёт ни с одним старым ответом.
+    """
+    key = _version_key(user_id)
+    cache.add(key, int(time.time() * 1000), timeout=None)
+    return cache.get(key)
+
+
+def bump_user_cache_version(*user_ids) -> None:
+    """
+    Инвалидировать кэш ответов пользователей (после коммита транзакции)
+
+    Если увеличить версию до коммита, параллельный запрос может прочитать
+    старые данные и сохранить их под новой версией.
+
+    Args:
+        *user_ids: ID пользователей (None пропускаются)
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    def bump():
+        for user_id in user_ids:
+            try:
+                cache.incr(_version_key(user_id))
+            except ValueError:
+                # Версии ещё нет — старых ответов тоже нет
+                _init_version(user_id)
+
+    transaction.on_commit(bump)
+
+
+def dump_schema(schema, data):
+    """
+    Прогнать данные через ninja-схему так же, как это делает NinjaAPI
+
+    Args:
+        schema: Ninja Schema класс ответа
+        data: Объект или dict для схемы
+
+    Returns:
+        JSON-совместимые данные (dict)
+    """
+    return schema.model_validate(data).model_dump()
+
+
+def render_schema(schema, data) -> bytes:
+    """
+    Сериализовать данные через ninja-схему в JSON
+
+    Args:
+        schema: Ninja Schema класс ответа
+        data: Объект или dict для схемы
+
+    Returns:
+        JSON bytes
+    """
+    return dumps(dump_schema(schema, data))
+
+
+def cached_user_response(request, namespace: str, params: str, schema, build) -> HttpResponse:
+    """
+    Отдать ответ из кэша пользователя или построить и закэшировать его
+
+    ETag ответа — версия кэша пользователя, поэтому If-None-Match
+    проверяется до чтения и сериализации данных.
+
+    Args:
+        request: HttpRequest (аутентифицированный пользователь — владелец кэша)
+        namespace: Имя списка (elephants, orders, ...)
+        params: Параметры запроса, влияющие на ответ (курсор, limit)
+        schema: Ninja Schema класс ответа или None, если build() уже
+            возвращает JSON-совместимые данные (быстрый путь без схемы)
+        build: Функция без аргументов, возвращающая данные ответа
+
+    Returns:
+        HttpResponse с JSON или 304 Not Modified
+    """
+    user_id = request.user.pk
+    version_key = _version_key(user_id)
+    response_key = f"api:{namespace}:{user_id}:{params}"
+
+    cached = cache.get_many([version_key, response_key])
+    version = cached.get(version_key)
+    if version is None:
+        version = _init_version(user_id)
+        entry = None
+    else:
+        entry = cached.get(response_key)
+
+    etag = make_etag(namespace, user_id, version, params)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if entry and entry[0] == version:
+        content = entry[1]
+    else:
+        data = build()
+        content = render_schema(schema, data) if schema is not None else dumps(data)
+        cache.set(response_key, (version, content), RESPONSE_CACHE_TIMEOUT)
+
+    response = HttpResponse(content, content_type="application/json")
+    set_etag(response, etag)
+    return response
@@ -0,0 +1,224 @@
+"""
+Circuit breaker with shared state in Redis (Django cache).
+
+Состояние и счётчики хранятся в кэше, поэтому все web- и Celery-воркеры
+видят одно состояние. Ошибки и медленные вызовы считаются в скользящем
+окне из корзин по bucket_seconds; при доле неудач не меньше failure_rate
+(и не меньше min_calls вызовов в окне) breaker открывается на
+open_seconds и вызовы сразу получают CircuitOpenError. После этого
+пропускается один пробный вызов (half-open): успех закрывает breaker,
+неудача открывает снова. Если Redis недоступен, вызовы пропускаются.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from .metrics import format_counter, format_gauge
+
+logger = logging.getLogger('apps')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected by an open circuit breaker."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Общий для всех процессов circuit breaker
+
+    Использование:
+        with breaker.call():
+            response = gateway.request(...)
+
+    Args:
+        name: Имя (часть ключей в кэше)
+        failure_rate: Доля неудачных вызовов в окне, открывающая breaker
+        min_calls: Минимум вызовов в окне для оценки доли
+        slow_call_seconds: Вызов дольше этого считается неудачным (бюджет задержки)
+        window_seconds: Длина скользящего окна
+        bucket_seconds: Размер корзины окна
+        open_seconds: Сколько breaker остаётся открытым до пробного вызова
+        is_failure: Функция(exception) -> bool; False — ошибка вызывающего,
+            а не сервиса (по умолчанию неудача — любое исключение)
+    """
+
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 10,
+                 slow_call_seconds: float = 5.0, window_seconds: int = 60, bucket_seconds: int = 10,
+                 open_seconds: int = 30, is_failure=None):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.open_seconds = open_seconds
+        self.is_failure = is_failure or (lambda exc: True)
+
+    def _key(self, *parts) -> str:
+        return ':'.join(('circuit', self.name) + tuple(str(part) for part in parts))
+
+    def _window_keys(self, counter: str) -> list:
+        current = int(time.time() // self.bucket_seconds)
+        buckets = self.window_seconds // self.bucket_seconds
+        return [self._key('window', bucket, counter) for bucket in range(current - buckets + 1, current + 1)]
+
+    def _incr(self, key: str, timeout=None) -> int:
+        try:
+            return cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, timeout=timeout)
+            return cache.incr(key)
+
+    def _count(self, counter: str) -> None:
+        """Счётчик в текущей корзине окна и общий счётчик (метрики)"""
+        self._incr(self._window_keys(counter)[-1], timeout=self.window_seconds + self.bucket_seconds)
+        self._incr(self._key('total', counter))
+
+    def state(self) -> str:
+        """
+        Текущее состояние: closed, open или half_open
+
+        Returns:
+            CLOSED / OPEN / HALF_OPEN
+        """
+        open_until = cache.get(self._key('open_until'))
+        if open_until is None:
+            return CLOSED
+        return OPEN if time.time() < open_until else HALF_OPEN
+
+    def _open(self) -> None:
+        cache.set(self._key('open_until'), time.time() + self.open_seconds, timeout=None)
+        cache.delete(self._key('probe'))
+        self._incr(self._key('total', 'opened'))
+        logger.warning(f"Circuit breaker '{self.name}' opened for {self.open_seconds} s")
+
+    def _close(self) -> None:
+        cache.delete_many(
+            [self._key('open_until'), self._key('probe')]
+            + self._window_keys('calls') + self._window_keys('failures')
+        )
+        logger.info(f"Circuit breaker '{self.name}' closed")
+
+    def _before_call(self) -> bool:
+        """
+        Пропустить вызов или отклонить
+
+        Returns:
+            True, если это пробный вызов (half-open)
+
+        Raises:
+            CircuitOpenError: Если breaker открыт
+        """
+        try:
+            state = self.state()
+            if state == CLOSED:
+                return False
+            # Один пробный вызов на все процессы; ключ истекает, если проба зависла
+            if state == HALF_OPEN and cache.add(self._key('probe'), 1, timeout=int(self.slow_call_seconds * 2) + 1):
+                return True
+            self._incr(self._key('total', 'rejected'))
+        except Exception as e:
+            logger.warning(f"Circuit breaker '{self.name}' state unavailable, allowing call: {e}")
+            return False
+
+        raise CircuitOpenError(f"Circuit breaker '{self.name}' is open")
+
+    def _after_call(self, probe: bool, failed: bool) -> None:
+        try:
+            self._count('calls')
+            if failed:
+                self._count('failures')
+
+            if probe:
+                if failed:
+                    self._open()
+                else:
+                    self._close()
+                return
+
+            if failed:
+                windows = cache.get_many(self._window_keys('calls') + self._window_keys('failures'))
+                calls = sum(value for key, value in windows.items() if key.endswith(':calls'))
+                failures = sum(value for key, value in windows.items() if key.endswith(':failures'))
+                if calls >= self.min_calls and failures / calls >= self.failure_rate and self.state() == CLOSED:
+                    self._open()
+        except Exception as e:
+            logger.warning(f"Circuit breaker '{self.name}' failed to record call: {e}")
+
+    @contextmanager
+    def call(self):
+        """
+        Контекст одного вызова сервиса
+
+        Raises:
+            CircuitOpenError: Если breaker открыт (тело не выполняется)
+        """
+        probe = self._before_call()
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self._after_call(probe, failed=self.is_failure(e))
+            raise
+        self._after_call(probe, failed=time.monotonic() - started > self.slow_call_seconds)
+
+    def exposition(self) -> list:
+        """
+        Метрики breaker в текстовом формате Prometheus (для /metrics/)
+
+        Returns:
+            Строки экспозиции; пустой список, если кэш недоступен
+        """
+        try:
+            stats = self.stats()
+        except Exception as e:
+            logger.warning(f"Circuit breaker '{self.name}' stats unavailable: {e}")
+            return []
+
+        labels = {'breaker': self.name}
+        lines = format_gauge(
+            'circuit_breaker_state', 'Circuit breaker state (1 for the current state)',
+            [({**labels, 'state': state}, int(stats['state'] == state)) for state in (CLOSED, OPEN, HALF_OPEN)],
+        )
+        lines += format_gauge(
+            'circuit_breaker_window_calls', 'Calls in the sliding window', [(labels, stats['window_calls'])]
+        )
+        lines += format_gauge(
+            'circuit_breaker_window_failures', 'Failed or slow calls in the sliding window',
+            [(labels, stats['window_failures'])],
+        )
+        for counter, help_text in (
+            ('calls', 'Calls through the breaker'),
+            ('failures', 'Failed or slow calls'),
+            ('rejected', 'Calls rejected while the breaker was open'),
+            ('opened', 'Times the breaker opened'),
+        ):
+            lines += format_counter(f'circuit_breaker_{counter}_total', help_text, [(labels, stats[counter])])
+        return lines
+
+    def stats(self) -> dict:
+        """
+        Метрики breaker: состояние, окно и общие счётчики
+
+        Returns:
+            Dict: state, window_calls, window_failures, calls, failures, rejected, opened
+        """
+        totals = ('calls', 'failures', 'rejected', 'opened')
+        values = cache.get_many(
+            self._window_keys('calls') + self._window_keys('failures')
+            + [self._key('total', counter) for counter in totals]
+        )
+        window = [(key, value) for key, value in values.items() if ':window:' in key]
+        return {
+            'state': self.state(),
+            'window_calls': sum(value for key, value in window if key.endswith(':calls')),
+            'window_failures': sum(value for key, value in window if key.endswith(':failures')),
+            **{counter: values.get(self._key('total', counter), 0) for counter in totals},
+        }
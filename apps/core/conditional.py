@@ -0,0 +1,60 @@
+"""
+Conditional GET (ETag / If-None-Match) for API routes.
+
+ETag строится из дешёвой версии ресурса (updated_at объекта или
+per-user версии кэша), а не из тела ответа, поэтому при совпадении
+If-None-Match ответ 304 отдаётся без запуска сериализаторов.
+"""
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+
+def make_etag(*parts) -> str:
+    """
+    Построить ETag из частей версии ресурса
+
+    Args:
+        *parts: Значения, однозначно определяющие версию ответа
+
+    Returns:
+        ETag в кавычках
+    """
+    raw = ':'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+def etag_matches(request, etag: str) -> bool:
+    """
+    Совпадает ли ETag с заголовком If-None-Match запроса
+
+    Сравнение слабое: nginx с gzip превращает ETag в W/"...".
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+
+    etags = parse_etags(header)
+    if '*' in etags:
+        return True
+    return etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in etags}
+
+
+def set_etag(response, etag: str) -> None:
+    """
+    Добавить ETag к ответу и требовать ревалидацию у клиента
+
+    Ответы приватные (зависят от сессии), поэтому общие кэши их не хранят.
+    """
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+
+
+def not_modified(etag: str) -> HttpResponseNotModified:
+    """
+    Ответ 304 Not Modified с тем же ETag
+    """
+    response = HttpResponseNotModified()
+    set_etag(response, etag)
+    return response
@@ -0,0 +1,127 @@
+"""
+Sparse fieldsets (?fields=id,color_hex) for list API endpoints.
+
+Клиент перечисляет нужные поля схемы ответа. Из БД выбираются только
+колонки этих полей (only() / values_list()), а при сериализации
+запускаются только их резолверы — остальные поля в ответ не попадают.
+"""
+from functools import cache
+from typing import Optional
+
+from ninja import Schema
+from pydantic import field_validator
+
+from apps.core.cache import dump_schema
+
+# Поля, нужные keyset пагинации независимо от запроса клиента
+KEYSET_COLUMNS = ('id', 'created_at')
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when ?fields= contains names missing from the response schema."""
+    pass
+
+
+def parse_fields(fields: Optional[str], schema) -> Optional[tuple]:
+    """
+    Разобрать параметр fields= по полям схемы
+
+    Args:
+        fields: Имена полей через запятую (None или пустая строка — все поля)
+        schema: Ninja Schema класс элемента списка
+
+    Returns:
+        Tuple имён в порядке полей схемы или None (все поля)
+
+    Raises:
+        InvalidFieldsError: Если указано поле, которого нет в схеме
+    """
+    if not fields:
+        return None
+
+    requested = {name.strip() for name in fields.split(',') if name.strip()}
+    if not requested:
+        return None
+
+    unknown = requested - schema.model_fields.keys()
+    if unknown:
+        raise InvalidFieldsError(
+            f"Неизвестные поля: {', '.join(sorted(unknown))}. "
+            f"Доступные: {', '.join(schema.model_fields)}"
+        )
+
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+@cache
+def sparse_schema(schema, fields: tuple):
+    """
+    Схема с подмножеством полей исходной схемы
+
+    Копирует аннотации, значения по умолчанию, резолверы и field-валидаторы
+    выбранных полей, поэтому значения совпадают с полной схемой. Классы
+    кэшируются по (schema, fields).
+
+    Args:
+        schema: Ninja Schema класс
+        fields: Tuple имён полей (из parse_fields())
+
+    Returns:
+        Ninja Schema класс только с полями fields
+    """
+    namespace = {
+        '__module__': schema.__module__,
+        '__doc__': schema.__doc__,
+        '__annotations__': {},
+        'model_config': schema.model_config,
+    }
+    for name in fields:
+        info = schema.model_fields[name]
+        namespace['__annotations__'][name] = info.annotation
+        if not info.is_required():
+            namespace[name] = info.default
+        resolver = schema.__dict__.get(f'resolve_{name}')
+        if resolver is not None:
+            namespace[f'resolve_{name}'] = resolver
+
+    for attr, decorator in schema.__pydantic_decorators__.field_validators.items():
+        if set(decorator.info.fields) <= set(fields):
+            # decorator.func привязан к исходной схеме — берём функцию
+            func = getattr(decorator.func, '__func__', decorator.func)
+            namespace[attr] = field_validator(*decorator.info.fields, mode=decorator.info.mode)(func)
+
+    return type(f"{schema.__name__}[{','.join(fields)}]", (Schema,), namespace)
+
+
+def only_columns(fields: tuple, columns: dict) -> list:
+    """
+    Колонки модели для only()/values_list() по выбранным полям схемы
+
+    Args:
+        fields: Tuple имён полей (из parse_fields())
+        columns: Dict поле схемы -> tuple колонок ORM, которые оно читает
+
+    Returns:
+        Список колонок без повторов (включая KEYSET_COLUMNS)
+    """
+    result = dict.fromkeys(KEYSET_COLUMNS)
+    for name in fields:
+        result.update(dict.fromkeys(columns[name]))
+    return list(result)
+
+
+def dump_page(schema, items, next_cursor: Optional[str], fields: Optional[tuple] = None) -> dict:
+    """
+    Сериализовать страницу списка с учётом sparse fieldset
+
+    Args:
+        schema: Ninja Schema класс элемента списка
+        items: Объекты страницы
+        next_cursor: Курсор следующей страницы
+        fields: Tuple полей (из parse_fields()) или None — все поля
+
+    Returns:
+        Dict {"items": [...], "next": cursor | None}
+    """
+    item_schema = sparse_schema(schema, fields) if fields else schema
+    return {"items": [dump_schema(item_schema, item) for item in items], "next": next_cursor}
@@ -0,0 +1,95 @@
+"""
+Short-lived exclusive leases in Redis (Django cache) with a heartbeat.
+
+Lease берётся через cache.add (атомарно для всех воркеров) на ttl секунд.
+Пока владелец работает, фоновый поток продлевает ключ каждые ttl/3 секунд.
+Если процесс умер, продления прекращаются и lease истекает сам — ключ
+можно взять снова не позже чем через ttl. Если Redis недоступен, lease
+считается взятым (защиту дают ограничения БД).
+"""
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger('apps')
+
+
+class LeaseHeldError(Exception):
+    """Raised when the lease is held by another worker."""
+    pass
+
+
+class Lease:
+    """
+    Эксклюзивная аренда ключа с продлением
+
+    Использование:
+        with Lease(f'elephants:render:{order_id}', ttl=60):
+            ...
+
+    Args:
+        name: Имя (часть ключа в кэше)
+        ttl: Срок жизни без продления, секунды
+
+    Raises:
+        LeaseHeldError: При входе, если lease держит другой владелец
+    """
+
+    def __init__(self, name: str, ttl: int = 60):
+        self.key = f'lease:{name}'
+        self.ttl = ttl
+        self.token = uuid.uuid4().hex
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def acquire(self) -> bool:
+        """
+        Взять lease и запустить продление
+
+        Returns:
+            True если lease взят (или Redis недоступен), False если занят
+        """
+        try:
+            acquired = cache.add(self.key, self.token, timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Lease {self.key} unavailable, proceeding without it: {e}")
+            return True
+
+        if acquired:
+            self._heartbeat = threading.Thread(target=self._extend, name=f'{self.key}-heartbeat', daemon=True)
+            self._heartbeat.start()
+        return acquired
+
+    def _extend(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                # get + touch не атомарны: при истёкшем lease можно продлить чужой
+                # на один ttl — это только откладывает его истечение
+                if cache.get(self.key) != self.token:
+                    logger.warning(f"Lease {self.key} lost")
+                    return
+                cache.touch(self.key, self.ttl)
+            except Exception as e:
+                logger.warning(f"Failed to extend lease {self.key}: {e}")
+
+    def release(self) -> None:
+        """Остановить продление и удалить ключ, если lease ещё наш"""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        try:
+            if cache.get(self.key) == self.token:
+                cache.delete(self.key)
+        except Exception as e:
+            logger.warning(f"Failed to release lease {self.key}: {e}")
+
+    def __enter__(self):
+        if not self.acquire():
+            raise LeaseHeldError(f"Lease {self.key} is held by another worker")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
@@ -0,0 +1,94 @@
+"""
+Management command to load-test an HTTP endpoint with concurrent requests.
+
+Показывает, сколько запросов сервер реально обрабатывает одновременно:
+server concurrency ≈ req/s × минимальная задержка (время обработки без
+ожидания в очереди). Для синхронных воркеров она не превышает число
+воркеров, для async-маршрутов под ASGI растёт вместе с --concurrency.
+
+Usage:
+    python manage.py load_test --url http://localhost:8000/api/elephants/lookup/?q=%23FF0000
+    python manage.py load_test --url http://localhost:8000/api/orders --method POST \\
+        --data '{"tariff_name": "basic"}' --cookie "sessionid=..." --concurrency 50 --requests 200
+"""
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Send concurrent HTTP requests to a URL and report latency and server concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', required=True, help='Target URL')
+        parser.add_argument('--method', default='GET', help='HTTP method (default: GET)')
+        parser.add_argument('--data', default=None, help='JSON request body')
+        parser.add_argument('--cookie', default=None, help='Cookie header (e.g. "sessionid=...")')
+        parser.add_argument('--concurrency', type=int, default=20, help='Parallel clients (default: 20)')
+        parser.add_argument('--requests', type=int, default=100, help='Total requests (default: 100)')
+        parser.add_argument('--timeout', type=float, default=60, help='Request timeout, seconds (default: 60)')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency and --requests must be positive')
+
+        body = None
+        headers = {}
+        if options['data'] is not None:
+            try:
+                body = json.dumps(json.loads(options['data'])).encode('utf-8')
+            except ValueError as e:
+                raise CommandError(f'--data is not valid JSON: {e}')
+            headers['Content-Type'] = 'application/json'
+        if options['cookie']:
+            headers['Cookie'] = options['cookie']
+            # Django CSRF для session-auth: токен из cookie в заголовок
+            for part in options['cookie'].split(';'):
+                name, _, value = part.strip().partition('=')
+                if name == 'csrftoken':
+                    headers['X-CSRFToken'] = value
+
+        def send(_):
+            request = urllib.request.Request(
+                options['url'], data=body, headers=headers, method=options['method'].upper()
+            )
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except (urllib.error.URLError, OSError):
+                status = None
+            return status, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(send, range(options['requests'])))
+        wall = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        statuses = {}
+        for status, _ in results:
+            statuses[status or 'error'] = statuses.get(status or 'error', 0) + 1
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(f'{options["method"].upper()} {options["url"]}')
+        self.stdout.write(f'  requests:    {len(results)} (concurrency {options["concurrency"]})')
+        self.stdout.write(f'  statuses:    {", ".join(f"{k}: {v}" for k, v in sorted(statuses.items(), key=str))}')
+        self.stdout.write(f'  wall time:   {wall:.2f} s ({len(results) / wall:.1f} req/s)')
+        self.stdout.write(
+            f'  latency:     p50 {percentile(0.5):.0f} ms, p95 {percentile(0.95):.0f} ms, '
+            f'mean {statistics.mean(latencies) * 1000:.0f} ms'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'  server concurrency: ~{len(results) / wall * latencies[0]:.1f} (req/s x min latency)'
+        ))
@@ -0,0 +1,23 @@
+"""
+Management command to delete sync tombstones older than the retention period.
+
+/api/sync returns reset=True for tokens older than TOMBSTONE_RETENTION,
+so older tombstones are never read.
+
+Usage:
+    python manage.py purge_tombstones
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.models import Tombstone
+from apps.core.sync import TOMBSTONE_RETENTION
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than TOMBSTONE_RETENTION'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - TOMBSTONE_RETENTION
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones older than {cutoff:%Y-%m-%d %H:%M}'))
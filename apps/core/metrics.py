@@ -0,0 +1,150 @@
+"""
+Process-shared metrics in Redis (Django cache).
+
+Гистограммы хранятся счётчиками в кэше, поэтому их пишут все web- и
+Celery-воркеры, а читает любой процесс. Каждое наблюдение увеличивает
+счётчик одной корзины (первой с le >= value или +Inf), count и sum (в
+миллисекундах); накопительные значения по корзинам считаются при чтении.
+Если Redis недоступен, наблюдения теряются без ошибки. format_histogram(),
+format_gauge() и format_counter() отдают значения в текстовом формате
+Prometheus.
+"""
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger('apps')
+
+# Границы корзин по умолчанию, секунды
+DEFAULT_BUCKETS = (0.5, 1, 5, 15, 30, 60, 300, 900)
+INF = '+Inf'
+
+
+def _key(name: str, labels: dict, suffix) -> str:
+    label_part = ','.join(f'{key}={value}' for key, value in sorted(labels.items()))
+    return f'metrics:{name}:{label_part}:{suffix}'
+
+
+def _incr(key: str, delta: int = 1) -> None:
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, delta)
+
+
+def observe(name: str, value: float, buckets: tuple = DEFAULT_BUCKETS, **labels) -> None:
+    """
+    Записать наблюдение в гистограмму
+
+    Args:
+        name: Имя метрики
+        value: Значение, секунды
+        buckets: Границы корзин (по возрастанию)
+        **labels: Метки (часть ключа)
+    """
+    bucket = next((le for le in buckets if value <= le), INF)
+    try:
+        _incr(_key(name, labels, bucket))
+        _incr(_key(name, labels, 'count'))
+        _incr(_key(name, labels, 'sum_ms'), int(value * 1000))
+    except Exception as e:
+        logger.warning(f"Failed to record metric {name}: {e}")
+
+
+def histogram(name: str, buckets: tuple = DEFAULT_BUCKETS, **labels) -> dict:
+    """
+    Прочитать гистограмму
+
+    Args:
+        name: Имя метрики
+        buckets: Границы корзин (те же, что при записи)
+        **labels: Метки
+
+    Returns:
+        Dict: buckets (le -> накопительное число наблюдений, включая '+Inf'),
+        count, sum (секунды)
+    """
+    bounds = list(buckets) + [INF]
+    values = cache.get_many([_key(name, labels, le) for le in bounds] + [
+        _key(name, labels, 'count'), _key(name, labels, 'sum_ms'),
+    ])
+
+    cumulative = {}
+    total = 0
+    for le in bounds:
+        total += values.get(_key(name, labels, le), 0)
+        cumulative[le] = total
+
+    return {
+        'buckets': cumulative,
+        'count': values.get(_key(name, labels, 'count'), 0),
+        'sum': values.get(_key(name, labels, 'sum_ms'), 0) / 1000,
+    }
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+def format_histogram(name: str, help_text: str, label_sets, buckets: tuple = DEFAULT_BUCKETS) -> list:
+    """
+    Гистограммы в текстовом формате Prometheus
+
+    Кэш не перечисляет ключи, поэтому наборы меток передаются явно.
+
+    Args:
+        name: Имя метрики
+        help_text: Описание (# HELP)
+        label_sets: Наборы меток (dict) для чтения
+        buckets: Границы корзин
+
+    Returns:
+        Строки экспозиции
+    """
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for labels in label_sets:
+        data = histogram(name, buckets, **labels)
+        for le, count in data['buckets'].items():
+            lines.append(f'{name}_bucket{_format_labels({**labels, "le": le})} {count}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {data["sum"]}')
+        lines.append(f'{name}_count{_format_labels(labels)} {data["count"]}')
+    return lines
+
+
+def format_gauge(name: str, help_text: str, samples) -> list:
+    """
+    Gauge в текстовом формате Prometheus
+
+    Args:
+        name: Имя метрики
+        help_text: Описание (# HELP)
+        samples: Пары (метки, значение)
+
+    Returns:
+        Строки экспозиции
+    """
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+    for labels, value in samples:
+        lines.append(f'{name}{_format_labels(labels)} {value}')
+    return lines
+
+
+def format_counter(name: str, help_text: str, samples) -> list:
+    """
+    Counter в текстовом формате Prometheus
+
+    Args:
+        name: Имя метрики (с суффиксом _total)
+        help_text: Описание (# HELP)
+        samples: Пары (метки, значение)
+
+    Returns:
+        Строки экспозиции
+    """
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    for labels, value in samples:
+        lines.append(f'{name}{_format_labels(labels)} {value}')
+    return lines
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(verbose_name='ID пользователя')),
+                ('kind', models.CharField(choices=[('elephant', 'Слон'), ('order', 'Заказ'), ('gift_link', 'Подарочная ссылка')], max_length=20, verbose_name='Тип объекта')),
+                ('object_id', models.BigIntegerField(verbose_name='ID объекта')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Надгробие',
+                'verbose_name_plural': 'Надгробия',
+                'indexes': [models.Index(fields=['user_id', 'deleted_at'], name='core_tombstone_user_idx')],
+            },
+        ),
+    ]
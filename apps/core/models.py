@@ -0,0 +1,50 @@
+"""
+Core models: sync tombstones
+"""
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Запись об удалении объекта из списков пользователя (для /api/sync)
+
+    user_id — обычное число, а не ForeignKey: надгробия создаются в
+    post_delete сигналах, в том числе при каскадном удалении самого
+    пользователя. Старые записи удаляет команда purge_tombstones.
+    """
+
+    ELEPHANT = "elephant"
+    ORDER = "order"
+    GIFT_LINK = "gift_link"
+    KIND_CHOICES = [
+        (ELEPHANT, "Слон"),
+        (ORDER, "Заказ"),
+        (GIFT_LINK, "Подарочная ссылка"),
+    ]
+
+    user_id = models.BigIntegerField(
+        verbose_name="ID пользователя"
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        verbose_name="Тип объекта"
+    )
+    object_id = models.BigIntegerField(
+        verbose_name="ID объекта"
+    )
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата удаления"
+    )
+
+    class Meta:
+        verbose_name = "Надгробие"
+        verbose_name_plural = "Надгробия"
+        indexes = [
+            # Delta sync (/api/sync): удаления пользователя после deleted_at
+            models.Index(fields=['user_id', 'deleted_at'], name='core_tombstone_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} (user {self.user_id})"
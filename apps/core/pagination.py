@@ -0,0 +1,124 @@
+"""
+Keyset (cursor) pagination for list API endpoints.
+
+Страницы строятся по паре (created_at, id) в порядке убывания, поэтому
+стоимость запроса не зависит от номера страницы и размера коллекции.
+Курсор — непрозрачная base64-строка, клиенту не нужно знать её формат.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from django.db.models import Q
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 100
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+    pass
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    """
+    Упаковать позицию (created_at, id) в непрозрачный курсор
+
+    Args:
+        created_at: Дата создания последнего элемента страницы
+        pk: ID последнего элемента страницы
+
+    Returns:
+        URL-safe base64 строка
+    """
+    raw = json.dumps([created_at.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Распаковать курсор в позицию (created_at, id)
+
+    Args:
+        cursor: Строка, полученная из encode_cursor()
+
+    Returns:
+        Tuple (created_at: datetime, pk: int)
+
+    Raises:
+        InvalidCursorError: Если курсор повреждён
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise InvalidCursorError("Некорректный курсор пагинации")
+
+
+def keyset_condition(cursor: Optional[str] = None) -> Q:
+    """
+    Условие "после курсора" для queryset, упорядоченного по (-created_at, -id)
+
+    Нужно отдельно, когда фильтр применяется до объединения queryset
+    (UNION не поддерживает filter() после объединения).
+
+    Args:
+        cursor: Курсор предыдущей страницы (None — первая страница)
+
+    Returns:
+        Q объект (пустой для первой страницы)
+
+    Raises:
+        InvalidCursorError: Если курсор повреждён
+    """
+    if not cursor:
+        return Q()
+    created_at, pk = decode_cursor(cursor)
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+
+
+def take_page(queryset, limit: int = DEFAULT_PAGE_LIMIT, key=None) -> tuple:
+    """
+    Упорядочить queryset по (-created_at, -id) и взять одну страницу
+
+    Args:
+        queryset: QuerySet, уже отфильтрованный по keyset_condition()
+        limit: Размер страницы (обрезается до MAX_PAGE_LIMIT)
+        key: Функция элемент -> (created_at, id) для строк values_list()
+            (по умолчанию атрибуты created_at и pk модели)
+
+    Returns:
+        Tuple (items: list, next_cursor: str | None)
+    """
+    limit = max(1, min(limit, MAX_PAGE_LIMIT))
+
+    # Берём на один элемент больше, чтобы узнать, есть ли следующая страница
+    items = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        created_at, pk = key(items[-1]) if key else (items[-1].created_at, items[-1].pk)
+        next_cursor = encode_cursor(created_at, pk)
+
+    return items, next_cursor
+
+
+def paginate_keyset(queryset, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_LIMIT) -> tuple:
+    """
+    Получить одну страницу queryset по ключу (created_at, id)
+
+    Args:
+        queryset: QuerySet модели с полями created_at и id
+        cursor: Курсор предыдущей страницы (None — первая страница)
+        limit: Размер страницы (обрезается до MAX_PAGE_LIMIT)
+
+    Returns:
+        Tuple (items: list, next_cursor: str | None)
+
+    Raises:
+        InvalidCursorError: Если курсор повреждён
+    """
+    return take_page(queryset.filter(keyset_condition(cursor)), limit)
@@ -0,0 +1,33 @@
+"""
+Fast JSON rendering for the ninja API (orjson).
+
+Типы, которые orjson не знает или форматирует иначе (datetime, Decimal,
+lazy-строки), отдаются в NinjaJSONEncoder, поэтому значения в JSON
+совпадают со стандартным JSONRenderer.
+"""
+import orjson
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+_encoder = NinjaJSONEncoder()
+
+
+def dumps(data) -> bytes:
+    """
+    Сериализовать данные в JSON (UTF-8 bytes)
+
+    Args:
+        data: JSON-совместимые данные (dict/list/примитивы, datetime, Decimal, UUID)
+
+    Returns:
+        JSON bytes
+    """
+    return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """JSON renderer на orjson с форматированием значений как у NinjaJSONEncoder"""
+    media_type = "application/json"
+
+    def render(self, request, data, *, response_status):
+        return dumps(data)
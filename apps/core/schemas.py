@@ -0,0 +1,33 @@
+"""
+Ninja schemas for cross-app endpoints
+"""
+from ninja import Schema
+
+from apps.elephants.schemas import ElephantListSchema, ElephantPageSchema
+from apps.payments.schemas import OrderSchema, OrderPageSchema
+from apps.gifts.schemas import GiftLinkSchema, GiftLinkPageSchema
+
+
+class DashboardSchema(Schema):
+    """Все данные личного кабинета одним ответом (первые страницы списков)"""
+    elephants: ElephantPageSchema
+    orders: OrderPageSchema
+    sent_gifts: GiftLinkPageSchema
+    sync_token: str
+
+
+class SyncDeletedSchema(Schema):
+    """ID объектов, удалённых из списков пользователя"""
+    elephants: list[int]
+    orders: list[int]
+    sent_gifts: list[int]
+
+
+class SyncSchema(Schema):
+    """Изменения личного кабинета после токена синхронизации"""
+    token: str
+    reset: bool
+    elephants: list[ElephantListSchema]
+    orders: list[OrderSchema]
+    sent_gifts: list[GiftLinkSchema]
+    deleted: SyncDeletedSchema
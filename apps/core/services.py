@@ -0,0 +1,128 @@
+"""
+Business logic services shared across apps
+"""
+from django.utils import timezone
+
+from apps.core.cache import dump_schema
+from apps.core.models import Tombstone
+from apps.core.pagination import paginate_keyset, DEFAULT_PAGE_LIMIT
+from apps.core.sync import (
+    new_sync_token, decode_sync_token,
+    SYNC_OVERLAP, SYNC_MAX_CHANGES, TOMBSTONE_RETENTION,
+)
+from apps.elephants.services import get_user_elephants_page, get_user_elephants_changed
+from apps.payments.schemas import OrderSchema, OrderPageSchema
+from apps.payments.services import get_user_orders
+from apps.gifts.schemas import GiftLinkSchema, GiftLinkPageSchema
+from apps.gifts.services import get_user_sent_gifts
+
+# Ключ ответа /api/sync для каждого типа надгробия
+TOMBSTONE_KEYS = {
+    Tombstone.ELEPHANT: "elephants",
+    Tombstone.ORDER: "orders",
+    Tombstone.GIFT_LINK: "sent_gifts",
+}
+
+
+def get_dashboard(user, limit: int = DEFAULT_PAGE_LIMIT) -> dict:
+    """
+    Собрать данные личного кабинета: первые страницы слонов, заказов и подарков
+
+    Каждая коллекция выбирается одним запросом вместе со связанными
+    объектами (gift_link, tariff, elephant), поэтому число запросов
+    фиксировано и не зависит от размера коллекций. Слоны сериализуются
+    быстрым путём (get_user_elephants_page), остальное — через схемы.
+
+    Args:
+        user: User объект
+        limit: Размер страницы каждой коллекции
+
+    Returns:
+        JSON-совместимый dict по DashboardSchema: elephants, orders,
+        sent_gifts — по {items, next}, sync_token — для /api/sync
+    """
+    # Токен берётся до чтения данных: изменения во время чтения придут в /api/sync
+    sync_token = new_sync_token()
+    orders, orders_next = paginate_keyset(get_user_orders(user), limit=limit)
+    sent_gifts, sent_gifts_next = paginate_keyset(get_user_sent_gifts(user), limit=limit)
+
+    return {
+        "elephants": get_user_elephants_page(user, limit=limit),
+        "orders": dump_schema(OrderPageSchema, {"items": orders, "next": orders_next}),
+        "sent_gifts": dump_schema(GiftLinkPageSchema, {"items": sent_gifts, "next": sent_gifts_next}),
+        "sync_token": sync_token,
+    }
+
+
+def _sync_reset(token: str) -> dict:
+    """Ответ /api/sync, требующий полной перезагрузки данных"""
+    return {
+        "token": token,
+        "reset": True,
+        "elephants": [],
+        "orders": [],
+        "sent_gifts": [],
+        "deleted": {key: [] for key in TOMBSTONE_KEYS.values()},
+    }
+
+
+def get_changes(user, since_token: str) -> dict:
+    """
+    Изменения данных личного кабинета после токена синхронизации
+
+    Слоны, заказы и отправленные подарки с updated_at позже токена
+    (минус SYNC_OVERLAP) и ID удалённых объектов из надгробий. Стоимость
+    пропорциональна числу изменений, а не размеру коллекций. Если токен
+    старше TOMBSTONE_RETENTION или изменений больше SYNC_MAX_CHANGES,
+    возвращается reset=True — клиент перезагружает данные целиком.
+
+    Args:
+        user: User объект
+        since_token: Токен из /api/dashboard или предыдущего /api/sync
+
+    Returns:
+        JSON-совместимый dict по SyncSchema
+
+    Raises:
+        InvalidSyncTokenError: Если токен повреждён
+    """
+    since = decode_sync_token(since_token)
+    token = new_sync_token()
+    if since < timezone.now() - TOMBSTONE_RETENTION:
+        return _sync_reset(token)
+
+    after = since - SYNC_OVERLAP
+    elephants = get_user_elephants_changed(user, after, SYNC_MAX_CHANGES)
+    orders = list(
+        get_user_orders(user).filter(updated_at__gt=after).order_by('-created_at', '-id')[:SYNC_MAX_CHANGES + 1]
+    )
+    sent_gifts = list(
+        get_user_sent_gifts(user).filter(updated_at__gt=after).order_by('-created_at', '-id')[:SYNC_MAX_CHANGES + 1]
+    )
+    tombstones = list(
+        Tombstone.objects.filter(user_id=user.pk, deleted_at__gt=after)
+        .values_list('kind', 'object_id')[:SYNC_MAX_CHANGES + 1]
+    )
+    if any(len(changes) > SYNC_MAX_CHANGES for changes in (elephants, orders, sent_gifts, tombstones)):
+        return _sync_reset(token)
+
+    # Объект, который снова есть в списке (например, слон стал подаренным), не удалён
+    changed = {
+        "elephants": {item["id"] for item in elephants},
+        "orders": {order.pk for order in orders},
+        "sent_gifts": {gift.pk for gift in sent_gifts},
+    }
+    deleted = {key: set() for key in TOMBSTONE_KEYS.values()}
+    for kind, object_id in tombstones:
+        key = TOMBSTONE_KEYS[kind]
+        if object_id not in changed[key]:
+            deleted[key].add(object_id)
+
+    return {
+        "token": token,
+        "reset": False,
+        "elephants": elephants,
+        "orders": [dump_schema(OrderSchema, order) for order in orders],
+        "sent_gifts": [dump_schema(GiftLinkSchema, gift) for gift in sent_gifts],
+        "deleted": {key: sorted(ids) for key, ids in deleted.items()},
+    }
@@ -0,0 +1,75 @@
+"""
+Delta sync tokens and tombstones for GET /api/sync.
+
+Токен — момент времени на сервере. Клиент получает его вместе с данными
+и при следующей синхронизации получает только объекты с updated_at
+позже токена и надгробия удалённых объектов. Окно SYNC_OVERLAP
+перекрывает транзакции, закоммиченные позже своего updated_at: объекты
+из окна приходят повторно, клиент применяет их как upsert.
+"""
+import base64
+import binascii
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+SYNC_OVERLAP = timedelta(seconds=30)
+TOMBSTONE_RETENTION = timedelta(days=30)
+SYNC_MAX_CHANGES = 500
+
+
+class InvalidSyncTokenError(ValueError):
+    """Raised when a sync token cannot be decoded."""
+    pass
+
+
+def new_sync_token() -> str:
+    """
+    Токен текущего момента (брать до чтения данных, которые он покрывает)
+
+    Returns:
+        URL-safe base64 строка
+    """
+    raw = timezone.now().isoformat()
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_sync_token(token: str) -> datetime:
+    """
+    Распаковать токен синхронизации
+
+    Args:
+        token: Строка, полученная из new_sync_token()
+
+    Returns:
+        Момент времени (aware datetime)
+
+    Raises:
+        InvalidSyncTokenError: Если токен повреждён
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        moment = datetime.fromisoformat(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidSyncTokenError("Некорректный токен синхронизации")
+
+    if timezone.is_naive(moment):
+        raise InvalidSyncTokenError("Некорректный токен синхронизации")
+    return moment
+
+
+def record_tombstone(kind: str, object_id: int, *user_ids) -> None:
+    """
+    Записать удаление объекта из списков пользователей
+
+    Args:
+        kind: Tombstone.ELEPHANT / ORDER / GIFT_LINK
+        object_id: ID удалённого объекта
+        *user_ids: ID пользователей, у которых объект был в списке (None пропускаются)
+    """
+    from apps.core.models import Tombstone
+
+    Tombstone.objects.bulk_create([
+        Tombstone(user_id=user_id, kind=kind, object_id=object_id)
+        for user_id in {user_id for user_id in user_ids if user_id is not None}
+    ])
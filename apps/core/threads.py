@@ -0,0 +1,47 @@
+"""
+Running sync code (ORM, YooKassa SDK) from async views.
+
+Async-маршрут не занимает воркер, пока ждёт ответа YooKassa или БД:
+синхронный код выполняется в отдельном пуле потоков процесса размером
+ASYNC_THREAD_POOL_SIZE. Размер пула ограничивает и число соединений с БД
+от одного процесса. Пул по умолчанию (run_in_executor) ограничен
+cpu + 4 потоками и на маленьком сервере снова стал бы узким местом.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+@cache
+def _executor() -> ThreadPoolExecutor:
+    """Пул потоков процесса (создаётся при первом вызове)"""
+    return ThreadPoolExecutor(max_workers=settings.ASYNC_THREAD_POOL_SIZE, thread_name_prefix='async-sync')
+
+
+def in_thread_pool(func):
+    """
+    Async-обёртка над синхронной функцией, выполняемой в пуле потоков
+
+    Функция выполняется целиком в одном потоке, поэтому transaction.atomic
+    и select_for_update внутри неё работают как в синхронном коде. Как и
+    обработчик запроса Django, обёртка закрывает устаревшие соединения с
+    БД до и после вызова.
+
+    Args:
+        func: Синхронная функция
+
+    Returns:
+        Async функция с той же сигнатурой
+    """
+    @wraps(func)
+    def call(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(call, thread_sensitive=False, executor=_executor())
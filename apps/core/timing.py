@@ -0,0 +1,100 @@
+"""
+Lightweight per-stage timing spans.
+
+Код размечает этапы через span('имя'); времена собирает collect_timings()
+вокруг единицы работы (задачи). Сборщик живёт в ContextVar, поэтому
+вложенные функции (сервисы, утилиты) не получают его аргументом.
+
+Без активного сборщика span() — один ContextVar.get() на вход: сбор
+включается только там, где вызван collect_timings(enabled=True).
+
+Использование:
+    with collect_timings(settings.ELEPHANT_STAGE_TIMINGS) as timings:
+        with span('rasterize'):
+            ...
+    timings.as_ms()  # {'rasterize': 12.3}
+"""
+import time
+from contextvars import ContextVar
+
+_collector: ContextVar = ContextVar('timing_collector', default=None)
+
+
+class Timings:
+    """Суммарное время по этапам (повторный этап складывается)"""
+
+    __slots__ = ('stages',)
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def as_ms(self) -> dict:
+        """
+        Returns:
+            Dict этап -> миллисекунды (в порядке первого входа)
+        """
+        return {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+
+    def __bool__(self) -> bool:
+        return bool(self.stages)
+
+    def __str__(self) -> str:
+        return ' '.join(f'{name}={ms}ms' for name, ms in self.as_ms().items())
+
+
+class span:
+    """
+    Замер этапа в текущем сборщике (no-op без сборщика)
+
+    Args:
+        name: Имя этапа
+    """
+
+    __slots__ = ('name', 'timings', 'started')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = _collector.get()
+        if self.timings is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class collect_timings:
+    """
+    Собирать времена этапов внутри блока
+
+    Вложенный сборщик перекрывает внешний до выхода из блока.
+
+    Args:
+        enabled: False — сборщик не ставится, span() ничего не делают
+
+    Returns:
+        Timings при входе (пустой, если сбор выключен)
+    """
+
+    __slots__ = ('enabled', 'timings', 'token')
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.timings = Timings()
+
+    def __enter__(self) -> Timings:
+        if self.enabled:
+            self.token = _collector.set(self.timings)
+        return self.timings
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.enabled:
+            _collector.reset(self.token)
+        return False
@@ -0,0 +1,155 @@
+"""
+Trace id propagation and span export for one order end to end.
+
+Trace id создаётся вместе с заказом (Order.trace_id) и живёт в ContextVar:
+    - веб-процесс и обработка webhook входят в trace(order.trace_id);
+    - при публикации Celery-задачи id кладётся в заголовок trace_id, воркер
+      восстанавливает его на время задачи (config/celery.py);
+    - TraceIdFilter добавляет trace_id в каждую строку лога.
+
+Спаны (trace_span, record_span) пишутся строками JSON в TRACE_SPANS_FILE —
+локальная замена коллектора; пустое значение выключает экспорт. Разбор
+одного заказа по этапам — manage.py trace_order.
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from contextvars import ContextVar
+from functools import cache
+
+from django.conf import settings
+
+logger = logging.getLogger('apps')
+
+# Заголовок Celery-задачи (становится атрибутом task.request)
+TRACE_HEADER = 'trace_id'
+
+_trace_id: ContextVar = ContextVar('trace_id', default=None)
+
+
+def new_trace_id() -> str:
+    """Новый trace id (32 hex)"""
+    return uuid.uuid4().hex
+
+
+def current_trace_id():
+    """Trace id текущего контекста или None"""
+    return _trace_id.get()
+
+
+class trace:
+    """
+    Выполнять блок в контексте trace id
+
+    Args:
+        trace_id: Trace id (None — контекст не меняется)
+    """
+
+    __slots__ = ('trace_id', 'token')
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.token = None
+
+    def __enter__(self):
+        if self.trace_id:
+            self.token = _trace_id.set(self.trace_id)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.token is not None:
+            _trace_id.reset(self.token)
+        return False
+
+
+def activate(trace_id):
+    """
+    Установить trace id без блока (начало Celery-задачи)
+
+    Returns:
+        Токен для deactivate()
+    """
+    return _trace_id.set(trace_id)
+
+
+def deactivate(token) -> None:
+    """Вернуть trace id, бывший до activate()"""
+    _trace_id.reset(token)
+
+
+class TraceIdFilter(logging.Filter):
+    """Logging filter: record.trace_id ('-' вне трассы) для форматтеров"""
+
+    def filter(self, record):
+        record.trace_id = _trace_id.get() or '-'
+        return True
+
+
+@cache
+def _spans_fd(path: str) -> int:
+    """Дескриптор файла спанов процесса (O_APPEND: строка дописывается целиком)"""
+    return os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+
+def record_span(name: str, start: float, end: float, status: str = 'ok', **attrs) -> None:
+    """
+    Записать спан текущей трассы
+
+    Ничего не делает без TRACE_SPANS_FILE или вне трассы. Ошибка записи
+    только логируется.
+
+    Args:
+        name: Имя этапа (order.create, elephant.render, ...)
+        start: Начало, unix time
+        end: Конец, unix time
+        status: ok / error
+        **attrs: Атрибуты спана
+    """
+    trace_id = _trace_id.get()
+    if not trace_id or not settings.TRACE_SPANS_FILE:
+        return
+
+    line = json.dumps({
+        'trace_id': trace_id,
+        'name': name,
+        'start': round(start, 6),
+        'duration_ms': round((end - start) * 1000, 2),
+        'status': status,
+        'pid': os.getpid(),
+        'attrs': attrs,
+    }, default=str)
+    try:
+        os.write(_spans_fd(settings.TRACE_SPANS_FILE), (line + '\n').encode())
+    except OSError as e:
+        logger.warning(f"Failed to export span {name}: {e}")
+
+
+class trace_span:
+    """
+    Спан вокруг блока; атрибуты можно дополнить через .attrs внутри блока
+
+    Использование:
+        with trace_span('payment.create', order_id=order.id) as span:
+            ...
+            span.attrs['payment_id'] = payment.id
+
+    Args:
+        name: Имя этапа
+        **attrs: Атрибуты спана
+    """
+
+    __slots__ = ('name', 'attrs', 'start')
+
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_span(self.name, self.start, time.time(), 'error' if exc_type else 'ok', **self.attrs)
+        return False
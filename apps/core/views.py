@@ -1,11 +1,16 @@
 """
 Core views for health checks, monitoring, and static pages
 """
-from django.http import JsonResponse
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
 from django.db import connection
 from django.core.cache import cache
 from django.views.generic import TemplateView
 
+from apps.elephants.metrics import metrics_exposition
+
 
 def health_check(request):
     """
@@ -48,6 +53,23 @@ def health_check(request):
     return JsonResponse(status, status=http_status)
 
 
+def metrics(request):
+    """
+    Metrics endpoint for Prometheus (text exposition format)
+    Queue depths, waiting orders, generation latency histograms and
+    the YooKassa circuit breaker; scraped inside the docker network
+    (web:8000/metrics/) with Authorization: Bearer METRICS_TOKEN.
+    Without METRICS_TOKEN returns 404
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        return HttpResponse('Unauthorized', status=401, headers={'WWW-Authenticate': 'Bearer'})
+
+    return HttpResponse(metrics_exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 class TermsView(TemplateView):
     template_name = 'legal/terms.html'
 
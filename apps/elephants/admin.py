@@ -12,7 +12,7 @@ class ElephantAdmin(admin.ModelAdmin):
     list_display = ('id', 'elephant_name', 'color_preview', 'color_hex', 'owner', 'is_gifted', 'created_at')
     list_filter = ('is_gifted', 'created_at')
     search_fields = ('color_hex', 'owner__username')
-    readonly_fields = ('id', 'elephant_name', 'color_r', 'color_g', 'color_b', 'created_at', 'color_preview', 'image_preview')
+    readonly_fields = ('id', 'elephant_name', 'color_r', 'color_g', 'color_b', 'created_at', 'updated_at', 'color_preview', 'image_preview')
     date_hierarchy = 'created_at'
 
     fieldsets = (
@@ -26,7 +26,7 @@ class ElephantAdmin(admin.ModelAdmin):
             'fields': ('image', 'image_preview')
         }),
         ('Даты', {
-            'fields': ('created_at',)
+            'fields': ('created_at', 'updated_at')
         }),
     )
 
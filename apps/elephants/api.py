@@ -1,35 +1,55 @@
 """
 API endpoints for elephants
 """
-import re
+from typing import Optional
 
 from ninja import Router, Query
 from django.shortcuts import get_object_or_404
 from django.http import FileResponse, HttpResponse
 
 from .models import Elephant
-from .services import get_user_elephants, get_elephant_by_id
-from .schemas import ElephantListSchema, ElephantDetailSchema, ElephantLookupSchema
+from .services import get_user_elephants_page, get_elephant_by_id, find_elephant
+from .schemas import ElephantListSchema, ElephantPageSchema, ElephantDetailSchema, ElephantLookupSchema
 from apps.accounts.schemas import MessageSchema
 from apps.core.auth import auth
+from apps.core.cache import cached_user_response
+from apps.core.conditional import make_etag, etag_matches, set_etag, not_modified
+from apps.core.fields import parse_fields, InvalidFieldsError
+from apps.core.pagination import InvalidCursorError, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from apps.core.threads import in_thread_pool
 
 router = Router()
 
 
-@router.get("/", response={200: list[ElephantListSchema], 401: MessageSchema}, auth=auth)
-def list_elephants(request):
-    """Список слонов текущего пользователя"""
+@router.get("/", response={200: ElephantPageSchema, 400: MessageSchema, 401: MessageSchema}, auth=auth)
+def list_elephants(
+    request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    fields: Optional[str] = None,
+):
+    """Список слонов текущего пользователя (постранично, по курсору, ?fields=id,color_hex)"""
     # Auth handled by decorator - request.user is guaranteed authenticated
-    elephants = get_user_elephants(request.user)
-    return 200, list(elephants)
+    try:
+        selected = parse_fields(fields, ElephantListSchema)
+        return cached_user_response(
+            request, "elephants", f"{cursor}:{limit}:{','.join(selected or ())}", None,
+            lambda: get_user_elephants_page(request.user, cursor, limit, selected),
+        )
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        return 400, {"message": str(e)}
 
 
 @router.get("/{elephant_id}", response={200: ElephantDetailSchema, 401: MessageSchema, 403: MessageSchema, 404: MessageSchema}, auth=auth)
-def get_elephant(request, elephant_id: int):
-    """Детали слона"""
+def get_elephant(request, elephant_id: int, response: HttpResponse):
+    """Детали слона (поддерживает If-None-Match)"""
     # Auth handled by decorator - request.user is guaranteed authenticated
     try:
         elephant = get_elephant_by_id(elephant_id, request.user)
+        etag = make_etag('elephant', elephant.pk, elephant.updated_at.isoformat())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         return 200, elephant
     except Elephant.DoesNotExist:
         return 404, {"message": "Слон не найден"}
@@ -63,37 +83,15 @@ def download_elephant(request, elephant_id: int):
 
 
 @router.get("/lookup/", response={200: ElephantLookupSchema, 404: MessageSchema})
-def lookup_elephant(request, q: str = Query(...)):
-    """Public lookup: find elephant by color hex or name (case-insensitive)"""
+async def lookup_elephant(request, q: str = Query(...)):
+    """Public lookup: find elephant by color hex or name (case-insensitive, async)"""
     query = q.strip()
     if not query:
         return 404, {"message": "Введите цвет или имя слона"}
 
-    # Try as HEX color
-    hex_match = re.match(r'^#?([0-9a-fA-F]{6})$', query)
-    if hex_match:
-        color_hex = f"#{hex_match.group(1).upper()}"
-        try:
-            elephant = Elephant.objects.select_related('owner').get(color_hex=color_hex)
-            return 200, elephant
-        except Elephant.DoesNotExist:
-            return 404, {"message": f"Слон с цветом {color_hex} не найден. Этот цвет ещё свободен!"}
-
-    # Search by name (case-insensitive)
-    query_lower = query.lower()
-    for elephant in Elephant.objects.select_related('owner').all():
-        if elephant.get_name().lower() == query_lower:
-            return 200, elephant
-
-    # Partial match
-    results = []
-    for elephant in Elephant.objects.select_related('owner').all():
-        if query_lower in elephant.get_name().lower():
-            results.append(elephant)
-
-    if len(results) == 1:
-        return 200, results[0]
-    elif len(results) > 1:
-        return 404, {"message": f"Найдено {len(results)} слонов. Уточните запрос."}
-
-    return 404, {"message": "Слон не найден"}
+    try:
+        elephant = await in_thread_pool(find_elephant)(query)
+    except Elephant.DoesNotExist as e:
+        return 404, {"message": str(e)}
+
+    return 200, elephant
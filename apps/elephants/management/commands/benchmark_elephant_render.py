@@ -0,0 +1,108 @@
+"""
+Benchmark for elephant generation: a task per order vs render batches.
+
+Creates paid orders of a temporary user and fulfills them with:
+    per-order — generate_elephant_image + render_elephant_image for each order
+    batch     — render_paid_orders (fulfill_paid_orders in batches of --batch-size)
+
+Tasks run eagerly in this process, so broker round trips (two per order
+for per-order tasks, one per run for batches) are not included. Everything
+runs inside a transaction that is rolled back; image files are deleted.
+Batches also pick up other paid orders in the database (rolled back too).
+
+--fake-render replaces cairosvg with a fixed PNG to measure only the
+per-order overhead (queries, transactions, file writes).
+
+Usage:
+    python manage.py benchmark_elephant_render
+    python manage.py benchmark_elephant_render --orders 200 --batch-size 50 --fake-render
+"""
+import time
+from contextlib import nullcontext
+from io import BytesIO
+from unittest import mock
+
+from celery import current_app
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.elephants.models import Elephant
+from apps.elephants.tasks import generate_elephant_image, render_paid_orders
+from apps.payments.models import Order, Tariff
+
+# 1x1 PNG
+FAKE_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000b49444154789c6360000200000500017a5eab3f0000000049454e44ae426082'
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-order elephant tasks vs batched rendering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100, help='Paid orders per variant (default: 100)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Orders per batch (default: 50)')
+        parser.add_argument('--fake-render', action='store_true', help='Skip cairosvg, store a fixed PNG')
+
+    def handle(self, *args, **options):
+        if options['orders'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--orders and --batch-size must be positive')
+
+        render_patch = mock.patch(
+            'apps.elephants.services.generate_colored_elephant', lambda color_hex: BytesIO(FAKE_PNG)
+        ) if options['fake_render'] else nullcontext()
+
+        eager = current_app.conf.task_always_eager
+        current_app.conf.task_always_eager = True
+        files = []
+        try:
+            with render_patch, transaction.atomic():
+                user = User.objects.create(username=f'benchmark-render-{time.time_ns()}')
+                last_elephant = Elephant.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+                tariff = Tariff.objects.get(name=Tariff.BASIC)
+
+                def per_order(order_ids):
+                    for order_id in order_ids:
+                        generate_elephant_image.delay(order_id)
+
+                def batch(order_ids):
+                    with override_settings(ELEPHANT_RENDER_BATCH_SIZE=options['batch_size']):
+                        render_paid_orders()
+
+                for name, run in (('per-order', per_order), (f'batch/{options["batch_size"]}', batch)):
+                    orders = Order.objects.bulk_create(
+                        Order(user=user, tariff=tariff, status='paid') for _ in range(options['orders'])
+                    )
+                    order_ids = [order.pk for order in orders]
+
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        run(order_ids)
+                        elapsed = time.perf_counter() - started
+
+                    completed = Order.objects.filter(pk__in=order_ids, status='completed').count()
+                    self.stdout.write(
+                        f'{name:<10} {completed}/{len(order_ids)} completed: {elapsed:6.2f} s, '
+                        f'{elapsed / len(order_ids) * 1000:6.1f} ms/order, '
+                        f'{len(order_ids) / elapsed:7.1f} orders/s, '
+                        f'{len(queries) / len(order_ids):5.1f} queries/order'
+                    )
+
+                # Пачки забирают и другие оплаченные заказы — файлы всех новых слонов
+                files = list(Elephant.objects.filter(pk__gt=last_elephant).values_list('image', flat=True))
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            current_app.conf.task_always_eager = eager
+            storage = Elephant._meta.get_field('image').storage
+            for name in files:
+                storage.delete(name)
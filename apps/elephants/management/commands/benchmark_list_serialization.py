@@ -0,0 +1,121 @@
+"""
+Benchmark for elephant list serialization.
+
+Compares on the same synthetic rows (no database needed):
+    schema+json    — ElephantListSchema resolvers + stdlib json (old default renderer)
+    schema+orjson  — ElephantListSchema resolvers + ORJSONRenderer
+    rows+orjson    — elephant_list_rows() over values_list tuples + ORJSONRenderer
+
+and checks that all variants produce the same JSON document.
+
+Usage:
+    python manage.py benchmark_list_serialization
+    python manage.py benchmark_list_serialization --rows 10000 --repeat 5
+"""
+import json
+import random
+import time
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ninja.responses import NinjaJSONEncoder
+
+from apps.core.cache import dump_schema
+from apps.core.renderers import dumps
+from apps.elephants.models import Elephant
+from apps.elephants.schemas import ElephantPageSchema, ELEPHANT_LIST_ROW_FIELDS, elephant_list_rows
+from apps.gifts.models import GiftLink
+
+
+class Command(BaseCommand):
+    help = 'Benchmark elephant list serialization (schema vs values_list rows)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per response (default: 10000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per variant, best is reported (default: 5)')
+
+    def handle(self, *args, **options):
+        count = options['rows']
+        repeat = max(1, options['repeat'])
+        objects, rows = self._make_data(count)
+        image_url = Elephant._meta.get_field('image').storage.url
+
+        variants = {
+            'schema+json': lambda: json.dumps(
+                dump_schema(ElephantPageSchema, {"items": objects, "next": None}), cls=NinjaJSONEncoder
+            ).encode('utf-8'),
+            'schema+orjson': lambda: dumps(dump_schema(ElephantPageSchema, {"items": objects, "next": None})),
+            'rows+orjson': lambda: dumps({"items": elephant_list_rows(rows, image_url), "next": None}),
+        }
+
+        outputs = {}
+        timings = {}
+        for name, render in variants.items():
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                outputs[name] = render()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+
+        reference = json.loads(outputs['schema+json'])
+        for name, output in outputs.items():
+            if json.loads(output) != reference:
+                raise CommandError(f'{name} output differs from schema+json')
+
+        self.stdout.write(f'{count} rows, best of {repeat}:')
+        baseline = timings['schema+json']
+        for name, elapsed in timings.items():
+            self.stdout.write(
+                f'  {name:<14} {elapsed * 1000:9.1f} ms  x{baseline / elapsed:5.1f}  {len(outputs[name]) / 1024:8.0f} KiB'
+            )
+        self.stdout.write(self.style.SUCCESS('OK: identical JSON output'))
+
+    def _make_data(self, count):
+        """Build matching model instances and values_list rows"""
+        Row = namedtuple('Row', ELEPHANT_LIST_ROW_FIELDS)
+        recipient = User(pk=2, username='recipient')
+        now = timezone.now()
+        rng = random.Random(42)
+
+        objects = []
+        rows = []
+        for pk in range(count, 0, -1):
+            r, g, b = rng.randrange(256), rng.randrange(256), rng.randrange(256)
+            color_hex = f'#{r:02X}{g:02X}{b:02X}'
+            created_at = now - timedelta(minutes=pk)
+            image = f'elephants/2026/01/elephant_{color_hex[1:]}.png'
+            gift_kind = pk % 4  # 0 — нет подарка, 1 — ожидает, 2 — принят, 3 — без получателя
+
+            elephant = Elephant(
+                pk=pk, color_hex=color_hex, color_r=r, color_g=g, color_b=b,
+                image=image, is_gifted=gift_kind != 0, created_at=created_at,
+            )
+            elephant.is_owned_by_user = gift_kind != 2
+
+            gift = None
+            if gift_kind:
+                gift = GiftLink(
+                    pk=pk, uuid=uuid.UUID(int=pk), created_at=created_at + timedelta(seconds=1),
+                    is_claimed=gift_kind == 2, claimed_by=recipient if gift_kind == 2 else None,
+                    recipient_name='' if gift_kind == 3 else 'Друг',
+                )
+                elephant.gift_link = gift
+            objects.append(elephant)
+
+            rows.append(Row(
+                pk, color_hex, r, g, b, image, elephant.is_gifted, created_at,
+                elephant.is_owned_by_user,
+                gift.uuid if gift else None,
+                gift.created_at if gift else None,
+                gift.is_claimed if gift else None,
+                gift.recipient_name if gift else None,
+                recipient.username if gift and gift.is_claimed else None,
+            ))
+
+        return objects, rows
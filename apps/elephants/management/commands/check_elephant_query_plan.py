@@ -0,0 +1,146 @@
+"""
+Management command to verify that the dashboard elephant list is index-driven.
+
+Runs EXPLAIN for the first page of get_user_elephant_rows() — the query
+get_user_elephants_page() sends — and fails if the plan contains a
+sequential scan on any table.
+
+On a small database PostgreSQL prefers Seq Scan regardless of indexes.
+--seed N checks the real plan anywhere: inside a transaction that is
+rolled back it inserts N elephants (~1M for a production-sized table)
+with orders, owners and claimed gifts, runs ANALYZE and explains the
+page of one of the seeded users. --force-index only disables seqscan —
+a quick smoke check that a usable index exists, not that the planner
+picks it. Without both flags the plan of the current data is checked.
+
+Usage:
+    python manage.py check_elephant_query_plan --seed 1000000
+    python manage.py check_elephant_query_plan --user admin
+    python manage.py check_elephant_query_plan --user admin --force-index
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from apps.core.pagination import DEFAULT_PAGE_LIMIT
+from apps.elephants.models import Elephant
+from apps.elephants.services import get_user_elephant_rows
+from apps.gifts.models import GiftLink
+from apps.payments.models import Order, Tariff
+
+# Слонов на одного пользователя и доля подаренных в засеянных данных
+SEED_ELEPHANTS_PER_USER = 20
+SEED_GIFT_EVERY = 20
+SEED_CHUNK = 10000
+
+
+class Command(BaseCommand):
+    help = 'Check that get_user_elephant_rows() is served without sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            default=None,
+            help='Username to build the query for (default: first superuser; ignored with --seed)',
+        )
+        parser.add_argument(
+            '--force-index',
+            action='store_true',
+            help='Disable seqscan for the check (smoke check only)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Insert this many elephants (rolled back), ANALYZE and check the real plan',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plan check requires PostgreSQL')
+        if options['seed'] < 0:
+            raise CommandError('--seed must not be negative')
+
+        with transaction.atomic():
+            if options['seed']:
+                user = self._seed(options['seed'])
+            else:
+                user = self._get_user(options['user'])
+            queryset = get_user_elephant_rows(user).order_by('-created_at', '-id')[:DEFAULT_PAGE_LIMIT + 1]
+
+            if options['force_index']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+
+            # Засеянные данные не сохраняются
+            transaction.set_rollback(True)
+
+        self.stdout.write(plan)
+        self.stdout.write('')
+
+        seq_scans = [line.strip() for line in plan.splitlines() if 'Seq Scan' in line]
+        if seq_scans:
+            raise CommandError('Sequential scan in plan:\n  ' + '\n  '.join(seq_scans))
+
+        self.stdout.write(self.style.SUCCESS('OK: no sequential scans'))
+
+    def _seed(self, count: int):
+        """
+        Засеять count слонов с заказами, владельцами и подарками, выполнить ANALYZE
+
+        Returns:
+            Засеянный пользователь, чей список проверяется
+        """
+        tariff = Tariff.objects.filter(name=Tariff.BASIC).first()
+        if not tariff:
+            raise CommandError('No basic tariff found')
+
+        users = User.objects.bulk_create(
+            [User(username=f'plan-check-{i}', password='!') for i in range(max(2, count // SEED_ELEPHANTS_PER_USER))],
+            batch_size=SEED_CHUNK,
+        )
+        taken = set(Elephant.objects.values_list('color_hex', flat=True))
+        colors = (color for color in (f'#{value:06X}' for value in range(1 << 24)) if color not in taken)
+
+        for start in range(0, count, SEED_CHUNK):
+            numbers = range(start, min(start + SEED_CHUNK, count))
+            owners = [users[i % len(users)] for i in numbers]
+            orders = Order.objects.bulk_create(
+                [Order(user=owner, tariff=tariff, status='completed') for owner in owners]
+            )
+            elephants = []
+            for i, order, owner in zip(numbers, orders, owners):
+                color_hex = next(colors)
+                elephants.append(Elephant(
+                    owner=owner, order=order, color_hex=color_hex, image=f'elephants/seed/{color_hex[1:]}.png',
+                    color_r=int(color_hex[1:3], 16), color_g=int(color_hex[3:5], 16), color_b=int(color_hex[5:7], 16),
+                    is_gifted=i % SEED_GIFT_EVERY == 0,
+                ))
+            Elephant.objects.bulk_create(elephants)
+            # Подарок принят владельцем, отправитель — соседний пользователь
+            GiftLink.objects.bulk_create([
+                GiftLink(elephant=elephant, sender=users[(i + 1) % len(users)], is_claimed=True, claimed_by=elephant.owner)
+                for i, elephant in zip(numbers, elephants) if elephant.is_gifted
+            ])
+            self.stdout.write(f'  seeded {numbers.stop}/{count} elephants')
+
+        with connection.cursor() as cursor:
+            for model in (User, Order, Elephant, GiftLink):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+        return users[0]
+
+    def _get_user(self, username=None):
+        """Get user by username or first superuser"""
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User not found: {username}')
+
+        admin = User.objects.filter(is_superuser=True).first()
+        if not admin:
+            raise CommandError('No superuser found. Specify --user')
+        return admin
@@ -0,0 +1,128 @@
+"""
+Management command to remove elephant images that no Elephant row points to.
+
+Orphans are left when a render task dies between writing the file and
+committing the row, or when the commit fails; two-phase writes may also
+leave hidden temp files (.<name>.<uuid>.tmp).
+
+Shards (media/elephants/YYYY/MM) are scanned in a thread pool with
+os.scandir. Each shard is streamed in chunks of --chunk-size names and
+every chunk is checked with one indexed query (image IN (...)), so memory
+stays bounded by the chunk size regardless of the number of files.
+Files newer than --grace-hours are skipped: a file of an in-flight render
+is renamed into place just before its row is committed.
+
+Usage:
+    python manage.py purge_orphaned_media --dry-run
+    python manage.py purge_orphaned_media --grace-hours 24
+    python manage.py purge_orphaned_media --quarantine /var/backups/orphaned-media
+"""
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.elephants.models import Elephant
+
+IMAGE_ROOT = 'elephants'
+
+
+class Command(BaseCommand):
+    help = 'Delete or quarantine elephant images not referenced by any Elephant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24, help='Skip files newer than this (default: 24)')
+        parser.add_argument('--quarantine', default=None, help='Move orphans to this directory instead of deleting')
+        parser.add_argument('--dry-run', action='store_true', help='Only report orphans')
+        parser.add_argument('--workers', type=int, default=4, help='Shards scanned in parallel (default: 4)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='File names per DB query (default: 1000)')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be positive')
+
+        self.options = options
+        self.cutoff = time.time() - options['grace_hours'] * 3600
+        self.quarantine = os.path.abspath(options['quarantine']) if options['quarantine'] else None
+
+        shards = list(self._shards())
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(self._purge_shard, shards))
+
+        scanned = sum(result[0] for result in results)
+        orphans = sum(result[1] for result in results)
+        action = 'found' if options['dry_run'] else ('quarantined' if self.quarantine else 'deleted')
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {scanned} files in {len(shards)} shards, {action} {orphans} orphans'
+        ))
+
+    def _shards(self):
+        """Каталоги media/elephants/YYYY/MM"""
+        root = os.path.join(settings.MEDIA_ROOT, IMAGE_ROOT)
+        if not os.path.isdir(root):
+            return
+        with os.scandir(root) as years:
+            for year in years:
+                if year.is_dir(follow_symlinks=False):
+                    with os.scandir(year.path) as months:
+                        for month in months:
+                            if month.is_dir(follow_symlinks=False):
+                                yield month.path
+
+    def _candidates(self, shard: str):
+        """Файлы шарда старше grace period: (имя в storage, путь)"""
+        prefix = os.path.relpath(shard, settings.MEDIA_ROOT).replace(os.sep, '/')
+        with os.scandir(shard) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    if entry.stat(follow_symlinks=False).st_mtime >= self.cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                yield f'{prefix}/{entry.name}', entry.path
+
+    def _purge_shard(self, shard: str) -> tuple:
+        """
+        Returns:
+            Tuple (scanned, orphans)
+        """
+        scanned = orphans = 0
+        candidates = self._candidates(shard)
+        try:
+            while chunk := list(islice(candidates, self.options['chunk_size'])):
+                scanned += len(chunk)
+                referenced = set(
+                    Elephant.objects.filter(image__in=[name for name, _ in chunk]).values_list('image', flat=True)
+                )
+                for name, path in chunk:
+                    if name not in referenced:
+                        orphans += 1
+                        self._remove(name, path)
+        finally:
+            # Поток пула держит своё соединение с БД
+            connection.close()
+
+        return scanned, orphans
+
+    def _remove(self, name: str, path: str) -> None:
+        if self.options['verbosity'] > 1 or self.options['dry_run']:
+            self.stdout.write(f'  {name}')
+        if self.options['dry_run']:
+            return
+
+        try:
+            if self.quarantine:
+                target = os.path.join(self.quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,93 @@
+"""
+Management command to re-drive paid orders that failed elephant generation.
+
+Orders are taken in id order in chunks of --chunk-size: colors of a chunk
+are re-allocated in one transaction (SKIP LOCKED, one bulk UPDATE), then
+render tasks are sent to the bulk render queue. Before each chunk the
+command waits until that queue holds at most --max-queued messages, and
+pauses --interval seconds between chunks, so workers are never flooded.
+
+Re-running is safe: a re-driven order is in processing and is not picked
+again; render tasks skip orders that already have an elephant. Orders
+whose desired color is still taken stay failed.
+
+The admin action "Повторить генерацию" runs the same chunks as the Celery
+task redrive_failed_orders; --status shows the progress of that task.
+
+Usage:
+    python manage.py redrive_failed_orders --dry-run
+    python manage.py redrive_failed_orders --chunk-size 200 --interval 2
+    python manage.py redrive_failed_orders --orders 101 102 103
+    python manage.py redrive_failed_orders --status
+"""
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.elephants.services import failed_paid_orders
+from apps.elephants.tasks import (
+    REDRIVE_MAX_QUEUED,
+    REDRIVE_PROGRESS_KEY,
+    REDRIVE_QUEUE,
+    redrive_backlog,
+    redrive_chunk,
+    update_redrive_progress,
+)
+
+
+class Command(BaseCommand):
+    help = 'Re-allocate colors and re-queue renders for failed paid orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, nargs='+', default=None, help='Only these order IDs')
+        parser.add_argument('--chunk-size', type=int, default=100, help='Orders per chunk (default: 100)')
+        parser.add_argument('--interval', type=float, default=5, help='Pause between chunks, seconds (default: 5)')
+        parser.add_argument(
+            '--max-queued', type=int, default=REDRIVE_MAX_QUEUED,
+            help=f'Wait while the render queue holds more messages (default: {REDRIVE_MAX_QUEUED})',
+        )
+        parser.add_argument('--queue', default=REDRIVE_QUEUE, help=f'Render queue (default: {REDRIVE_QUEUE})')
+        parser.add_argument('--dry-run', action='store_true', help='Only count failed paid orders')
+        parser.add_argument('--status', action='store_true', help='Show progress of the last re-drive')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['interval'] < 0:
+            raise CommandError('--chunk-size must be positive and --interval non-negative')
+
+        if options['status']:
+            progress = cache.get(REDRIVE_PROGRESS_KEY)
+            self.stdout.write(str(progress) if progress else 'No re-drive recorded')
+            return
+
+        total = failed_paid_orders(options['orders']).count()
+        self.stdout.write(f'Failed paid orders: {total}')
+        if options['dry_run'] or not total:
+            return
+
+        after_id = 0
+        while True:
+            self._wait_for_backlog(options['queue'], options['max_queued'], options['interval'])
+
+            last_id, redriven, failed = redrive_chunk(
+                options['chunk_size'], after_id, options['orders'], options['queue']
+            )
+            progress = update_redrive_progress(after_id, last_id, redriven, failed)
+            if last_id is None:
+                break
+
+            self.stdout.write(
+                f'  up to #{last_id}: {progress["redriven"]}/{total} re-queued, {progress["failed"]} still failed'
+            )
+            after_id = last_id
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-queued {progress["redriven"]} orders to {options["queue"]}, {progress["failed"]} still failed'
+        ))
+
+    def _wait_for_backlog(self, queue: str, max_queued: int, interval: float) -> None:
+        """Ждать, пока в очереди рендера не больше max_queued сообщений"""
+        while (backlog := redrive_backlog(queue)) > max_queued:
+            self.stdout.write(f'  {backlog} renders queued in {queue}, waiting')
+            time.sleep(max(interval, 1))
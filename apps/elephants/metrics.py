@@ -0,0 +1,207 @@
+"""
+Metrics of elephant generation for monitoring and worker autoscaling.
+
+    elephant_queue_depth                 — сообщений в очередях брокера (LLEN)
+    elephant_unacked_messages            — сообщений, взятых воркерами и не подтверждённых
+    elephant_orders_waiting              — заказы paid/processing и возраст старейшего
+    elephant_task_wait_seconds           — от оплаты заказа до старта шага
+    elephant_task_run_seconds            — время выполнения шага по итогу
+    elephant_queue_wait_seconds          — ожидание в очереди (routing.py)
+    elephant_stage_seconds               — этапы шага (при ELEPHANT_STAGE_TIMINGS)
+    circuit_breaker_*{breaker="yookassa"} — состояние и счётчики breaker платёжного шлюза
+
+Гистограммы пишут воркеры (tasks._run_exclusive), gauge считаются при
+чтении. Экспозиция — metrics_exposition() для /metrics/.
+"""
+import logging
+import time
+
+from celery import current_app
+from django.conf import settings
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from apps.core.metrics import format_gauge, format_histogram, observe
+from .routing import QUEUE_WAIT_METRIC, QUEUES, STEP_TASKS
+
+logger = logging.getLogger('apps')
+
+TASK_WAIT_METRIC = 'elephant_task_wait_seconds'
+TASK_RUN_METRIC = 'elephant_task_run_seconds'
+STAGE_METRIC = 'elephant_stage_seconds'
+
+# Время выполнения шага: от десятков миллисекунд (выделение) до секунд (рендер)
+RUN_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Этапы шагов (span в tasks.py, services.py, utils.py); transaction включает
+# db_insert и file_rename
+STEP_STAGES = {
+    'allocate': ('load_order', 'color_probe', 'reserve'),
+    'render': (
+        'load_order', 'elephant_exists', 'svg_template', 'rasterize', 'file_write',
+        'transaction', 'db_insert', 'file_rename',
+    ),
+}
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+# Итоги шага: success — шаг выполнен, skipped — вернул success=False (заказ
+# не в том статусе, цвет занят), duplicate — lease у другого воркера,
+# retry — повтор по countdown, failure — исключение
+TASK_STATUSES = ('success', 'skipped', 'duplicate', 'retry', 'failure')
+
+# Очередь задач без маршрута (платежи, webhook inbox, beat)
+DEFAULT_QUEUE = 'celery'
+
+# Ключ kombu Redis transport с сообщениями, ожидающими ack
+UNACKED_KEY = 'unacked'
+
+
+def record_task_wait(step: str, paid_at) -> None:
+    """
+    Записать время от оплаты заказа до старта шага
+
+    Args:
+        step: Шаг генерации (allocate, render)
+        paid_at: Время оплаты (None — не записывается)
+    """
+    if paid_at is None:
+        return
+    observe(TASK_WAIT_METRIC, max(0.0, (timezone.now() - paid_at).total_seconds()), step=step)
+
+
+def record_task_run(step: str, status: str, seconds: float) -> None:
+    """
+    Записать время выполнения шага
+
+    Args:
+        step: Шаг генерации
+        status: Итог из TASK_STATUSES
+        seconds: Длительность
+    """
+    observe(TASK_RUN_METRIC, seconds, RUN_BUCKETS, step=step, status=status)
+
+
+def record_stage_timings(step: str, timings) -> None:
+    """
+    Записать времена этапов шага
+
+    Args:
+        step: Шаг генерации
+        timings: apps.core.timing.Timings
+    """
+    for stage, seconds in timings.stages.items():
+        observe(STAGE_METRIC, seconds, STAGE_BUCKETS, step=step, stage=stage)
+
+
+def queue_depths() -> dict:
+    """
+    Длины очередей в Redis-брокере
+
+    Returns:
+        Dict: очередь -> число сообщений, UNACKED_KEY -> число взятых
+        воркерами; пустой dict, если брокер недоступен
+    """
+    queues = (DEFAULT_QUEUE,) + QUEUES
+    try:
+        with current_app.connection_for_read() as conn:
+            pipe = conn.default_channel.client.pipeline()
+            for queue in queues:
+                pipe.llen(queue)
+            pipe.hlen(UNACKED_KEY)
+            *lengths, unacked = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to read queue depths from broker: {e}")
+        return {}
+
+    depths = dict(zip(queues, lengths))
+    depths[UNACKED_KEY] = unacked
+    return depths
+
+
+def orders_waiting() -> dict:
+    """
+    Оплаченные заказы, ожидающие генерации
+
+    Returns:
+        Dict статус (paid, processing) -> {count, oldest_seconds}
+    """
+    from apps.payments.models import Order
+
+    now = timezone.now()
+    waiting = {status: {'count': 0, 'oldest_seconds': 0} for status in ('paid', 'processing')}
+    rows = (
+        Order.objects.filter(status__in=waiting)
+        .values('status')
+        .annotate(count=Count('id'), oldest=Min('paid_at'))
+    )
+    for row in rows:
+        waiting[row['status']] = {
+            'count': row['count'],
+            'oldest_seconds': round((now - row['oldest']).total_seconds(), 1) if row['oldest'] else 0,
+        }
+    return waiting
+
+
+def metrics_exposition() -> str:
+    """
+    Метрики генерации в текстовом формате Prometheus
+
+    Returns:
+        Текст для /metrics/
+    """
+    started = time.monotonic()
+    steps = sorted(set(STEP_TASKS.values()))
+    lines = []
+
+    depths = queue_depths()
+    if depths:
+        unacked = depths.pop(UNACKED_KEY)
+        lines += format_gauge(
+            'elephant_queue_depth', 'Messages waiting in the broker queue',
+            [({'queue': queue}, length) for queue, length in depths.items()],
+        )
+        lines += format_gauge(
+            'elephant_unacked_messages', 'Messages reserved by workers and not acknowledged',
+            [({}, unacked)],
+        )
+
+    waiting = orders_waiting()
+    lines += format_gauge(
+        'elephant_orders_waiting', 'Paid orders waiting for an elephant',
+        [({'status': status}, data['count']) for status, data in waiting.items()],
+    )
+    lines += format_gauge(
+        'elephant_orders_oldest_wait_seconds', 'Age of the oldest waiting order since payment',
+        [({'status': status}, data['oldest_seconds']) for status, data in waiting.items()],
+    )
+
+    lines += format_histogram(
+        TASK_WAIT_METRIC, 'Time from payment to generation step start',
+        [{'step': step} for step in steps],
+    )
+    lines += format_histogram(
+        TASK_RUN_METRIC, 'Generation step run time by result',
+        [{'step': step, 'status': status} for step in steps for status in TASK_STATUSES],
+        RUN_BUCKETS,
+    )
+    lines += format_histogram(
+        QUEUE_WAIT_METRIC, 'Time a generation task waited in its queue',
+        [{'queue': queue} for queue in QUEUES],
+    )
+
+    if settings.ELEPHANT_STAGE_TIMINGS:
+        lines += format_histogram(
+            STAGE_METRIC, 'Generation step stage time',
+            [{'step': step, 'stage': stage} for step, stages in STEP_STAGES.items() for stage in stages],
+            STAGE_BUCKETS,
+        )
+
+    # Платёжный шлюз (импорт здесь: yookassa_service импортирует tasks)
+    from apps.payments.yookassa_service import yookassa_breaker
+    lines += yookassa_breaker.exposition()
+
+    lines += format_gauge(
+        'elephant_metrics_scrape_seconds', 'Time spent collecting these metrics',
+        [({}, round(time.monotonic() - started, 4))],
+    )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elephants', '0003_remove_elephant_elephants_e_owner_idx_and_more'),
+        ('payments', '0007_add_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='elephant',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='elephants_e_owner_keyset_idx'),
+        ),
+    ]
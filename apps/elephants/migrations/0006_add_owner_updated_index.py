@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elephants', '0005_add_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='elephant',
+            index=models.Index(fields=['owner', 'updated_at'], name='elephants_e_owner_updated_idx'),
+        ),
+    ]
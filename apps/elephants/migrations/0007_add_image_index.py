@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elephants', '0006_add_owner_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='elephant',
+            index=models.Index(fields=['image'], name='elephants_e_image_idx'),
+        ),
+    ]
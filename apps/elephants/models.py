@@ -50,11 +50,23 @@ class Elephant(models.Model):
         auto_now_add=True,
         verbose_name="Дата создания"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
 
     class Meta:
         verbose_name = "Слон"
         verbose_name_plural = "Слоны"
         ordering = ['-created_at']
+        indexes = [
+            # Ветка "мои слоны" в get_user_elephant_rows + keyset пагинация
+            models.Index(fields=['owner', '-created_at', '-id'], name='elephants_e_owner_keyset_idx'),
+            # Delta sync (/api/sync): изменения пользователя после updated_at
+            models.Index(fields=['owner', 'updated_at'], name='elephants_e_owner_updated_idx'),
+            # purge_orphaned_media: проверка ссылок на файлы пачками имён
+            models.Index(fields=['image'], name='elephants_e_image_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["color_hex"],
@@ -122,10 +134,10 @@ class Elephant(models.Model):
     def mark_as_gifted(self):
         """Отметить слона как подаренного"""
         self.is_gifted = True
-        self.save(update_fields=['is_gifted'])
+        self.save(update_fields=['is_gifted', 'updated_at'])
 
     def transfer_ownership(self, new_owner):
         """Передать слона новому владельцу"""
         self.owner = new_owner
         self.is_gifted = True
-        self.save(update_fields=['owner', 'is_gifted'])
+        self.save(update_fields=['owner', 'is_gifted', 'updated_at'])
@@ -9,6 +9,7 @@
 Формат: "Прилагательное Существительное Существительное(род.п.)"
 Примеры: "Вечный Свет Мечты", "Храбрая Заря Судьбы", "Мудрый Рассвет Надежды"
 """
+from functools import cache
 
 
 # Прилагательные (для R компонента, 0-255)
@@ -205,6 +206,41 @@ def generate_elephant_name(color_hex: str) -> str:
     return f"{adjective} {noun} {genitive_noun}"
 
 
+@cache
+def _name_table() -> tuple[str, ...]:
+    """
+    Таблица всех имён: 32 (R) × 32 (G) × 16 (B) = 16384 строки.
+
+    Имя зависит только от старших битов компонент, поэтому таблица строится
+    один раз на процесс через generate_elephant_name() и гарантированно
+    совпадает с ним.
+    """
+    return tuple(
+        generate_elephant_name(f'#{r * 8:02X}{g * 8:02X}{b * 16:02X}')
+        for r in range(32)
+        for g in range(32)
+        for b in range(16)
+    )
+
+
+def elephant_name_from_rgb(r: int, g: int, b: int) -> str:
+    """
+    Имя слона по RGB компонентам через предвычисленную таблицу.
+
+    Быстрый эквивалент generate_elephant_name() для сериализации списков:
+    без разбора HEX и сборки строки.
+
+    Args:
+        r: Красный (0-255)
+        g: Зелёный (0-255)
+        b: Синий (0-255)
+
+    Returns:
+        То же имя, что generate_elephant_name() для этого цвета
+    """
+    return _name_table()[(r >> 3) * 512 + (g >> 3) * 16 + (b >> 4)]
+
+
 def get_name_components(color_hex: str) -> dict[str, str]:
     """
     Возвращает компоненты имени отдельно (для отладки или UI).
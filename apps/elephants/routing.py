@@ -0,0 +1,135 @@
+"""
+Celery routing of elephant generation by priority class.
+
+Классы очередей:
+    priority — заказы advanced тарифа и заказы, оплаченные дольше
+               PRIORITY_AGE назад (basic не голодает за потоком advanced)
+    basic    — остальные заказы basic тарифа
+    bulk     — пакетная работа (render_paid_orders, массовые перезапуски)
+
+Очередь шага = имя шага + суффикс класса: allocate.priority, allocate,
+render.priority, render, render.bulk. Классы обслуживают разные воркеры
+(см. docker-compose.prod.yml): у priority свои воркеры, поэтому поток basic
+не уменьшает их слоты, а пакетная работа не занимает процессы
+интерактивных заказов.
+"""
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.core.metrics import observe
+
+PRIORITY = 'priority'
+BASIC = 'basic'
+BULK = 'bulk'
+
+# Заказ, ждущий дольше, идёт в приоритетную очередь независимо от тарифа
+PRIORITY_AGE = timedelta(minutes=5)
+
+# Задачи шагов генерации: имя задачи -> шаг (префикс очереди)
+STEP_TASKS = {
+    'apps.elephants.tasks.generate_elephant_image': 'allocate',
+    'apps.elephants.tasks.render_elephant_image': 'render',
+}
+
+# Все очереди генерации
+QUEUES = ('allocate.priority', 'allocate', 'render.priority', 'render', 'render.bulk')
+
+QUEUE_WAIT_METRIC = 'elephant_queue_wait_seconds'
+
+
+def queue_class(tariff_name: str, paid_at=None) -> str:
+    """
+    Класс приоритета заказа
+
+    Args:
+        tariff_name: Название тарифа
+        paid_at: Время оплаты (None — только что)
+
+    Returns:
+        PRIORITY или BASIC
+    """
+    from apps.payments.models import Tariff
+
+    if tariff_name == Tariff.ADVANCED:
+        return PRIORITY
+    if paid_at is not None and timezone.now() - paid_at > PRIORITY_AGE:
+        return PRIORITY
+    return BASIC
+
+
+def queue_name(step: str, klass: str) -> str:
+    """
+    Имя очереди шага для класса
+
+    Returns:
+        'render' для basic, 'render.priority' / 'render.bulk' для остальных
+    """
+    return step if klass == BASIC else f'{step}.{klass}'
+
+
+def order_queue(step: str, order) -> str:
+    """
+    Очередь шага для уже загруженного заказа (без запроса в роутере)
+
+    Args:
+        step: Шаг генерации (allocate, render)
+        order: Order объект с загруженным tariff
+
+    Returns:
+        Имя очереди для queue= при публикации
+    """
+    return queue_name(step, queue_class(order.tariff.name, order.paid_at))
+
+
+def route_elephant_task(name, args, kwargs, options, task=None, **kw):
+    """
+    Celery router (CELERY_TASK_ROUTES): очередь шага по тарифу и возрасту заказа
+
+    Явный queue= при вызове имеет приоритет, и роутер выходит без запроса:
+    так публикуют вызывающие с загруженным заказом (order_queue()) и пакетная
+    работа. Повтор (task.retry) получает exchange/routing_key из
+    delivery_info исходной задачи и уходит в её очередь — по routing_key
+    роутер тоже выходит сразу. Заказ читается из БД только для публикаций
+    без очереди.
+
+    Returns:
+        {'queue': ...} для задач шагов генерации, иначе None
+    """
+    from apps.payments.models import Order
+
+    if options.get('queue') or options.get('routing_key'):
+        return None
+
+    step = STEP_TASKS.get(name)
+    if step is None:
+        return None
+
+    order_id = args[0] if args else (kwargs or {}).get('order_id')
+    row = Order.objects.filter(pk=order_id).values_list('tariff__name', 'paid_at').first()
+    klass = queue_class(*row) if row else BASIC
+    return {'queue': queue_name(step, klass)}
+
+
+def record_queue_wait(request):
+    """
+    Записать время ожидания задачи в очереди (метрика по очереди)
+
+    Время отсчитывается от заголовка ready_at (момент публикации или ETA,
+    ставится в config/celery.py); задачи без заголовка (eager) пропускаются.
+
+    Args:
+        request: task.request
+
+    Returns:
+        Ожидание в секундах или None, если задача без заголовка
+    """
+    ready_at = request.get('ready_at') or (request.headers or {}).get('ready_at')
+    queue = (request.delivery_info or {}).get('routing_key')
+    if ready_at is None or not queue:
+        return None
+    wait = max(0.0, time.time() - ready_at)
+    observe(QUEUE_WAIT_METRIC, wait, queue=queue)
+    return wait
+
@@ -6,6 +6,8 @@ from datetime import datetime
 from typing import Optional
 from pydantic import ConfigDict
 
+from .name_generator import elephant_name_from_rgb
+
 
 class ElephantListSchema(Schema):
     """Схема слона для списка"""
@@ -69,6 +71,121 @@ class ElephantListSchema(Schema):
         return None
 
 
+# Колонки values_list() для быстрой сериализации ElephantListSchema
+ELEPHANT_LIST_ROW_FIELDS = (
+    'id', 'color_hex', 'color_r', 'color_g', 'color_b', 'image', 'is_gifted', 'created_at',
+    'is_owned_by_user', 'gift_link__uuid', 'gift_link__created_at', 'gift_link__is_claimed',
+    'gift_link__recipient_name', 'gift_link__claimed_by__username',
+)
+
+
+# Колонки ELEPHANT_LIST_ROW_FIELDS, которые читает каждое поле ElephantListSchema
+_GIFT_COLUMNS = ('is_gifted', 'gift_link__uuid')
+ELEPHANT_LIST_FIELD_COLUMNS = {
+    'id': ('id',),
+    'name': ('color_r', 'color_g', 'color_b'),
+    'color_hex': ('color_hex',),
+    'color_r': ('color_r',),
+    'color_g': ('color_g',),
+    'color_b': ('color_b',),
+    'image': ('image',),
+    'image_url': ('image',),
+    'color_display': ('color_r', 'color_g', 'color_b'),
+    'is_gifted': ('is_gifted',),
+    'is_owned_by_user': ('is_owned_by_user',),
+    'gift_recipient': _GIFT_COLUMNS + (
+        'gift_link__is_claimed', 'gift_link__recipient_name', 'gift_link__claimed_by__username',
+    ),
+    'gift_date': _GIFT_COLUMNS + ('gift_link__created_at',),
+    'gift_uuid': _GIFT_COLUMNS,
+    'created_at': ('created_at',),
+}
+
+
+def _row_gifted(row) -> bool:
+    """Есть ли у слона подарочная ссылка (LEFT JOIN вернул строку)"""
+    return row.is_gifted and row.gift_link__uuid is not None
+
+
+def _row_gift_recipient(row) -> str:
+    """Эквивалент GiftLink.get_recipient_display() для строки"""
+    if row.gift_link__is_claimed and row.gift_link__claimed_by__username:
+        return row.gift_link__claimed_by__username
+    return row.gift_link__recipient_name or "Не указан"
+
+
+# Значение каждого поля ElephantListSchema из строки values_list()
+_ELEPHANT_ROW_GETTERS = {
+    'id': lambda row, image_url: row.id,
+    'name': lambda row, image_url: elephant_name_from_rgb(row.color_r, row.color_g, row.color_b),
+    'color_hex': lambda row, image_url: row.color_hex,
+    'color_r': lambda row, image_url: row.color_r,
+    'color_g': lambda row, image_url: row.color_g,
+    'color_b': lambda row, image_url: row.color_b,
+    'image': lambda row, image_url: row.image or None,
+    'image_url': lambda row, image_url: image_url(row.image) if row.image else None,
+    'color_display': lambda row, image_url: f"RGB({row.color_r}, {row.color_g}, {row.color_b})",
+    'is_gifted': lambda row, image_url: row.is_gifted,
+    'is_owned_by_user': lambda row, image_url: bool(row.is_owned_by_user),
+    'gift_recipient': lambda row, image_url: _row_gift_recipient(row) if _row_gifted(row) else None,
+    'gift_date': lambda row, image_url: row.gift_link__created_at if _row_gifted(row) else None,
+    'gift_uuid': lambda row, image_url: str(row.gift_link__uuid) if _row_gifted(row) else None,
+    'created_at': lambda row, image_url: row.created_at,
+}
+
+
+def elephant_list_rows(rows, image_url, fields: tuple = None) -> list[dict]:
+    """
+    Быстрый эквивалент ElephantListSchema для строк values_list(named=True)
+
+    Даёт те же поля и значения, что схема, но без резолверов и моделей:
+    имя берётся из предвычисленной таблицы, подарок — из колонок JOIN.
+
+    Args:
+        rows: Итерируемое строк с полями ELEPHANT_LIST_ROW_FIELDS
+            (при fields — только с колонками ELEPHANT_LIST_FIELD_COLUMNS этих полей)
+        image_url: Функция name -> URL (storage.url поля image)
+        fields: Tuple полей ответа (sparse fieldset) или None — все поля
+
+    Returns:
+        Список dict в порядке полей ElephantListSchema
+    """
+    if fields is not None:
+        getters = [(name, _ELEPHANT_ROW_GETTERS[name]) for name in fields]
+        return [{name: get(row, image_url) for name, get in getters} for row in rows]
+
+    items = []
+    append = items.append
+    for row in rows:
+        r, g, b = row.color_r, row.color_g, row.color_b
+        gifted = _row_gifted(row)
+        image = row.image or None
+        append({
+            "id": row.id,
+            "name": elephant_name_from_rgb(r, g, b),
+            "color_hex": row.color_hex,
+            "color_r": r,
+            "color_g": g,
+            "color_b": b,
+            "image": image,
+            "image_url": image_url(image) if image else None,
+            "color_display": f"RGB({r}, {g}, {b})",
+            "is_gifted": row.is_gifted,
+            "is_owned_by_user": bool(row.is_owned_by_user),
+            "gift_recipient": _row_gift_recipient(row) if gifted else None,
+            "gift_date": row.gift_link__created_at if gifted else None,
+            "gift_uuid": str(row.gift_link__uuid) if gifted else None,
+            "created_at": row.created_at,
+        })
+    return items
+
+
+class ElephantPageSchema(Schema):
+    """Страница списка слонов (keyset пагинация)"""
+    items: list[ElephantListSchema]
+    next: Optional[str] = None
+
+
 class ElephantDetailSchema(Schema):
     """Детальная схема слона"""
     model_config = ConfigDict(from_attributes=True)
@@ -1,11 +1,21 @@
 """
 Business logic services for elephants
 """
-from django.db import transaction
-from django.core.files.base import ContentFile
+import logging
+import os
+import re
+import uuid
 
+from django.db import IntegrityError, transaction
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from apps.core.timing import span
+from apps.core.tracing import trace, trace_span
 from .models import Elephant
-from .utils import generate_colored_elephant
+from .utils import generate_colored_elephant, generate_random_color, generate_color_from_hue, hex_to_rgb
+
+logger = logging.getLogger(__name__)
 
 
 def check_color_availability(color_hex: str) -> bool:
@@ -18,84 +28,658 @@ def check_color_availability(color_hex: str) -> bool:
     Returns:
         True если цвет доступен (не занят)
     """
-    return not Elephant.objects.filter(color_hex=color_hex.upper()).exists()
+    from apps.payments.models import Order
+
+    color_hex = color_hex.upper()
+    return not (
+        Elephant.objects.filter(color_hex=color_hex).exists()
+        or Order.objects.filter(allocated_color=color_hex).exists()
+    )
+
+
+class ColorAllocationError(Exception):
+    """Raised when a color cannot be chosen for an order."""
+    pass
+
+
+class ColorTakenError(ValueError):
+    """Raised when the color is already taken by another elephant."""
+    pass
+
+
+def _color_source(order):
+    """
+    Источник цвета заказа по тарифу
+
+    Returns:
+        Tuple (exact, generate): точный желаемый цвет (advanced #RRGGBB)
+        или None и функция генерации случайного цвета
+
+    Raises:
+        ColorAllocationError: Если формат оттенка некорректен
+    """
+    from apps.payments.models import Tariff
+
+    desired = order.desired_color
+
+    if order.tariff.name == Tariff.ADVANCED and desired and not desired.startswith('HUE:'):
+        # Точный цвет (для обратной совместимости)
+        return desired.upper(), None
+
+    if order.tariff.name == Tariff.ADVANCED and desired:
+        try:
+            hue = int(desired.split(':')[1])
+        except (ValueError, IndexError):
+            raise ColorAllocationError('Invalid hue format')
+        return None, lambda: generate_color_from_hue(hue)
+
+    return None, generate_random_color
+
+
+def pick_elephant_color(order, max_attempts: int = 10) -> str:
+    """
+    Выбор свободного цвета для заказа по тарифу
+
+    basic — случайный цвет, advanced — цвет в оттенке (HUE:XXX) или точный
+    желаемый цвет. Цвет только выбирается; резервирует его
+    reserve_elephant_color().
+
+    Args:
+        order: Order объект (с tariff)
+        max_attempts: Попыток найти свободный случайный цвет
+
+    Returns:
+        Цвет в формате #RRGGBB
+
+    Raises:
+        ColorAllocationError: Если свободный цвет не найден или желаемый занят
+    """
+    exact, generate = _color_source(order)
+
+    if exact:
+        if not check_color_availability(exact):
+            raise ColorAllocationError(f'Color {exact} is already taken')
+        return exact
+
+    for attempt in range(max_attempts):
+        color_hex = generate()
+        if check_color_availability(color_hex):
+            return color_hex.upper()
+
+    raise ColorAllocationError(f'Failed to generate unique color after {max_attempts} attempts')
+
+
+def _taken_colors(colors) -> set:
+    """Цвета из colors, занятые слонами или резервами заказов (два запроса)"""
+    from apps.payments.models import Order
+
+    colors = list(colors)
+    return (
+        set(Elephant.objects.filter(color_hex__in=colors).values_list('color_hex', flat=True))
+        | set(Order.objects.filter(allocated_color__in=colors).values_list('allocated_color', flat=True))
+    )
+
+
+def pick_elephant_colors(orders, max_attempts: int = 10) -> tuple:
+    """
+    Выбор свободных цветов для пачки заказов
+
+    Как pick_elephant_color(), но кандидаты всех заказов проверяются
+    одним набором запросов за раунд (вместо запроса на цвет), а
+    совпадения внутри пачки отсекаются в памяти.
+
+    Args:
+        orders: Order объекты (с tariff)
+        max_attempts: Раундов генерации для случайных цветов
+
+    Returns:
+        Tuple (colors, errors): dict order.pk -> цвет и dict order.pk -> причина
+        для заказов, которым цвет не выбран
+    """
+    colors = {}
+    errors = {}
+    sources = {}
+    for order in orders:
+        try:
+            sources[order.pk] = _color_source(order)
+        except ColorAllocationError as e:
+            errors[order.pk] = str(e)
+
+    for attempt in range(max_attempts):
+        candidates = {
+            order_id: exact or generate().upper()
+            for order_id, (exact, generate) in sources.items()
+            if order_id not in colors and order_id not in errors
+        }
+        if not candidates:
+            break
+
+        taken = _taken_colors(candidates.values()) | set(colors.values())
+        for order_id, color_hex in candidates.items():
+            if color_hex not in taken:
+                colors[order_id] = color_hex
+                taken.add(color_hex)
+            elif sources[order_id][0]:
+                errors[order_id] = f'Color {color_hex} is already taken'
+
+    for order_id in sources:
+        if order_id not in colors and order_id not in errors:
+            errors[order_id] = f'Failed to generate unique color after {max_attempts} attempts'
+
+    return colors, errors
+
+
+def reserve_elephant_color(order, color_hex: str) -> bool:
+    """
+    Резервирование цвета за заказом
+
+    Один UPDATE без сигналов (поле не отдаётся в API): уникальный индекс
+    Order.allocated_color отсекает гонку двух заказов за один цвет,
+    условие allocated_color IS NULL — повторное резервирование того же заказа.
+
+    Args:
+        order: Order объект
+        color_hex: Цвет в формате #RRGGBB
+
+    Returns:
+        True если цвет зарезервирован, False если цвет занят или
+        у заказа уже есть цвет
+    """
+    from apps.payments.models import Order
+
+    color_hex = color_hex.upper()
+    try:
+        with transaction.atomic():
+            reserved = Order.objects.filter(pk=order.pk, allocated_color__isnull=True).update(
+                allocated_color=color_hex
+            )
+    except IntegrityError:
+        return False
+
+    if reserved:
+        order.allocated_color = color_hex
+    return bool(reserved)
+
+
+def release_elephant_color(order) -> None:
+    """
+    Снять резерв цвета с заказа (цвет оказался занят слоном вне резерва)
+
+    Args:
+        order: Order объект
+    """
+    from apps.payments.models import Order
+
+    Order.objects.filter(pk=order.pk).update(allocated_color=None)
+    order.allocated_color = None
+
+
+class StagedImage:
+    """
+    PNG слона, записанный во временный файл рядом с итоговым
+
+    Первая фаза записи — stage_elephant_image() (вне транзакции), вторая —
+    commit(): атомарный os.replace() в итоговое имя внутри транзакции,
+    создающей слона. discard() удаляет временный и переименованный файл,
+    если транзакция не зафиксирована.
+    """
+
+    def __init__(self, name: str, temp_path: str, path: str):
+        self.name = name
+        self.temp_path = temp_path
+        self.path = path
+
+    def commit(self) -> None:
+        """Переименовать временный файл в итоговый (атомарно в пределах ФС)"""
+        os.replace(self.temp_path, self.path)
+
+    def discard(self) -> None:
+        """Удалить файлы неудавшейся записи"""
+        for path in (self.temp_path, self.path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def stage_elephant_image(color_hex: str, image_bytes=None) -> StagedImage:
+    """
+    Рендер PNG и запись во временный файл (первая фаза записи)
+
+    Итоговое имя — как у ImageField (upload_to, свободное имя в storage);
+    временный файл лежит в том же каталоге, поэтому rename атомарен.
+
+    Args:
+        color_hex: Цвет в формате #RRGGBB
+        image_bytes: BytesIO с изображением (опционально, будет сгенерировано если None)
+
+    Returns:
+        StagedImage
+    """
+    color_hex = color_hex.upper()
+    if image_bytes is None:
+        image_bytes = generate_colored_elephant(color_hex)
+
+    field = Elephant._meta.get_field('image')
+    name = field.storage.get_available_name(
+        field.generate_filename(None, f"elephant_{color_hex.lstrip('#')}.png"),
+        max_length=field.max_length,
+    )
+    path = field.storage.path(name)
+    directory, basename = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+
+    temp_path = os.path.join(directory, f'.{basename}.{uuid.uuid4().hex}.tmp')
+    with span('file_write'), open(temp_path, 'wb') as temp_file:
+        temp_file.write(image_bytes.read())
+
+    return StagedImage(name, temp_path, path)
 
 
-@transaction.atomic
-def create_elephant(order, color_hex: str, image_bytes=None) -> Elephant:
+def create_elephant(order, color_hex: str, image_bytes=None, staged: StagedImage = None) -> Elephant:
     """
     Создание нового слона
 
+    Изображение рендерится и пишется во временный файл до транзакции;
+    транзакция (savepoint внутри внешней) только вставляет строку и
+    переименовывает файл. При ошибке файлы удаляются.
+
     Args:
         order: Order объект
         color_hex: Цвет в формате #RRGGBB
         image_bytes: BytesIO с изображением (опционально, будет сгенерировано если None)
+        staged: Уже записанное изображение (stage_elephant_image()); тогда
+            image_bytes не используется
 
     Returns:
         Созданный Elephant объект
 
     Raises:
-        ValueError: Если цвет уже занят (relies on database-level uniqueness constraint)
+        ColorTakenError: Если цвет уже занят (relies on database-level uniqueness constraint)
     """
-    from django.db import IntegrityError
-
     # Нормализуем цвет
     color_hex = color_hex.upper()
 
-    # Генерируем изображение если не передано
-    if image_bytes is None:
-        image_bytes = generate_colored_elephant(color_hex)
+    if staged is None:
+        staged = stage_elephant_image(color_hex, image_bytes)
 
     try:
-        # Создаём объект слона
-        elephant = Elephant(
-            owner=order.user,
-            order=order,
-            color_hex=color_hex
-        )
-
-        # Сохраняем изображение
-        filename = f"elephant_{color_hex.lstrip('#')}.png"
-        elephant.image.save(filename, ContentFile(image_bytes.read()), save=False)
-
-        # Сохраняем объект (save() автоматически распарсит HEX в RGB)
-        # Database UniqueConstraint on color_hex ensures atomicity - no race condition
-        elephant.save()
+        with transaction.atomic():
+            # Создаём объект слона
+            elephant = Elephant(
+                owner=order.user,
+                order=order,
+                color_hex=color_hex,
+                image=staged.name
+            )
+
+            # Сохраняем объект (save() автоматически распарсит HEX в RGB)
+            # Database UniqueConstraint on color_hex ensures atomicity - no race condition
+            with span('db_insert'):
+                elephant.save()
+            with span('file_rename'):
+                staged.commit()
 
         return elephant
 
     except IntegrityError as e:
+        staged.discard()
         # Check if it's the color uniqueness violation
         if 'unique_elephant_color' in str(e).lower() or 'color_hex' in str(e).lower():
-            raise ValueError(f"Цвет {color_hex} уже занят другим слоном")
+            raise ColorTakenError(f"Цвет {color_hex} уже занят другим слоном")
         # Re-raise if it's a different integrity error
         raise
 
+    except ValidationError as e:
+        staged.discard()
+        # full_clean() в save() проверяет уникальность раньше БД
+        if 'color_hex' in getattr(e, 'error_dict', {}):
+            raise ColorTakenError(f"Цвет {color_hex} уже занят другим слоном")
+        raise
+
+    except Exception:
+        staged.discard()
+        raise
+
+
+def _claim_paid_orders(limit: int) -> list:
+    """
+    Забрать до limit оплаченных заказов и выделить им цвета одной транзакцией
+
+    Заказы блокируются с SKIP LOCKED (параллельные пачки не пересекаются),
+    переводятся в processing с выделенным цветом одним bulk_update; заказы
+    без цвета — в failed. Гонка резерва с другой пачкой (уникальный индекс
+    allocated_color) повторяет выделение.
+
+    Returns:
+        Список заказов в processing с allocated_color
+    """
+    from apps.payments.events import publish_order_status
+    from apps.payments.models import Order
+    from apps.core.cache import bump_user_cache_version
+
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                orders = list(
+                    Order.objects.select_for_update(skip_locked=True, of=('self',))
+                    .select_related('tariff')
+                    .filter(status='paid')
+                    .order_by('id')[:limit]
+                )
+                if not orders:
+                    return []
+
+                colors, errors = pick_elephant_colors(orders)
+                now = timezone.now()
+                for order in orders:
+                    order.allocated_color = colors.get(order.pk)
+                    order.status = 'processing' if order.allocated_color else 'failed'
+                    order.updated_at = now
+                    if order.pk in errors:
+                        logger.error(f"Color allocation failed for order {order.pk}: {errors[order.pk]}")
+
+                Order.objects.bulk_update(orders, ['status', 'allocated_color', 'updated_at'])
+
+                # bulk_update не вызывает сигналы Order
+                for order in orders:
+                    publish_order_status(order)
+                bump_user_cache_version(*{order.user_id for order in orders})
+        except IntegrityError:
+            logger.warning("Color reservation race in render batch, allocating again")
+            continue
+
+        return [order for order in orders if order.allocated_color]
+
+    raise ColorAllocationError('Color reservation kept colliding')
+
+
+def fulfill_paid_orders(limit: int = 50) -> tuple:
+    """
+    Пакетная генерация слонов для оплаченных заказов
+
+    Заказы забираются и получают цвета одной транзакцией
+    (_claim_paid_orders), PNG рендерятся подряд вне транзакции (шаблон SVG
+    в памяти процесса) во временные файлы, затем одна транзакция
+    создаёт всех слонов (bulk_create), переименовывает файлы и завершает
+    заказы (bulk_update).
+    Заказы, чей цвет оказался занят слоном вне резерва, возвращаются
+    в paid без цвета — их заберёт следующая пачка.
+
+    Args:
+        limit: Максимум заказов в пачке
+
+    Returns:
+        Tuple (claimed, deferred): число забранных заказов и ID заказов
+        (processing с цветом), которые не удалось завершить в пачке —
+        их нужно передать в render_elephant_image
+    """
+    from apps.payments.events import publish_order_status
+    from apps.payments.models import Order
+    from apps.core.cache import bump_user_cache_version
+
+    orders = _claim_paid_orders(limit)
+    if not orders:
+        return 0, []
+
+    deferred = []
+    elephants = []
+    staged = {}
+    for order in orders:
+        try:
+            with trace(order.trace_id), trace_span('elephant.render', order_id=order.pk, batch=True):
+                image = stage_elephant_image(order.allocated_color)
+            elephant = Elephant(owner_id=order.user_id, order=order, color_hex=order.allocated_color, image=image.name)
+            elephant.color_r, elephant.color_g, elephant.color_b = hex_to_rgb(order.allocated_color)
+            staged[order.pk] = image
+            elephants.append(elephant)
+        except Exception as e:
+            logger.exception(f"Batch render failed for order {order.pk}: {e}")
+            deferred.append(order.pk)
+
+    try:
+        with transaction.atomic():
+            # Цвет мог занять слон, созданный вне резерва (bulk_create_elephants)
+            taken = set(Elephant.objects.filter(
+                color_hex__in=[elephant.color_hex for elephant in elephants]
+            ).values_list('color_hex', flat=True))
+            stored = [elephant for elephant in elephants if elephant.color_hex not in taken]
+            released = [elephant.order for elephant in elephants if elephant.color_hex in taken]
+
+            Elephant.objects.bulk_create(stored)
+            for elephant in stored:
+                staged[elephant.order.pk].commit()
+
+            now = timezone.now()
+            for elephant in stored:
+                # Цвет держит слон, резерв заказа снимается (как mark_as_completed)
+                elephant.order.status = 'completed'
+                elephant.order.allocated_color = None
+                elephant.order.updated_at = now
+            for order in released:
+                order.status = 'paid'
+                order.allocated_color = None
+                order.updated_at = now
+            Order.objects.bulk_update(
+                [elephant.order for elephant in stored] + released, ['status', 'allocated_color', 'updated_at']
+            )
+
+            # bulk_create/bulk_update не вызывают сигналы Elephant и Order
+            for order in [elephant.order for elephant in stored] + released:
+                publish_order_status(order)
+            bump_user_cache_version(*{order.user_id for order in orders})
+    except Exception as e:
+        logger.exception(f"Batch commit failed for {len(elephants)} orders: {e}")
+        for image in staged.values():
+            image.discard()
+        return len(orders), deferred + [elephant.order.pk for elephant in elephants]
+
+    for elephant in elephants:
+        if elephant.color_hex in taken:
+            logger.warning(f"Color {elephant.color_hex} of order {elephant.order.pk} is taken, allocating again")
+            staged[elephant.order.pk].discard()
+
+    logger.info(f"Render batch: {len(stored)} completed, {len(released)} re-queued, {len(deferred)} deferred")
+    return len(orders), deferred
+
+
+def failed_paid_orders(order_ids=None):
+    """
+    Оплаченные заказы, упавшие на генерации слона (кандидаты на повтор)
+
+    Args:
+        order_ids: Ограничить заказами из списка (опционально)
+
+    Returns:
+        QuerySet заказов failed с paid_at и без слона
+    """
+    from apps.payments.models import Order
+
+    orders = Order.objects.filter(status='failed', paid_at__isnull=False, elephant__isnull=True)
+    if order_ids is not None:
+        orders = orders.filter(pk__in=order_ids)
+    return orders
 
-def get_user_elephants(user):
+
+def reallocate_failed_orders(limit: int = 100, after_id: int = 0, order_ids=None) -> tuple:
     """
-    Получить список слонов пользователя (собственных и подаренных другим)
+    Повторное выделение цветов пачке упавших оплаченных заказов
+
+    Как _claim_paid_orders(): заказы после after_id (keyset по id)
+    блокируются с SKIP LOCKED, цвета выбираются всей пачкой
+    (pick_elephant_colors), заказы с цветом переводятся в processing
+    одним bulk_update. Заказы без свободного цвета остаются failed.
+    Повторный вызов безопасен: заказ в processing больше не выбирается.
+
+    Args:
+        limit: Максимум заказов в пачке
+        after_id: Последний ID предыдущей пачки
+        order_ids: Ограничить заказами из списка (опционально)
+
+    Returns:
+        Tuple (last_id, orders, errors): последний просмотренный ID (None —
+        заказов больше нет), заказы в processing с allocated_color и
+        dict order.pk -> причина для заказов, оставшихся failed
+    """
+    from apps.payments.events import publish_order_status
+    from apps.payments.models import Order
+    from apps.core.cache import bump_user_cache_version
+
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                orders = list(
+                    failed_paid_orders(order_ids)
+                    .select_for_update(skip_locked=True, of=('self',))
+                    .select_related('tariff')
+                    .filter(pk__gt=after_id)
+                    .order_by('id')[:limit]
+                )
+                if not orders:
+                    return None, [], {}
+
+                colors, errors = pick_elephant_colors(orders)
+                redriven = [order for order in orders if order.pk in colors]
+                now = timezone.now()
+                for order in redriven:
+                    order.allocated_color = colors[order.pk]
+                    order.status = 'processing'
+                    order.updated_at = now
+
+                Order.objects.bulk_update(redriven, ['status', 'allocated_color', 'updated_at'])
+
+                # bulk_update не вызывает сигналы Order
+                for order in redriven:
+                    publish_order_status(order)
+                bump_user_cache_version(*{order.user_id for order in redriven})
+        except IntegrityError:
+            logger.warning("Color reservation race in failed orders re-drive, allocating again")
+            continue
+
+        for order_id, error in errors.items():
+            logger.error(f"Color allocation failed again for order {order_id}: {error}")
+        return orders[-1].pk, redriven, errors
+
+    raise ColorAllocationError('Color reservation kept colliding')
+
+
+def _user_elephant_branches(user, cursor=None) -> tuple:
+    """
+    Ветки списка слонов пользователя до объединения: свои и подаренные другим
+
+    Returns:
+        Tuple (owned, gifted_away) QuerySet с аннотацией is_owned_by_user
+    """
+    from django.db.models import Value, BooleanField
+    from apps.core.pagination import keyset_condition
+
+    after = keyset_condition(cursor)
+
+    owned = Elephant.objects.filter(after, owner=user).annotate(
+        is_owned_by_user=Value(True, output_field=BooleanField())
+    ).order_by()
+
+    gifted_away = Elephant.objects.filter(
+        after, gift_link__sender=user, gift_link__is_claimed=True
+    ).exclude(owner=user).annotate(
+        is_owned_by_user=Value(False, output_field=BooleanField())
+    ).order_by()
+
+    return owned, gifted_away
+
+
+def get_user_elephant_rows(user, cursor=None, columns: tuple = None):
+    """
+    Строки списка слонов пользователя (собственных и подаренных другим)
+
+    Две ветки выбираются отдельными запросами по индексам и объединяются
+    через UNION ALL: слоны во владении (owner, created_at, id) и подаренные
+    другим и принятые (частичный индекс gift_link по sender). Ветки не
+    пересекаются — принять собственный подарок нельзя, а подарочная ссылка
+    у слона одна. Сортировка выполняется в БД поверх объединения.
 
     Args:
         user: User объект
+        cursor: Курсор keyset пагинации (применяется к обеим веткам до UNION)
+        columns: Колонки values_list() (по умолчанию ELEPHANT_LIST_ROW_FIELDS)
 
     Returns:
-        QuerySet с слонами пользователя (owned=True) и подаренными (owned=False)
+        Объединённый QuerySet именованных строк (только order_by/срезы)
+        с is_owned_by_user=True для своих слонов и False для подаренных
+
+    Raises:
+        InvalidCursorError: Если курсор повреждён
     """
-    from django.db.models import Q, Case, When, Value, BooleanField
+    from .schemas import ELEPHANT_LIST_ROW_FIELDS
+
+    columns = columns or ELEPHANT_LIST_ROW_FIELDS
+    owned, gifted_away = _user_elephant_branches(user, cursor)
+
+    return owned.values_list(*columns, named=True).union(
+        gifted_away.values_list(*columns, named=True), all=True
+    )
 
-    # Получаем слонов которыми владеет пользователь ИЛИ которых он подарил и они были приняты
-    elephants = Elephant.objects.filter(
-        Q(owner=user) | Q(gift_link__sender=user, gift_link__is_claimed=True)
-    ).annotate(
-        is_owned_by_user=Case(
-            When(owner=user, then=Value(True)),
-            default=Value(False),
-            output_field=BooleanField()
-        )
-    ).distinct().select_related('order', 'order__tariff', 'gift_link', 'gift_link__claimed_by').order_by('-created_at')
 
-    return elephants
+def get_user_elephants_page(user, cursor=None, limit: int = None, fields: tuple = None) -> dict:
+    """
+    Страница списка слонов пользователя в готовом для JSON виде
+
+    Быстрый путь для списков: строки get_user_elephant_rows() сериализуются
+    без моделей и резолверов ElephantListSchema (см. elephant_list_rows()).
+
+    Args:
+        user: User объект
+        cursor: Курсор keyset пагинации
+        limit: Размер страницы (по умолчанию DEFAULT_PAGE_LIMIT)
+        fields: Tuple полей ElephantListSchema (sparse fieldset) — выбираются
+            только их колонки; None — все поля
+
+    Returns:
+        Dict {"items": [...], "next": cursor | None} по ElephantPageSchema
+
+    Raises:
+        InvalidCursorError: Если курсор повреждён
+    """
+    from apps.core.fields import only_columns
+    from apps.core.pagination import take_page, DEFAULT_PAGE_LIMIT
+    from .schemas import ELEPHANT_LIST_FIELD_COLUMNS, elephant_list_rows
+
+    columns = only_columns(fields, ELEPHANT_LIST_FIELD_COLUMNS) if fields else None
+    rows = get_user_elephant_rows(user, cursor, columns)
+
+    rows, next_cursor = take_page(rows, limit or DEFAULT_PAGE_LIMIT, key=lambda row: (row.created_at, row.id))
+    image_url = Elephant._meta.get_field('image').storage.url
+
+    return {"items": elephant_list_rows(rows, image_url, fields), "next": next_cursor}
+
+
+def get_user_elephants_changed(user, since, limit: int) -> list[dict]:
+    """
+    Слоны из списка пользователя, изменённые после момента since (для /api/sync)
+
+    Те же ветки, что в get_user_elephant_rows(), с фильтром по updated_at
+    (индекс owner, updated_at). Изменения подарка, влияющие на строку
+    списка (создание, принятие), сохраняют и слона, поэтому updated_at
+    слона их покрывает.
+
+    Args:
+        user: User объект
+        since: Момент времени (aware datetime)
+        limit: Максимум строк (возвращается до limit + 1, чтобы вызывающий
+            мог определить переполнение)
+
+    Returns:
+        Список dict по ElephantListSchema, новые сверху
+    """
+    from .schemas import ELEPHANT_LIST_ROW_FIELDS, elephant_list_rows
+
+    owned, gifted_away = _user_elephant_branches(user)
+    rows = owned.filter(updated_at__gt=since).values_list(*ELEPHANT_LIST_ROW_FIELDS, named=True).union(
+        gifted_away.filter(updated_at__gt=since).values_list(*ELEPHANT_LIST_ROW_FIELDS, named=True), all=True
+    ).order_by('-created_at', '-id')[:limit + 1]
+    image_url = Elephant._meta.get_field('image').storage.url
+
+    return elephant_list_rows(rows, image_url)
 
 
 def get_elephant_by_id(elephant_id: int, user=None):
@@ -115,12 +699,58 @@ def get_elephant_by_id(elephant_id: int, user=None):
     """
     elephant = Elephant.objects.select_related('order').get(pk=elephant_id)
 
-    if user and elephant.owner != user:
+    if user and elephant.owner_id != user.pk:
         raise PermissionError("Вы не являетесь владельцем этого слона")
 
     return elephant
 
 
+def find_elephant(query: str) -> Elephant:
+    """
+    Найти слона по HEX цвету или имени (без учёта регистра)
+
+    Имя сначала ищется целиком, затем по вхождению подстроки.
+
+    Args:
+        query: HEX цвет (#RRGGBB или RRGGBB) или имя слона
+
+    Returns:
+        Elephant объект (с owner)
+
+    Raises:
+        Elephant.DoesNotExist: Если слон не найден или совпадений несколько (сообщение для пользователя)
+    """
+    elephants = Elephant.objects.select_related('owner')
+
+    # Try as HEX color
+    hex_match = re.match(r'^#?([0-9a-fA-F]{6})$', query)
+    if hex_match:
+        color_hex = f"#{hex_match.group(1).upper()}"
+        try:
+            return elephants.get(color_hex=color_hex)
+        except Elephant.DoesNotExist:
+            raise Elephant.DoesNotExist(f"Слон с цветом {color_hex} не найден. Этот цвет ещё свободен!")
+
+    # Search by name (case-insensitive)
+    query_lower = query.lower()
+    for elephant in elephants.all():
+        if elephant.get_name().lower() == query_lower:
+            return elephant
+
+    # Partial match
+    results = []
+    for elephant in elephants.all():
+        if query_lower in elephant.get_name().lower():
+            results.append(elephant)
+
+    if len(results) == 1:
+        return results[0]
+    elif len(results) > 1:
+        raise Elephant.DoesNotExist(f"Найдено {len(results)} слонов. Уточните запрос.")
+
+    raise Elephant.DoesNotExist("Слон не найден")
+
+
 def get_available_colors_count() -> int:
     """
     Получить количество доступных цветов
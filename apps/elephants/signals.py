@@ -1,10 +1,14 @@
 """
-Signals for automatic cleanup of elephant images
+Signals for automatic cleanup of elephant images, API cache invalidation
+and sync tombstones
 """
 import os
-from django.db.models.signals import pre_delete, pre_save
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
 from django.dispatch import receiver
 from .models import Elephant
+from apps.core.cache import bump_user_cache_version
+from apps.core.models import Tombstone
+from apps.core.sync import record_tombstone
 
 
 @receiver(pre_delete, sender=Elephant)
@@ -37,6 +41,9 @@ def delete_old_elephant_image_on_update(sender, instance, **kwargs):
         # Instance doesn't exist yet
         return
 
+    # Previous owner is needed after save (cache + sync tombstone on transfer)
+    instance._previous_owner_id = old_instance.owner_id
+
     # If image has changed, delete the old one
     if old_instance.image and old_instance.image != instance.image:
         if os.path.isfile(old_instance.image.path):
@@ -44,3 +51,33 @@ def delete_old_elephant_image_on_update(sender, instance, **kwargs):
                 os.remove(old_instance.image.path)
             except OSError:
                 pass
+
+
+@receiver(post_save, sender=Elephant)
+@receiver(post_delete, sender=Elephant)
+def invalidate_elephant_owner_cache(sender, instance, **kwargs):
+    """
+    Invalidate cached API lists of the elephant owner (and the previous owner)
+    """
+    bump_user_cache_version(instance.owner_id, getattr(instance, '_previous_owner_id', None))
+
+
+@receiver(post_save, sender=Elephant)
+def record_elephant_transfer_tombstone(sender, instance, created, **kwargs):
+    """
+    Remove the elephant from the previous owner's synced list on transfer
+
+    If the elephant stays in that list as a claimed gift, /api/sync
+    returns it as a change and drops the tombstone.
+    """
+    previous_owner_id = getattr(instance, '_previous_owner_id', None)
+    if not created and previous_owner_id is not None and previous_owner_id != instance.owner_id:
+        record_tombstone(Tombstone.ELEPHANT, instance.pk, previous_owner_id)
+
+
+@receiver(post_delete, sender=Elephant)
+def record_elephant_tombstone(sender, instance, **kwargs):
+    """
+    Record elephant deletion for the owner's /api/sync
+    """
+    record_tombstone(Tombstone.ELEPHANT, instance.pk, instance.owner_id)
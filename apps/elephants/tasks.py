@@ -1,25 +1,224 @@
 """
 Celery tasks for elephant image generation
+
+Выполнение заказа разбито на два шага в разных очередях:
+    generate_elephant_image (очереди allocate*) — выбор и резерв цвета (БД)
+    render_elephant_image   (очереди render*)   — PNG, файл, Elephant, статус (CPU)
+
+Очередь внутри шага выбирается по тарифу и возрасту заказа (routing.py).
+
+Коллизия цвета повторяет только шаг выделения; готовый рендер не повторяется.
+
+При ELEPHANT_RENDER_BATCH_SIZE > 0 оплаченные заказы вместо этих задач
+забирает пачками render_paid_orders (очередь render.bulk).
 """
 import logging
+import time
 from celery import shared_task
+from celery.exceptions import Retry
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.utils import timezone
 
-from apps.payments.models import Order, Tariff
-from .services import create_elephant, check_color_availability
-from .utils import generate_random_color, generate_color_from_hue
+from apps.core.lease import Lease, LeaseHeldError
+from apps.core.timing import collect_timings, span
+from apps.core.tracing import record_span, trace
+from apps.payments.models import Order
+from .metrics import queue_depths, record_stage_timings, record_task_run, record_task_wait
+from .models import Elephant
+from .routing import order_queue, record_queue_wait
+from .services import (
+    ColorAllocationError,
+    ColorTakenError,
+    create_elephant,
+    fulfill_paid_orders,
+    pick_elephant_color,
+    reallocate_failed_orders,
+    release_elephant_color,
+    reserve_elephant_color,
+    stage_elephant_image,
+)
 
 logger = logging.getLogger(__name__)
 
+# Срок per-order lease без продления (продлевается каждые ttl/3, пока задача жива)
+ORDER_LEASE_TTL = 60
+
+# Флаг "пакетная задача уже поставлена" (одна задача на всплеск оплат)
+RENDER_BATCH_SCHEDULED_KEY = 'elephants:render_batch_scheduled'
+
+# Повтор упавших заказов: рендеры идут в bulk-очередь, новая пачка ставится,
+# только пока в ней не больше REDRIVE_MAX_QUEUED сообщений
+REDRIVE_QUEUE = 'render.bulk'
+REDRIVE_MAX_QUEUED = 200
+REDRIVE_PROGRESS_KEY = 'elephants:redrive_progress'
+
+
+def start_elephant_generation(order) -> None:
+    """
+    Запустить генерацию слона для оплаченного заказа
+
+    По умолчанию — задача generate_elephant_image на заказ (очередь по
+    тарифу заказа, без запроса в роутере). В пакетном режиме
+    (ELEPHANT_RENDER_BATCH_SIZE > 0) ставится одна задача
+    render_paid_orders, если она ещё не стоит в очереди.
+
+    Args:
+        order: Order объект в статусе paid с загруженным tariff
+    """
+    if not settings.ELEPHANT_RENDER_BATCH_SIZE:
+        generate_elephant_image.apply_async((order.pk,), queue=order_queue('allocate', order))
+        return
+
+    if cache.add(RENDER_BATCH_SCHEDULED_KEY, 1, timeout=60):
+        # Небольшая задержка собирает оплаты всплеска в одну пачку
+        render_paid_orders.apply_async(countdown=1)
+
+
+@shared_task
+def render_paid_orders():
+    """
+    Пакетная генерация слонов для всех оплаченных заказов
+
+    Берёт заказы пачками по ELEPHANT_RENDER_BATCH_SIZE, пока они есть.
+    Заказы, не завершённые в пачке, передаются в render_elephant_image.
+
+    Returns:
+        Число обработанных заказов
+    """
+    # Снимаем флаг до чтения: оплаты после этого момента поставят новую задачу
+    cache.delete(RENDER_BATCH_SCHEDULED_KEY)
+
+    total = 0
+    while True:
+        claimed, deferred = fulfill_paid_orders(settings.ELEPHANT_RENDER_BATCH_SIZE or 50)
+        for order_id in deferred:
+            render_elephant_image.delay(order_id)
+        if not claimed:
+            break
+        total += claimed
+
+    if total:
+        logger.info(f"Render batches processed {total} orders")
+    return total
+
+
+def redrive_chunk(limit: int, after_id: int = 0, order_ids=None, queue: str = REDRIVE_QUEUE) -> tuple:
+    """
+    Повторить генерацию для пачки упавших оплаченных заказов
+
+    Цвета выделяются пачкой (reallocate_failed_orders), рендеры ставятся
+    в queue явно (мимо роутера), чтобы не занимать интерактивные очереди.
+
+    Args:
+        limit: Заказов в пачке
+        after_id: Последний ID предыдущей пачки
+        order_ids: Ограничить заказами из списка (опционально)
+        queue: Очередь рендера
+
+    Returns:
+        Tuple (last_id, redriven, failed): последний ID (None — заказов
+        больше нет), число поставленных рендеров, число оставшихся failed
+    """
+    last_id, orders, errors = reallocate_failed_orders(limit, after_id, order_ids)
+    for order in orders:
+        render_elephant_image.apply_async((order.pk,), queue=queue)
+    return last_id, len(orders), len(errors)
+
+
+def redrive_backlog(queue: str = REDRIVE_QUEUE) -> int:
+    """Сообщений в очереди рендера повтора (0, если брокер недоступен)"""
+    return queue_depths().get(queue, 0)
+
+
+def update_redrive_progress(after_id: int, last_id, redriven: int, failed: int) -> dict:
+    """
+    Обновить прогресс повтора в кэше (пачка с after_id=0 начинает заново)
+
+    Returns:
+        Dict {redriven, failed, last_id, finished, updated_at}
+    """
+    progress = (cache.get(REDRIVE_PROGRESS_KEY) if after_id else None) or {'redriven': 0, 'failed': 0}
+    progress.update(
+        redriven=progress['redriven'] + redriven,
+        failed=progress['failed'] + failed,
+        last_id=last_id or after_id,
+        finished=last_id is None,
+        updated_at=timezone.now().isoformat(),
+    )
+    cache.set(REDRIVE_PROGRESS_KEY, progress, timeout=7 * 24 * 3600)
+    return progress
+
+
+@shared_task
+def redrive_failed_orders(order_ids=None, after_id: int = 0, chunk_size: int = 100, interval: float = 5):
+    """
+    Повтор генерации упавших оплаченных заказов пачками
+
+    Одна пачка за запуск; следующая ставится через interval секунд. Пока
+    в очереди рендера больше REDRIVE_MAX_QUEUED сообщений, пачка
+    откладывается. Прогресс — в кэше (REDRIVE_PROGRESS_KEY).
+
+    Args:
+        order_ids: Ограничить заказами из списка (None — все упавшие)
+        after_id: Последний ID предыдущей пачки
+        chunk_size: Заказов в пачке
+        interval: Пауза между пачками, секунды
+
+    Returns:
+        Dict прогресса
+    """
+    kwargs = {'order_ids': order_ids, 'chunk_size': chunk_size, 'interval': interval}
+
+    backlog = redrive_backlog()
+    if backlog > REDRIVE_MAX_QUEUED:
+        logger.info(f"Re-drive paused: {backlog} renders queued in {REDRIVE_QUEUE}")
+        redrive_failed_orders.apply_async(kwargs={**kwargs, 'after_id': after_id}, countdown=interval)
+        return cache.get(REDRIVE_PROGRESS_KEY)
+
+    last_id, redriven, failed = redrive_chunk(chunk_size, after_id, order_ids)
+    progress = update_redrive_progress(after_id, last_id, redriven, failed)
+
+    if last_id is None:
+        logger.info(f"Re-drive finished: {progress['redriven']} orders re-queued, {progress['failed']} still failed")
+    else:
+        redrive_failed_orders.apply_async(kwargs={**kwargs, 'after_id': last_id}, countdown=interval)
+    return progress
+
 
 @shared_task(bind=True, max_retries=3)
 def generate_elephant_image(self, order_id: int):
     """
-    Асинхронная генерация изображения слона
+    Выделение цвета для оплаченного заказа (первый шаг генерации слона)
+
+    Переводит заказ в processing, выбирает свободный цвет по тарифу,
+    резервирует его за заказом (Order.allocated_color) и ставит рендер
+    в очередь render. Если цвет перехватил другой заказ, задача повторяется
+    и выбирает цвет заново.
 
-    Задача выполняется после оплаты заказа. Генерирует уникальный цвет
-    (для basic тарифа) или использует выбранный цвет (для advanced),
-    создаёт изображение и сохраняет объект Elephant.
+    Одновременно для заказа выполняется одна такая задача (lease в Redis).
+
+    Args:
+        order_id: ID заказа
+
+    Returns:
+        Dict с результатом выделения цвета
+    """
+    return _run_exclusive(self, 'allocate', order_id, _allocate_color)
+
+
+@shared_task(bind=True, max_retries=3)
+def render_elephant_image(self, order_id: int):
+    """
+    Рендер и сохранение слона в выделенном цвете (второй шаг генерации)
+
+    Генерирует PNG, сохраняет Elephant и завершает заказ. Если цвет уже
+    занят слоном, созданным вне резерва (например, bulk_create_elephants),
+    резерв снимается и заказ возвращается на шаг выделения цвета.
+
+    Одновременно для заказа выполняется один рендер (lease в Redis),
+    дубликат выходит до рендера.
 
     Args:
         order_id: ID заказа
@@ -27,107 +226,213 @@ def generate_elephant_image(self, order_id: int):
     Returns:
         Dict с информацией о созданном слоне
     """
+    return _run_exclusive(self, 'render', order_id, _render_elephant)
+
+
+def _run_exclusive(task, step: str, order_id: int, run):
+    """
+    Выполнить шаг генерации под per-order lease
+
+    Дубликат задачи (повторный webhook, redelivery после падения воркера
+    при acks_late, повтор по countdown) выходит сразу и ставит проверку
+    через ORDER_LEASE_TTL: если владелец lease умер, к этому времени lease
+    истечёт и шаг выполнится; если завершил работу — проверка увидит новый
+    статус заказа.
+
+    Ожидание (в очереди и от оплаты) и время выполнения по итогу шага
+    пишутся в метрики. При ELEPHANT_STAGE_TIMINGS времена этапов шага
+    (span) пишутся в лог, метрики и результат задачи (ключ timings, мс).
+
+    Шаг выполняется в трассе заказа (Order.trace_id) — и для задач без
+    заголовка trace_id (beat, пакеты, повторы); ожидание в очереди и сам
+    шаг пишутся спанами elephant.<шаг>.queued и elephant.<шаг>.
+    """
+    paid_at, trace_id = (
+        Order.objects.filter(pk=order_id).values_list('paid_at', 'trace_id').first() or (None, None)
+    )
+
+    with trace(trace_id):
+        queue = (task.request.delivery_info or {}).get('routing_key')
+        queue_wait = record_queue_wait(task.request)
+        if queue_wait is not None:
+            now = time.time()
+            record_span(f'elephant.{step}.queued', now - queue_wait, now, queue=queue)
+        record_task_wait(step, paid_at)
+
+        return _run_step(task, step, order_id, run, queue)
+
+
+def _run_step(task, step: str, order_id: int, run, queue: str = None):
+    """Шаг под lease с метриками и спаном (_run_exclusive)"""
+    started = time.monotonic()
+    started_at = time.time()
+    status = 'failure'
+    timings = None
     try:
-        logger.info(f"Starting elephant generation for order {order_id}")
+        with Lease(f'elephants:{step}:{order_id}', ttl=ORDER_LEASE_TTL):
+            with collect_timings(settings.ELEPHANT_STAGE_TIMINGS) as timings:
+                result = run(task, order_id)
+        status = 'success' if result.get('success') else 'skipped'
+        if timings:
+            result['timings'] = timings.as_ms()
+        return result
+    except LeaseHeldError:
+        status = 'duplicate'
+        logger.info(f"Order {order_id} {step} is already running, re-checking in {ORDER_LEASE_TTL} s")
+        # Eager-режим выполнил бы проверку сразу, внутри того же lease
+        if not task.request.is_eager:
+            task.apply_async((order_id,), countdown=ORDER_LEASE_TTL, queue=queue)
+        return {
+            'success': False,
+            'error': 'Duplicate task'
+        }
+    except Retry:
+        status = 'retry'
+        raise
+    finally:
+        record_task_run(step, status, time.monotonic() - started)
+        if timings:
+            logger.info(f"Order {order_id} {step} {status} stages: {timings}")
+            record_stage_timings(step, timings)
+        record_span(
+            f'elephant.{step}', started_at, time.time(), 'error' if status == 'failure' else 'ok',
+            order_id=order_id, queue=queue, result=status, retries=task.request.retries,
+            **({'stages_ms': timings.as_ms()} if timings else {}),
+        )
+
+
+def _allocate_color(task, order_id: int):
+    """Тело generate_elephant_image (под lease)"""
+    try:
+        logger.info(f"Starting color allocation for order {order_id}")
+
+        with span('load_order'):
+            order = Order.objects.select_related('tariff').get(pk=order_id)
 
-        # Получаем заказ
-        order = Order.objects.select_related('tariff', 'user').get(pk=order_id)
+        # Повторная доставка после резерва: только ставим рендер
+        if order.status == 'processing' and order.allocated_color:
+            logger.info(f"Order {order_id} already has color {order.allocated_color}")
+            render_elephant_image.apply_async((order_id,), queue=order_queue('render', order))
+            return {'success': True, 'order_id': order_id, 'color_hex': order.allocated_color}
 
-        # Проверка статуса заказа
-        if not order.can_be_processed():
+        if not (order.can_be_processed() or order.status == 'processing'):
             logger.error(f"Order {order_id} is not in 'paid' status: {order.status}")
             return {
                 'success': False,
-                'error': f"Order is not paid"
+                'error': "Order is not paid"
             }
 
-        # Обновляем статус на "processing"
-        order.mark_as_processing()
-        logger.info(f"Order {order_id} marked as processing")
-
-        # Определяем цвет в зависимости от тарифа
-        color_hex = None
-        max_attempts = 10
-
-        if order.tariff.name == Tariff.BASIC:
-            # Для basic тарифа генерируем случайный цвет
-            for attempt in range(max_attempts):
-                color_hex = generate_random_color()
-
-                # Проверяем уникальность
-                if check_color_availability(color_hex):
-                    logger.info(f"Generated unique color {color_hex} on attempt {attempt + 1}")
-                    break
-            else:
-                # Не удалось найти уникальный цвет за max_attempts попыток
-                logger.error(f"Failed to generate unique color after {max_attempts} attempts")
-                order.mark_as_failed()
-                return {
-                    'success': False,
-                    'error': 'Failed to generate unique color'
-                }
-
-        elif order.tariff.name == Tariff.ADVANCED:
-            # Для advanced проверяем формат: оттенок или точный цвет
-            desired = order.desired_color
-
-            if desired and desired.startswith('HUE:'):
-                # Формат "HUE:180" - генерируем цвет в заданном оттенке
-                try:
-                    hue = int(desired.split(':')[1])
-                    logger.info(f"Generating color from hue {hue}")
-
-                    # Пытаемся сгенерировать уникальный цвет в заданном оттенке
-                    for attempt in range(max_attempts):
-                        color_hex = generate_color_from_hue(hue)
-
-                        # Проверяем уникальность
-                        if check_color_availability(color_hex):
-                            logger.info(f"Generated unique color {color_hex} from hue {hue} on attempt {attempt + 1}")
-                            break
-                    else:
-                        # Не удалось найти уникальный цвет в этом оттенке
-                        logger.error(f"Failed to generate unique color from hue {hue} after {max_attempts} attempts")
-                        order.mark_as_failed()
-                        return {
-                            'success': False,
-                            'error': f'Failed to generate unique color in hue {hue}'
-                        }
-
-                except (ValueError, IndexError) as e:
-                    logger.error(f"Invalid hue format: {desired}")
-                    order.mark_as_failed()
-                    return {
-                        'success': False,
-                        'error': 'Invalid hue format'
-                    }
-            else:
-                # Используем точный цвет (для обратной совместимости)
-                color_hex = desired
-
-                # Проверяем уникальность
-                if not check_color_availability(color_hex):
-                    logger.error(f"Desired color {color_hex} is not available")
-                    order.mark_as_failed()
+        if order.can_be_processed():
+            order.mark_as_processing()
+            logger.info(f"Order {order_id} marked as processing")
+
+        try:
+            with span('color_probe'):
+                color_hex = pick_elephant_color(order)
+        except ColorAllocationError as e:
+            logger.error(f"Color allocation failed for order {order_id}: {e}")
+            order.mark_as_failed()
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+        with span('reserve'):
+            reserved = reserve_elephant_color(order, color_hex)
+        if not reserved:
+            order.refresh_from_db(fields=['allocated_color'])
+            if order.allocated_color is None:
+                # Цвет успел зарезервировать другой заказ — выбираем заново
+                logger.warning(f"Color {color_hex} collision for order {order_id}, retrying allocation")
+                raise task.retry(countdown=1)
+            color_hex = order.allocated_color
+
+        logger.info(f"Color {color_hex} allocated for order {order_id}")
+
+    except Order.DoesNotExist:
+        logger.error(f"Order {order_id} not found")
+        return {
+            'success': False,
+            'error': 'Order not found'
+        }
+
+    except task.MaxRetriesExceededError:
+        logger.error(f"Color allocation for order {order_id} exhausted retries")
+        Order.objects.get(pk=order_id).mark_as_failed()
+        return {
+            'success': False,
+            'error': 'Failed to allocate unique color'
+        }
+
+    except Retry:
+        raise
+
+    except Exception as e:
+        logger.exception(f"Error allocating color for order {order_id}: {str(e)}")
+        _fail_or_retry(task, order_id, e)
+
+    render_elephant_image.apply_async((order_id,), queue=order_queue('render', order))
+
+    return {
+        'success': True,
+        'order_id': order_id,
+        'color_hex': color_hex
+    }
+
+
+def _render_elephant(task, order_id: int):
+    """Тело render_elephant_image (под lease)"""
+    try:
+        with span('load_order'):
+            order = Order.objects.select_related('user', 'tariff').get(pk=order_id)
+
+        if order.status != 'processing' or not order.allocated_color:
+            logger.error(f"Order {order_id} is not ready for render: {order.status}, {order.allocated_color}")
+            return {
+                'success': False,
+                'error': 'Order is not ready for render'
+            }
+
+        with span('elephant_exists'):
+            elephant_exists = Elephant.objects.filter(order_id=order_id).exists()
+        if elephant_exists:
+            logger.info(f"Elephant for order {order_id} already exists, skipping render")
+            return {
+                'success': False,
+                'error': 'Elephant already exists'
+            }
+
+        color_hex = order.allocated_color
+
+        # Рендер и запись во временный файл — до транзакции и блокировки заказа
+        staged = stage_elephant_image(color_hex)
+
+        try:
+            # Use select_for_update to lock the order row and prevent concurrent modifications
+            # (span transaction включает COMMIT и вложенные db_insert / file_rename)
+            with span('transaction'), transaction.atomic():
+                locked_at = time.monotonic()
+                locked = Order.objects.select_for_update().get(pk=order_id)
+
+                # Заказ мог измениться за время рендера (отмена, повторное выделение)
+                if locked.status != 'processing' or locked.allocated_color != color_hex:
+                    logger.warning(f"Order {order_id} changed during render: {locked.status}, {locked.allocated_color}")
+                    staged.discard()
                     return {
                         'success': False,
-                        'error': f'Color {color_hex} is already taken'
+                        'error': 'Order changed during render'
                     }
 
-                logger.info(f"Using desired color {color_hex}")
-
-        # Создаём слона (включая генерацию изображения)
-        # Use select_for_update to lock the order row and prevent concurrent modifications
-        with transaction.atomic():
-            # Re-fetch order with lock to ensure no other task modifies it
-            order = Order.objects.select_for_update().get(pk=order_id)
-
-            elephant = create_elephant(order, color_hex)
-            logger.info(f"Elephant created with ID {elephant.id}, color {color_hex}")
+                elephant = create_elephant(locked, color_hex, staged=staged)
+                locked.mark_as_completed()
+        except Exception:
+            staged.discard()
+            raise
 
-            # Обновляем статус заказа на "completed"
-            order.mark_as_completed()
-            logger.info(f"Order {order_id} completed successfully")
+        logger.info(
+            f"Elephant created with ID {elephant.id}, color {color_hex}; order {order_id} completed "
+            f"(lock held {(time.monotonic() - locked_at) * 1000:.1f} ms)"
+        )
 
         return {
             'success': True,
@@ -143,17 +448,32 @@ def generate_elephant_image(self, order_id: int):
             'error': 'Order not found'
         }
 
+    except ColorTakenError as e:
+        # create_elephant: цвет занят слоном без резерва — выделяем цвет заново
+        logger.warning(f"Render for order {order_id} hit a taken color: {e}")
+        release_elephant_color(order)
+        generate_elephant_image.apply_async((order_id,), queue=order_queue('allocate', order))
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
     except Exception as e:
-        logger.exception(f"Error generating elephant for order {order_id}: {str(e)}")
+        logger.exception(f"Error rendering elephant for order {order_id}: {str(e)}")
+        _fail_or_retry(task, order_id, e)
 
-        # Пытаемся отметить заказ как failed
+
+def _fail_or_retry(task, order_id: int, exc: Exception):
+    """
+    Повтор шага с экспоненциальной задержкой; после последней попытки
+    заказ отмечается failed и исключение пробрасывается
+    """
+    if task.request.retries >= task.max_retries:
         try:
-            order = Order.objects.get(pk=order_id)
-            order.mark_as_failed()
-        except Order.DoesNotExist:
-            logger.error(f"Order {order_id} not found during cleanup")
+            Order.objects.get(pk=order_id).mark_as_failed()
         except Exception as cleanup_error:
             logger.error(f"Failed to mark order {order_id} as failed: {str(cleanup_error)}")
+        raise exc
 
-        # Retry с экспоненциальной задержкой
-        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+    # Retry с экспоненциальной задержкой
+    raise task.retry(exc=exc, countdown=60 * (2 ** task.request.retries))
@@ -3,12 +3,15 @@ Utilities for elephant image generation
 """
 import random
 import re
+from functools import cache
 from io import BytesIO
 from pathlib import Path
 
 import cairosvg
 from django.conf import settings
 
+from apps.core.timing import span
+
 
 def hex_to_rgb(hex_color: str) -> tuple:
     """
@@ -94,6 +97,25 @@ def get_elephant_svg_template_path() -> Path:
     return Path(settings.BASE_DIR) / 'static' / 'images' / 'kupi_slona.svg'
 
 
+@cache
+def load_elephant_svg_template() -> str:
+    """
+    SVG шаблон слона как текст, кэшируется в памяти процесса
+
+    Returns:
+        Содержимое kupi_slona.svg
+
+    Raises:
+        FileNotFoundError: Если шаблон не найден
+    """
+    svg_path = get_elephant_svg_template_path()
+
+    if not svg_path.exists():
+        raise FileNotFoundError(f"SVG шаблон не найден: {svg_path}")
+
+    return svg_path.read_text(encoding='utf-8')
+
+
 def generate_colored_elephant(color_hex: str) -> BytesIO:
     """
     Генерация цветного изображения слона из SVG шаблона
@@ -110,31 +132,28 @@ def generate_colored_elephant(color_hex: str) -> BytesIO:
     # Нормализуем цвет (uppercase)
     color_hex = color_hex.upper()
 
-    # Загружаем SVG шаблон
-    svg_path = get_elephant_svg_template_path()
-
-    if not svg_path.exists():
-        raise FileNotFoundError(f"SVG шаблон не найден: {svg_path}")
-
-    # Читаем SVG как текст
-    svg_content = svg_path.read_text(encoding='utf-8')
+    with span('svg_template'):
+        # SVG шаблон как текст (читается с диска один раз на процесс)
+        svg_content = load_elephant_svg_template()
 
-    # Заменяем черный цвет (#231f20) на выбранный цвет
-    # Цвет слона в SVG - это fill="#231f20"
-    svg_content = svg_content.replace('#231f20', color_hex.lower())
-    svg_content = svg_content.replace('#231F20', color_hex.lower())
+        # Заменяем черный цвет (#231f20) на выбранный цвет
+        # Цвет слона в SVG - это fill="#231f20"
+        svg_content = svg_content.replace('#231f20', color_hex.lower())
+        svg_content = svg_content.replace('#231F20', color_hex.lower())
 
-    # Также заменяем другие черные цвета
-    svg_content = svg_content.replace('fill="#000000"', f'fill="{color_hex.lower()}"')
+        # Также заменяем другие черные цвета
+        svg_content = svg_content.replace('fill="#000000"', f'fill="{color_hex.lower()}"')
 
     # Конвертируем SVG в PNG
     # viewBox="220 160 1060 920" - пропорции примерно 1.15:1
     # Делаем квадратное изображение 1500x1500, cairosvg сам вписывает с сохранением пропорций
-    png_data = cairosvg.svg2png(
-        bytestring=svg_content.encode('utf-8'),
-        output_width=1500,
-        output_height=1500
-    )
+    # Разбор SVG, растеризация и PNG-кодирование — один вызов cairosvg
+    with span('rasterize'):
+        png_data = cairosvg.svg2png(
+            bytestring=svg_content.encode('utf-8'),
+            output_width=1500,
+            output_height=1500
+        )
 
     # Возвращаем BytesIO
     output = BytesIO(png_data)
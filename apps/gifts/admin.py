@@ -12,7 +12,7 @@ class GiftLinkAdmin(admin.ModelAdmin):
     list_display = ('id', 'elephant_color', 'sender', 'recipient_name', 'is_claimed', 'claimed_by', 'created_at')
     list_filter = ('is_claimed', 'created_at')
     search_fields = ('sender__username', 'recipient_name', 'claimed_by__username')
-    readonly_fields = ('id', 'uuid', 'created_at', 'claimed_at', 'public_url_display')
+    readonly_fields = ('id', 'uuid', 'created_at', 'updated_at', 'claimed_at', 'public_url_display')
     date_hierarchy = 'created_at'
 
     fieldsets = (
@@ -29,7 +29,7 @@ class GiftLinkAdmin(admin.ModelAdmin):
             'fields': ('public_url_display',)
         }),
         ('Даты', {
-            'fields': ('created_at',)
+            'fields': ('created_at', 'updated_at')
         }),
     )
 
@@ -1,16 +1,23 @@
 """
 API endpoints for gifts
 """
-from ninja import Router
+from ninja import Router, Query
 from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from typing import Optional
 from uuid import UUID
 
 from .models import GiftLink
 from .services import create_gift_link, claim_gift, get_user_sent_gifts, get_gift_by_uuid, can_user_claim_gift
-from .schemas import CreateGiftSchema, GiftLinkSchema, PublicGiftSchema, ClaimGiftResponseSchema
+from .schemas import CreateGiftSchema, GiftLinkSchema, GiftLinkPageSchema, PublicGiftSchema, ClaimGiftResponseSchema
 from apps.accounts.schemas import MessageSchema
 from apps.elephants.models import Elephant
 from apps.core.auth import auth
+from apps.core.cache import cached_user_response
+from apps.core.conditional import make_etag, etag_matches, set_etag, not_modified
+from apps.core.fields import parse_fields, dump_page, InvalidFieldsError
+from apps.core.threads import in_thread_pool
+from apps.core.pagination import paginate_keyset, InvalidCursorError, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
 
 router = Router()
 
@@ -39,19 +46,39 @@ def create_gift(request, payload: CreateGiftSchema):
         return 400, {"message": str(e)}
 
 
-@router.get("/sent", response={200: list[GiftLinkSchema], 401: MessageSchema}, auth=auth)
-def list_sent_gifts(request):
-    """Список отправленных подарков"""
+@router.get("/sent", response={200: GiftLinkPageSchema, 400: MessageSchema, 401: MessageSchema}, auth=auth)
+def list_sent_gifts(
+    request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    fields: Optional[str] = None,
+):
+    """Список отправленных подарков (постранично, по курсору)"""
     # Auth handled by decorator - request.user is guaranteed authenticated
-    gifts = get_user_sent_gifts(request.user)
-    return 200, list(gifts)
+    try:
+        selected = parse_fields(fields, GiftLinkSchema)
+    except InvalidFieldsError as e:
+        return 400, {"message": str(e)}
+
+    def build():
+        gifts, next_cursor = paginate_keyset(get_user_sent_gifts(request.user, selected), cursor, limit)
+        return dump_page(GiftLinkSchema, gifts, next_cursor, selected)
+
+    try:
+        return cached_user_response(request, "sent_gifts", f"{cursor}:{limit}:{','.join(selected or ())}", None, build)
+    except InvalidCursorError as e:
+        return 400, {"message": str(e)}
 
 
 @router.get("/public/{uuid}", response={200: PublicGiftSchema, 404: MessageSchema})
-def get_public_gift(request, uuid: UUID):
-    """Публичная информация о подарке"""
+async def get_public_gift(request, uuid: UUID, response: HttpResponse):
+    """Публичная информация о подарке (поддерживает If-None-Match, async)"""
     try:
-        gift = get_gift_by_uuid(uuid)
+        gift = await in_thread_pool(get_gift_by_uuid)(uuid)
+        etag = make_etag('gift', gift.pk, gift.updated_at.isoformat(), gift.elephant.updated_at.isoformat())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         return 200, gift
     except GiftLink.DoesNotExist:
         return 404, {"message": "Подарок не найден"}
@@ -5,3 +5,7 @@ class GiftsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.gifts'
     verbose_name = 'Gifts'
+
+    def ready(self):
+        """Import signals when app is ready"""
+        import apps.gifts.signals  # noqa
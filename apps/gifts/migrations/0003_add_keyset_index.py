@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elephants', '0003_remove_elephant_elephants_e_owner_idx_and_more'),
+        ('gifts', '0002_giftlink_sender_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='giftlink',
+            index=models.Index(fields=['sender', '-created_at', '-id'], name='gifts_gl_sender_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elephants', '0004_add_owner_keyset_index'),
+        ('gifts', '0003_add_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='giftlink',
+            index=models.Index(condition=models.Q(('is_claimed', True)), fields=['sender', 'elephant'], name='gifts_gl_sender_claimed_idx'),
+        ),
+    ]
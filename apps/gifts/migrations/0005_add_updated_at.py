@@ -0,0 +1,21 @@
+"""
+Add updated_at field to GiftLink model (ETag / conditional GET)
+"""
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gifts', '0004_add_sender_claimed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='giftlink',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+    ]
@@ -66,11 +66,27 @@ class GiftLink(models.Model):
         blank=True,
         verbose_name="Дата принятия"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
 
     class Meta:
         verbose_name = "Подарочная ссылка"
         verbose_name_plural = "Подарочные ссылки"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset пагинация списка отправленных подарков
+            models.Index(fields=['sender', '-created_at', '-id'], name='gifts_gl_sender_keyset_idx'),
+            # Delta sync (/api/sync): изменения пользователя после updated_at
+            models.Index(fields=['sender', 'updated_at'], name='gifts_gl_sender_updated_idx'),
+            # Ветка "подаренные и принятые" в get_user_elephant_rows
+            models.Index(
+                fields=['sender', 'elephant'],
+                condition=models.Q(is_claimed=True),
+                name='gifts_gl_sender_claimed_idx',
+            ),
+        ]
 
     def __str__(self):
         status = "Принят" if self.is_claimed else "Ожидает"
@@ -99,7 +115,7 @@ class GiftLink(models.Model):
         self.is_claimed = True
         self.claimed_by = user
         self.claimed_at = timezone.now()
-        self.save(update_fields=['is_claimed', 'claimed_by', 'claimed_at'])
+        self.save(update_fields=['is_claimed', 'claimed_by', 'claimed_at', 'updated_at'])
 
         return self.elephant
 
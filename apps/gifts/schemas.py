@@ -50,6 +50,27 @@ class GiftLinkSchema(Schema):
         return obj.elephant.color_hex if obj.elephant else None
 
 
+# Колонки GiftLink, которые читает каждое поле GiftLinkSchema (для only())
+GIFT_LINK_FIELD_COLUMNS = {
+    'id': ('id',),
+    'uuid': ('uuid',),
+    'sender_name': ('sender_name',),
+    'recipient_name': ('recipient_name',),
+    'message': ('message',),
+    'is_claimed': ('is_claimed',),
+    'created_at': ('created_at',),
+    'claimed_at': ('claimed_at',),
+    'public_url': ('uuid',),
+    'elephant_color': ('elephant__color_hex',),
+}
+
+
+class GiftLinkPageSchema(Schema):
+    """Страница списка подарков (keyset пагинация)"""
+    items: list[GiftLinkSchema]
+    next: Optional[str] = None
+
+
 class PublicGiftSchema(Schema):
     """Публичная схема подарка"""
     model_config = ConfigDict(from_attributes=True)
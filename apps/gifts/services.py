@@ -87,17 +87,28 @@ def claim_gift(gift_uuid, user) -> Elephant:
     return elephant
 
 
-def get_user_sent_gifts(user):
+def get_user_sent_gifts(user, fields: tuple = None):
     """
     Получить список отправленных подарков
 
     Args:
         user: User объект
+        fields: Tuple полей GiftLinkSchema (sparse fieldset) — выбираются только
+            их колонки, слон подгружается только для elephant_color; None — все поля
 
     Returns:
         QuerySet с отправленными подарками
     """
-    return GiftLink.objects.filter(sender=user).select_related('elephant', 'claimed_by')
+    from apps.core.fields import only_columns
+    from .schemas import GIFT_LINK_FIELD_COLUMNS
+
+    gifts = GiftLink.objects.filter(sender=user)
+    if fields is None:
+        return gifts.select_related('elephant', 'claimed_by')
+
+    if 'elephant_color' in fields:
+        gifts = gifts.select_related('elephant')
+    return gifts.only(*only_columns(fields, GIFT_LINK_FIELD_COLUMNS))
 
 
 def get_user_received_gifts(user):
@@ -0,0 +1,31 @@
+"""
+Signals for API cache invalidation and sync tombstones on gift changes
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import GiftLink
+from apps.core.cache import bump_user_cache_version
+from apps.core.models import Tombstone
+from apps.core.sync import record_tombstone
+
+
+@receiver(post_save, sender=GiftLink)
+@receiver(post_delete, sender=GiftLink)
+def invalidate_gift_users_cache(sender, instance, **kwargs):
+    """
+    Invalidate cached API lists of the sender and the recipient
+    """
+    bump_user_cache_version(instance.sender_id, instance.claimed_by_id)
+
+
+@receiver(post_delete, sender=GiftLink)
+def record_gift_tombstone(sender, instance, **kwargs):
+    """
+    Record gift link deletion for the sender's /api/sync
+
+    A claimed gift also kept the elephant in the sender's list.
+    """
+    record_tombstone(Tombstone.GIFT_LINK, instance.pk, instance.sender_id)
+    if instance.is_claimed:
+        record_tombstone(Tombstone.ELEPHANT, instance.elephant_id, instance.sender_id)
@@ -1,8 +1,11 @@
 """
 Django admin for payments app
 """
-from django.contrib import admin
-from .models import Tariff, Order
+from django.contrib import admin, messages
+
+from apps.elephants.services import failed_paid_orders
+from apps.elephants.tasks import redrive_failed_orders
+from .models import Tariff, Order, WebhookEvent
 
 
 @admin.register(Tariff)
@@ -19,22 +22,51 @@ class OrderAdmin(admin.ModelAdmin):
     """Admin для заказов"""
     list_display = ('id', 'user', 'tariff', 'status', 'desired_color', 'yookassa_payment_id', 'created_at', 'paid_at')
     list_filter = ('status', 'tariff', 'created_at')
-    search_fields = ('user__username', 'user__email', 'yookassa_payment_id')
-    readonly_fields = ('id', 'created_at', 'yookassa_payment_id')
+    search_fields = ('user__username', 'user__email', 'yookassa_payment_id', 'trace_id')
+    readonly_fields = ('id', 'trace_id', 'created_at', 'updated_at', 'yookassa_payment_id', 'payment_url', 'payment_error')
     date_hierarchy = 'created_at'
+    actions = ('redrive_failed',)
 
     fieldsets = (
         ('Основная информация', {
-            'fields': ('id', 'user', 'tariff', 'status')
+            'fields': ('id', 'trace_id', 'user', 'tariff', 'status')
         }),
         ('Цвет', {
             'fields': ('desired_color',),
             'description': 'Только для advanced тарифа'
         }),
         ('Оплата', {
-            'fields': ('yookassa_payment_id',)
+            'fields': ('yookassa_payment_id', 'payment_url', 'payment_error')
         }),
         ('Даты', {
-            'fields': ('created_at', 'paid_at')
+            'fields': ('created_at', 'paid_at', 'updated_at')
         }),
     )
+
+    @admin.action(description='Повторить генерацию слона (упавшие оплаченные)')
+    def redrive_failed(self, request, queryset):
+        """Повтор генерации пачками в Celery (redrive_failed_orders)"""
+        order_ids = list(failed_paid_orders().filter(pk__in=queryset).values_list('pk', flat=True))
+        if not order_ids:
+            self.message_user(request, 'Среди выбранных нет оплаченных заказов с ошибкой генерации', messages.WARNING)
+            return
+
+        redrive_failed_orders.delay(order_ids=order_ids)
+        self.message_user(
+            request,
+            f'Повтор генерации поставлен для {len(order_ids)} заказов; '
+            f'прогресс: manage.py redrive_failed_orders --status',
+        )
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    """Admin для уведомлений YooKassa (только просмотр)"""
+    list_display = ('id', 'event', 'payment_id', 'received_at', 'processed_at', 'error')
+    list_filter = ('event', 'processed_at')
+    search_fields = ('payment_id', 'event_key')
+    readonly_fields = ('event_key', 'event', 'payment_id', 'payload', 'received_at', 'processed_at', 'error')
+    date_hierarchy = 'received_at'
+
+    def has_add_permission(self, request):
+        return False
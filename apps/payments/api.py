@@ -2,20 +2,29 @@
 API endpoints for payments and orders
 """
 import logging
+from typing import Optional
 
-from ninja import Router
+from ninja import Router, Query
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
 
 from .models import Tariff, Order
-from .services import get_active_tariffs, create_order, get_user_orders, get_order_by_id
-from .schemas import TariffSchema, CreateOrderSchema, OrderSchema, PaymentInitSchema, PaymentResponseSchema
+from .events import order_status_stream
+from .services import get_active_tariffs, create_order, get_user_orders, get_order_by_id, aget_order_state
+from .schemas import TariffSchema, CreateOrderSchema, OrderSchema, OrderPageSchema, PaymentInitSchema, PaymentResponseSchema
 from .yookassa_service import (
-    create_yookassa_payment, process_yookassa_webhook,
-    YooKassaConfigError, YooKassaAPIError,
+    create_yookassa_payment, request_yookassa_payment, record_webhook_event,
+    YooKassaConfigError, YooKassaAPIError, YooKassaUnavailableError,
 )
 from apps.accounts.schemas import MessageSchema
 from apps.core.auth import auth
+from apps.core.cache import cached_user_response
+from apps.core.conditional import make_etag, etag_matches, set_etag, not_modified
+from apps.core.fields import parse_fields, dump_page, InvalidFieldsError
+from apps.core.threads import in_thread_pool
+from apps.core.tracing import trace
+from apps.core.pagination import paginate_keyset, InvalidCursorError, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
 
 logger = logging.getLogger('apps')
 
@@ -29,17 +38,28 @@ def list_tariffs(request):
     return list(tariffs)
 
 
-@router.post("/orders", response={201: PaymentInitSchema, 400: MessageSchema, 401: MessageSchema, 503: MessageSchema}, auth=auth)
-def create_new_order(request, payload: CreateOrderSchema):
-    """Создать заказ и инициировать оплату через YooKassa"""
+@router.post("/orders", response={201: PaymentInitSchema, 202: PaymentInitSchema, 400: MessageSchema, 401: MessageSchema, 503: MessageSchema}, auth=auth)
+async def create_new_order(request, payload: CreateOrderSchema):
+    """
+    Создать заказ и инициировать оплату через YooKassa (async: запрос к YooKassa не держит воркер)
+
+    При YOOKASSA_ASYNC_PAYMENTS платёж создаёт Celery задача: ответ 202
+    без payment_url.
+    """
     try:
-        order = create_order(
+        order = await in_thread_pool(create_order)(
             user=request.user,
             tariff_name=payload.tariff_name,
             desired_color=payload.desired_color
         )
 
-        payment_url = create_yookassa_payment(order)
+        # Логи оплаты и задача create_payment — в трассе заказа
+        with trace(order.trace_id):
+            if settings.YOOKASSA_ASYNC_PAYMENTS:
+                await in_thread_pool(request_yookassa_payment)(order)
+                return 202, {"order_id": order.id}
+
+            payment_url = await in_thread_pool(create_yookassa_payment)(order)
 
         return 201, {
             "order_id": order.id,
@@ -55,6 +75,9 @@ def create_new_order(request, payload: CreateOrderSchema):
     except YooKassaConfigError as e:
         logger.error(f"YooKassa configuration error: {e}")
         return 503, {"message": "Сервис оплаты временно недоступен. Обратитесь к администратору."}
+    except YooKassaUnavailableError:
+        # Circuit breaker открыт: отказ без ожидания таймаутов YooKassa
+        return 503, {"message": "Сервис оплаты временно недоступен. Попробуйте позже."}
     except YooKassaAPIError as e:
         logger.error(f"YooKassa API error: {e}")
         return 503, {"message": "Ошибка платёжной системы. Попробуйте позже."}
@@ -63,16 +86,21 @@ def create_new_order(request, payload: CreateOrderSchema):
         return 503, {"message": "Внутренняя ошибка сервера. Попробуйте позже."}
 
 
-@router.post("/orders/{order_id}/pay", response={200: PaymentInitSchema, 400: MessageSchema, 401: MessageSchema, 403: MessageSchema, 404: MessageSchema, 503: MessageSchema}, auth=auth)
-def pay_order(request, order_id: int):
-    """Повторная инициация оплаты для pending заказа"""
+@router.post("/orders/{order_id}/pay", response={200: PaymentInitSchema, 202: PaymentInitSchema, 400: MessageSchema, 401: MessageSchema, 403: MessageSchema, 404: MessageSchema, 503: MessageSchema}, auth=auth)
+async def pay_order(request, order_id: int):
+    """Повторная инициация оплаты для pending заказа (async)"""
     try:
-        order = get_order_by_id(order_id, request.user)
+        order = await in_thread_pool(get_order_by_id)(order_id, request.user)
 
         if order.status != 'pending':
             return 400, {"message": "Заказ уже обработан"}
 
-        payment_url = create_yookassa_payment(order)
+        with trace(order.trace_id):
+            if settings.YOOKASSA_ASYNC_PAYMENTS:
+                await in_thread_pool(request_yookassa_payment)(order)
+                return 202, {"order_id": order.id}
+
+            payment_url = await in_thread_pool(create_yookassa_payment)(order)
 
         return 200, {
             "order_id": order.id,
@@ -88,6 +116,9 @@ def pay_order(request, order_id: int):
     except YooKassaConfigError as e:
         logger.error(f"YooKassa configuration error: {e}")
         return 503, {"message": "Сервис оплаты временно недоступен. Обратитесь к администратору."}
+    except YooKassaUnavailableError:
+        # Circuit breaker открыт: отказ без ожидания таймаутов YooKassa
+        return 503, {"message": "Сервис оплаты временно недоступен. Попробуйте позже."}
     except YooKassaAPIError as e:
         logger.error(f"YooKassa API error: {e}")
         return 503, {"message": "Ошибка платёжной системы. Попробуйте позже."}
@@ -97,30 +128,72 @@ def pay_order(request, order_id: int):
 
 
 @router.post("/payments/webhook", response={200: dict})
-def yookassa_webhook(request: HttpRequest):
-    """Webhook endpoint for YooKassa payment notifications (no auth)"""
+async def yookassa_webhook(request: HttpRequest):
+    """Webhook endpoint for YooKassa payment notifications (no auth, async)
+
+    Only saves the event to the inbox; processing runs in Celery.
+    """
     try:
-        process_yookassa_webhook(request.body)
+        await in_thread_pool(record_webhook_event)(request.body)
     except Exception as e:
         logger.exception(f"Webhook processing error: {e}")
     # Always return 200 to prevent YooKassa from retrying
     return 200, {"status": "ok"}
 
 
-@router.get("/orders", response={200: list[OrderSchema], 401: MessageSchema}, auth=auth)
-def list_orders(request):
-    """Список заказов пользователя"""
-    orders = get_user_orders(request.user)
-    return 200, list(orders)
+@router.get("/orders", response={200: OrderPageSchema, 400: MessageSchema, 401: MessageSchema}, auth=auth)
+def list_orders(
+    request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    fields: Optional[str] = None,
+):
+    """Список заказов пользователя (постранично, по курсору)"""
+    try:
+        selected = parse_fields(fields, OrderSchema)
+    except InvalidFieldsError as e:
+        return 400, {"message": str(e)}
+
+    def build():
+        orders, next_cursor = paginate_keyset(get_user_orders(request.user, selected), cursor, limit)
+        return dump_page(OrderSchema, orders, next_cursor, selected)
+
+    try:
+        return cached_user_response(request, "orders", f"{cursor}:{limit}:{','.join(selected or ())}", None, build)
+    except InvalidCursorError as e:
+        return 400, {"message": str(e)}
 
 
 @router.get("/orders/{order_id}", response={200: OrderSchema, 401: MessageSchema, 403: MessageSchema, 404: MessageSchema}, auth=auth)
-def get_order(request, order_id: int):
-    """Получить заказ по ID"""
+def get_order(request, order_id: int, response: HttpResponse):
+    """Получить заказ по ID (поддерживает If-None-Match)"""
     try:
         order = get_order_by_id(order_id, request.user)
+        etag = make_etag('order', order.pk, order.updated_at.isoformat())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         return 200, order
     except Order.DoesNotExist:
         return 404, {"message": "Заказ не найден"}
     except PermissionError:
         return 403, {"message": "Доступ запрещён"}
+
+
+@router.get("/orders/{order_id}/events", response={200: None, 401: MessageSchema, 403: MessageSchema, 404: MessageSchema}, auth=auth)
+async def order_events(request, order_id: int):
+    """SSE-поток статуса заказа (event: status) — замена опроса /orders/{id}"""
+    try:
+        await aget_order_state(order_id, request.user)
+    except Order.DoesNotExist:
+        return 404, {"message": "Заказ не найден"}
+    except PermissionError:
+        return 403, {"message": "Доступ запрещён"}
+
+    response = StreamingHttpResponse(
+        order_status_stream(order_id, lambda: aget_order_state(order_id, request.user)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: не буферизовать поток
+    return response
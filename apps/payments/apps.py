@@ -11,7 +11,9 @@ class PaymentsConfig(AppConfig):
     verbose_name = 'Payments'
 
     def ready(self):
-        """Validate YooKassa configuration on startup."""
+        """Validate YooKassa configuration on startup and import signals."""
+        import apps.payments.signals  # noqa
+
         shop_id = getattr(settings, 'YOOKASSA_SHOP_ID', None)
         secret_key = getattr(settings, 'YOOKASSA_SECRET_KEY', None)
 
@@ -0,0 +1,118 @@
+"""
+Order status events over Redis pub/sub (Server-Sent Events stream).
+
+Каждое изменение статуса заказа публикуется в канал заказа после коммита
+транзакции. Страница возврата с оплаты держит одно SSE-соединение
+(GET /api/orders/{id}/events) вместо опроса API каждые 3 секунды.
+Поток асинхронный и выполняется в ASGI-воркере, поэтому открытые
+соединения не занимают синхронные воркеры.
+"""
+import json
+import logging
+import time
+from functools import cache
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger('apps')
+
+# Статусы, после которых событий по заказу больше не будет
+FINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+SSE_KEEPALIVE_INTERVAL = 15  # seconds
+SSE_STREAM_TIMEOUT = 5 * 60  # 5 minutes, EventSource переподключится сам
+SSE_RETRY_MS = 3000
+
+
+def order_events_channel(order_id: int) -> str:
+    return f"order:{order_id}:events"
+
+
+@cache
+def _redis_client():
+    """Синхронный клиент Redis для публикации (один пул на процесс)"""
+    return redis.Redis.from_url(settings.REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+
+
+def order_state(order) -> dict:
+    """Состояние заказа в событии: статус и результат создания платежа"""
+    return {
+        "id": order.pk,
+        "status": order.status,
+        "payment_url": order.payment_url,
+        "payment_error": order.payment_error,
+    }
+
+
+def publish_order_status(order) -> None:
+    """
+    Опубликовать состояние заказа подписчикам (после коммита транзакции)
+
+    Ошибки Redis только логируются: клиент без события узнает статус
+    при переподключении потока.
+
+    Args:
+        order: Order объект с новым статусом или ссылкой на оплату
+    """
+    message = json.dumps(order_state(order))
+    channel = order_events_channel(order.pk)
+
+    def publish():
+        try:
+            _redis_client().publish(channel, message)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to publish status of order {order.pk}: {e}")
+
+    transaction.on_commit(publish)
+
+
+def _sse(event: str, data: dict) -> str:
+    """Одно SSE-сообщение"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def order_status_stream(order_id: int, get_state):
+    """
+    SSE-поток статусов заказа
+
+    Подписка оформляется до чтения текущего состояния, поэтому изменение
+    между чтением и подпиской не теряется. Первым отправляется текущее
+    состояние; поток закрывается на финальном статусе или по таймауту.
+
+    Args:
+        order_id: ID заказа
+        get_state: Async функция без аргументов -> order_state() заказа из БД
+
+    Yields:
+        Строки SSE (event: status / комментарии keepalive)
+    """
+    client = aioredis.Redis.from_url(settings.REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(order_events_channel(order_id))
+
+        state = await get_state()
+        yield f"retry: {SSE_RETRY_MS}\n" + _sse("status", state)
+        if state["status"] in FINAL_STATUSES:
+            return
+
+        deadline = time.monotonic() + SSE_STREAM_TIMEOUT
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=SSE_KEEPALIVE_INTERVAL)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+
+            data = json.loads(message["data"])
+            yield _sse("status", data)
+            if data["status"] in FINAL_STATUSES:
+                return
+    except redis.RedisError as e:
+        # Клиент переподключится и получит текущий статус первым сообщением
+        logger.warning(f"Order {order_id} event stream failed: {e}")
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
@@ -0,0 +1,119 @@
+"""
+Benchmark for the YooKassa HTTP client against a local stand-in API.
+
+Starts a local HTTP server that answers POST /payments and
+GET /payments/<id> like YooKassa, and compares:
+    sdk     — yookassa.Payment (new session and connection per call)
+    pooled  — PooledPayment (process-wide keep-alive pool)
+
+--handshake-ms delays the first request of every new connection to model
+the TCP + TLS handshake to api.yookassa.ru (localhost has none).
+
+Usage:
+    python manage.py benchmark_yookassa_client
+    python manage.py benchmark_yookassa_client --requests 200 --handshake-ms 60
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from yookassa import Configuration, Payment
+
+from apps.payments.yookassa_client import PooledPayment, get_api_client
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """YooKassa-like answers; counts connections"""
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело уходят отдельными write: без TCP_NODELAY keep-alive
+    # соединение ловит задержку Nagle + delayed ACK (~40 мс)
+    disable_nagle_algorithm = True
+    handshake_delay = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def handle(self):
+        with self.lock:
+            type(self).connections += 1
+        time.sleep(self.handshake_delay)
+        super().handle()
+
+    def _reply(self, payment_id):
+        body = json.dumps({
+            "id": payment_id,
+            "status": "pending",
+            "paid": False,
+            "amount": {"value": "100.00", "currency": "RUB"},
+            "confirmation": {"type": "redirect", "confirmation_url": f"https://yoomoney.ru/checkout/{payment_id}"},
+            "created_at": "2026-10-19T12:00:00.000Z",
+            "test": True,
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(str(uuid.uuid4()))
+
+    def do_GET(self):
+        self._reply(self.path.rsplit('/', 1)[-1])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark SDK vs pooled YooKassa client against a local stand-in API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='Requests per variant (default: 100)')
+        parser.add_argument('--handshake-ms', type=float, default=30, help='Delay per new connection, ms (default: 30)')
+
+    def handle(self, *args, **options):
+        _StandInHandler.handshake_delay = options['handshake_ms'] / 1000
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _StandInHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api_url = f"http://127.0.0.1:{server.server_port}/v3"
+
+        payload = {
+            "amount": {"value": "100.00", "currency": "RUB"},
+            "confirmation": {"type": "redirect", "return_url": "https://example.com/payment/return/"},
+            "capture": True,
+            "description": "benchmark",
+        }
+
+        try:
+            with override_settings(YOOKASSA_SHOP_ID='000000', YOOKASSA_SECRET_KEY='test', YOOKASSA_API_URL=api_url):
+                get_api_client.cache_clear()
+                get_api_client()
+                for name, payment_api in (('sdk', Payment), ('pooled', PooledPayment)):
+                    self._run(name, payment_api, payload, options['requests'])
+        finally:
+            server.shutdown()
+            server.server_close()
+            get_api_client.cache_clear()
+            Configuration.configure(None, None)
+
+    def _run(self, name, payment_api, payload, requests):
+        _StandInHandler.connections = 0
+        timings = []
+        for i in range(requests):
+            started = time.perf_counter()
+            payment = payment_api.create(payload, f"benchmark-{name}-{i}")
+            payment_api.find_one(payment.id)
+            timings.append(time.perf_counter() - started)
+
+        timings.sort()
+        self.stdout.write(
+            f'{name:<7} create+find_one: p50 {timings[len(timings) // 2] * 1000:6.1f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95)] * 1000:6.1f} ms, '
+            f'total {sum(timings):6.2f} s, connections {_StandInHandler.connections}'
+        )
@@ -0,0 +1,26 @@
+"""
+Management command to delete processed webhook events older than the retention period.
+
+The webhook inbox keeps every delivery. An event only matters while
+YooKassa may redeliver it (up to 24 hours), so processed events older
+than WEBHOOK_EVENT_RETENTION are deleted. Unprocessed events are kept.
+
+Usage:
+    python manage.py purge_webhook_events
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.payments.models import WebhookEvent
+from apps.payments.yookassa_service import WEBHOOK_EVENT_RETENTION
+
+
+class Command(BaseCommand):
+    help = 'Delete processed webhook events older than WEBHOOK_EVENT_RETENTION'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - WEBHOOK_EVENT_RETENTION
+        deleted, _ = WebhookEvent.objects.filter(processed_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} webhook events processed before {cutoff:%Y-%m-%d %H:%M}'
+        ))
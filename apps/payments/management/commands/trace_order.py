@@ -0,0 +1,78 @@
+"""
+Management command to break down the end-to-end latency of one order.
+
+Reads spans of the order trace from TRACE_SPANS_FILE (JSON lines written
+by apps/core/tracing.py in the web process, the webhook inbox and Celery
+workers) and prints them in start order with offsets from the first span:
+
+    order.create → payment.create → payment.webhook →
+    elephant.allocate.queued → elephant.allocate →
+    elephant.render.queued → elephant.render (stages_ms with ELEPHANT_STAGE_TIMINGS)
+
+Usage:
+    python manage.py trace_order 123
+    python manage.py trace_order 9f1c2e...  (trace id)
+    python manage.py trace_order 123 --file /app/logs/spans.jsonl
+"""
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payments.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Show trace spans of one order stage by stage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('order', help='Order ID or trace id')
+        parser.add_argument('--file', default=None, help='Spans file (default: TRACE_SPANS_FILE)')
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.TRACE_SPANS_FILE
+        if not path:
+            raise CommandError('TRACE_SPANS_FILE is not set, pass --file')
+        if not os.path.exists(path):
+            raise CommandError(f'Spans file not found: {path}')
+
+        trace_id, label = self._resolve(options['order'])
+        spans = sorted(self._read(path, trace_id), key=lambda item: item['start'])
+        if not spans:
+            self.stdout.write(f'{label}: no spans in {path}')
+            return
+
+        first = spans[0]['start']
+        last = max(item['start'] + item['duration_ms'] / 1000 for item in spans)
+        self.stdout.write(f'{label}: {len(spans)} spans, end to end {last - first:.3f} s')
+
+        for item in spans:
+            attrs = ' '.join(f'{key}={value}' for key, value in item['attrs'].items() if value is not None)
+            marker = '' if item['status'] == 'ok' else f' [{item["status"]}]'
+            self.stdout.write(
+                f'  +{item["start"] - first:8.3f} s {item["duration_ms"]:10.1f} ms  '
+                f'{item["name"]:<26}{marker} {attrs}'
+            )
+
+    def _resolve(self, value: str) -> tuple:
+        """Trace id и подпись по ID заказа или trace id"""
+        if value.isdigit():
+            trace_id = Order.objects.filter(pk=int(value)).values_list('trace_id', flat=True).first()
+            if not trace_id:
+                raise CommandError(f'Order #{value} not found or has no trace id')
+            return trace_id, f'Order #{value} trace {trace_id}'
+        return value, f'Trace {value}'
+
+    def _read(self, path: str, trace_id: str):
+        """Спаны трассы из файла (строки без trace id не разбираются)"""
+        with open(path, encoding='utf-8') as spans_file:
+            for line in spans_file:
+                if trace_id not in line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if item.get('trace_id') == trace_id:
+                    yield item
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_add_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_key', models.CharField(max_length=100, unique=True, verbose_name='Ключ события')),
+                ('event', models.CharField(max_length=50, verbose_name='Тип события')),
+                ('payment_id', models.CharField(max_length=50, verbose_name='ID платежа YooKassa')),
+                ('payload', models.JSONField(verbose_name='Тело уведомления')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата получения')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата обработки')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка обработки')),
+            ],
+            options={
+                'verbose_name': 'Уведомление YooKassa',
+                'verbose_name_plural': 'Уведомления YooKassa',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['id'], name='payments_webhook_pending_idx')],
+            },
+        ),
+    ]
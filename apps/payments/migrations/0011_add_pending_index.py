@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0010_add_webhook_event'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'pending'), ('yookassa_payment_id__isnull', False)), fields=['id'], name='payments_or_pending_idx'),
+        ),
+    ]
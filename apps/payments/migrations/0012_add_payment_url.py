@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0011_add_pending_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_error',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Ошибка создания платежа'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='payment_url',
+            field=models.URLField(blank=True, help_text='confirmation_url платежа YooKassa', max_length=500, null=True, verbose_name='Ссылка на оплату'),
+        ),
+    ]
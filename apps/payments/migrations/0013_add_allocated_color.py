@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 14:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0012_add_payment_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='allocated_color',
+            field=models.CharField(blank=True, help_text='Цвет, зарезервированный за заказом до создания слона', max_length=7, null=True, unique=True, verbose_name='Выделенный цвет (HEX)'),
+        ),
+    ]
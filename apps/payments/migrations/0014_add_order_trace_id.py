@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-19 15:20
+
+import apps.core.tracing
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0013_add_allocated_color'),
+    ]
+
+    operations = [
+        # Существующие заказы остаются без trace id: default при AddField
+        # вычислился бы один раз и выдал всем строкам один id
+        migrations.AddField(
+            model_name='order',
+            name='trace_id',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Сквозной ID заказа в логах и спанах (web, webhook, Celery)', max_length=32, null=True, verbose_name='Trace ID'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='trace_id',
+            field=models.CharField(blank=True, db_index=True, default=apps.core.tracing.new_trace_id, editable=False, help_text='Сквозной ID заказа в логах и спанах (web, webhook, Celery)', max_length=32, null=True, verbose_name='Trace ID'),
+        ),
+    ]
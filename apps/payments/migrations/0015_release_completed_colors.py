@@ -0,0 +1,24 @@
+"""
+Data migration to release color reservations of completed orders.
+
+The color of a completed order is held by its elephant (unique color_hex);
+a reservation left on the order kept the color taken after the elephant
+was deleted.
+"""
+from django.db import migrations
+
+
+def release_completed_colors(apps, schema_editor):
+    Order = apps.get_model('payments', 'Order')
+    Order.objects.filter(status='completed', allocated_color__isnull=False).update(allocated_color=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0014_add_order_trace_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(release_completed_colors, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,8 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from apps.core.tracing import new_trace_id
+
 
 class Tariff(models.Model):
     """Тарифные планы для покупки слонов"""
@@ -82,6 +84,24 @@ class Order(models.Model):
         verbose_name="Желаемый цвет (HEX) или оттенок",
         help_text="Только для advanced тарифа, формат: #RRGGBB или HUE:XXX"
     )
+    allocated_color = models.CharField(
+        max_length=7,
+        blank=True,
+        null=True,
+        unique=True,
+        verbose_name="Выделенный цвет (HEX)",
+        help_text="Цвет, зарезервированный за заказом до создания слона"
+    )
+    trace_id = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        default=new_trace_id,
+        editable=False,
+        db_index=True,
+        verbose_name="Trace ID",
+        help_text="Сквозной ID заказа в логах и спанах (web, webhook, Celery)"
+    )
     yookassa_payment_id = models.CharField(
         max_length=50,
         blank=True,
@@ -89,6 +109,19 @@ class Order(models.Model):
         unique=True,
         verbose_name="ID платежа YooKassa",
     )
+    payment_url = models.URLField(
+        max_length=500,
+        blank=True,
+        null=True,
+        verbose_name="Ссылка на оплату",
+        help_text="confirmation_url платежа YooKassa"
+    )
+    payment_error = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        verbose_name="Ошибка создания платежа",
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Дата создания"
@@ -98,11 +131,27 @@ class Order(models.Model):
         blank=True,
         verbose_name="Дата оплаты"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
 
     class Meta:
         verbose_name = "Заказ"
         verbose_name_plural = "Заказы"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset пагинация списка заказов пользователя
+            models.Index(fields=['user', '-created_at', '-id'], name='payments_or_user_keyset_idx'),
+            # Delta sync (/api/sync): изменения пользователя после updated_at
+            models.Index(fields=['user', 'updated_at'], name='payments_or_user_updated_idx'),
+            # Сверка pending заказов с YooKassa (reconcile_pending_orders)
+            models.Index(
+                fields=['id'],
+                condition=models.Q(status='pending', yookassa_payment_id__isnull=False),
+                name='payments_or_pending_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.user.username} - {self.status}"
@@ -129,7 +178,7 @@ class Order(models.Model):
         """Отметить заказ как оплаченный"""
         self.status = "paid"
         self.paid_at = timezone.now()
-        self.save(update_fields=['status', 'paid_at'])
+        self.save(update_fields=['status', 'paid_at', 'updated_at'])
 
     def can_be_processed(self):
         """Может ли заказ быть обработан"""
@@ -142,19 +191,84 @@ class Order(models.Model):
     def mark_as_processing(self):
         """Отметить заказ как обрабатываемый"""
         self.status = "processing"
-        self.save(update_fields=['status'])
+        self.save(update_fields=['status', 'updated_at'])
 
     def mark_as_completed(self):
-        """Отметить заказ как завершённый"""
+        """
+        Отметить заказ как завершённый
+
+        Резерв цвета снимается: цвет держит уникальный color_hex слона, и после
+        удаления слона цвет снова свободен.
+        """
         self.status = "completed"
-        self.save(update_fields=['status'])
+        self.allocated_color = None
+        self.save(update_fields=['status', 'allocated_color', 'updated_at'])
 
     def mark_as_failed(self):
-        """Отметить заказ как проваленный"""
+        """Отметить заказ как проваленный (выделенный цвет освобождается)"""
         self.status = "failed"
-        self.save(update_fields=['status'])
+        self.allocated_color = None
+        self.save(update_fields=['status', 'allocated_color', 'updated_at'])
 
     def mark_as_cancelled(self):
         """Отметить заказ как отменённый"""
         self.status = "cancelled"
-        self.save(update_fields=['status'])
+        self.save(update_fields=['status', 'updated_at'])
+
+
+class WebhookEvent(models.Model):
+    """
+    Входящее уведомление YooKassa (inbox)
+
+    Webhook только сохраняет событие одним INSERT ... ON CONFLICT DO NOTHING
+    и сразу отвечает 200. Повторная доставка того же события (event_key —
+    тип события + ID платежа) не создаёт новой записи. События обрабатывает
+    Celery задача process_webhook_events пачками. Обработанные события
+    старше WEBHOOK_EVENT_RETENTION удаляет команда purge_webhook_events.
+    """
+
+    event_key = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Ключ события"
+    )
+    event = models.CharField(
+        max_length=50,
+        verbose_name="Тип события"
+    )
+    payment_id = models.CharField(
+        max_length=50,
+        verbose_name="ID платежа YooKassa"
+    )
+    payload = models.JSONField(
+        verbose_name="Тело уведомления"
+    )
+    received_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата получения"
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата обработки"
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="Ошибка обработки"
+    )
+
+    class Meta:
+        verbose_name = "Уведомление YooKassa"
+        verbose_name_plural = "Уведомления YooKassa"
+        ordering = ['-received_at']
+        indexes = [
+            # Очередь необработанных событий (process_webhook_events)
+            models.Index(
+                fields=['id'],
+                condition=models.Q(processed_at__isnull=True),
+                name='payments_webhook_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.event_key
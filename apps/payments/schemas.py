@@ -32,12 +32,38 @@ class OrderSchema(Schema):
     created_at: datetime
     paid_at: Optional[datetime]
     tariff: TariffSchema
+    payment_url: Optional[str] = None
+    payment_error: str = ""
+
+
+# Колонки Order, которые читает каждое поле OrderSchema (для only())
+ORDER_FIELD_COLUMNS = {
+    'id': ('id',),
+    'status': ('status',),
+    'desired_color': ('desired_color',),
+    'created_at': ('created_at',),
+    'paid_at': ('paid_at',),
+    'tariff': ('tariff',),
+    'payment_url': ('payment_url',),
+    'payment_error': ('payment_error',),
+}
+
+
+class OrderPageSchema(Schema):
+    """Страница списка заказов (keyset пагинация)"""
+    items: list[OrderSchema]
+    next: Optional[str] = None
 
 
 class PaymentInitSchema(Schema):
-    """Response after payment initiation (redirect to YooKassa)"""
+    """
+    Response after payment initiation (redirect to YooKassa)
+
+    payment_url is None with status 202 (YOOKASSA_ASYNC_PAYMENTS): the link
+    comes later in GET /api/orders/{id} and the order event stream.
+    """
     order_id: int
-    payment_url: str
+    payment_url: Optional[str] = None
 
 
 class PaymentResponseSchema(Schema):
@@ -4,7 +4,9 @@ Business logic services for payments and orders
 from django.db import transaction
 from django.core.exceptions import ValidationError
 
+from .events import order_state
 from .models import Tariff, Order
+from apps.core.tracing import new_trace_id, trace, trace_span
 from apps.elephants.services import check_color_availability
 from apps.elephants.utils import validate_hex_color
 
@@ -91,6 +93,8 @@ def create_order(user, tariff_name: str, desired_color: str = None) -> Order:
     """
     Создание нового заказа
 
+    Заказ получает trace id; создание пишется спаном order.create.
+
     Args:
         user: User объект
         tariff_name: Название тарифа (basic/advanced)
@@ -103,22 +107,27 @@ def create_order(user, tariff_name: str, desired_color: str = None) -> Order:
         Tariff.DoesNotExist: Если тариф не найден
         ValidationError: Если данные невалидны
     """
-    # Получаем тариф
-    tariff = get_tariff_by_name(tariff_name)
+    trace_id = new_trace_id()
+
+    with trace(trace_id), trace_span('order.create', tariff=tariff_name) as span:
+        # Получаем тариф
+        tariff = get_tariff_by_name(tariff_name)
 
-    # Нормализуем цвет
-    if desired_color:
-        desired_color = desired_color.upper()
+        # Нормализуем цвет
+        if desired_color:
+            desired_color = desired_color.upper()
 
-    # Валидируем цвет
-    validate_desired_color(desired_color, tariff)
+        # Валидируем цвет
+        validate_desired_color(desired_color, tariff)
 
-    # Создаём заказ
-    order = Order.objects.create(
-        user=user,
-        tariff=tariff,
-        desired_color=desired_color
-    )
+        # Создаём заказ
+        order = Order.objects.create(
+            user=user,
+            tariff=tariff,
+            desired_color=desired_color,
+            trace_id=trace_id
+        )
+        span.attrs['order_id'] = order.id
 
     return order
 
@@ -152,17 +161,27 @@ def process_payment(order_id: int) -> bool:
     return True
 
 
-def get_user_orders(user):
+def get_user_orders(user, fields: tuple = None):
     """
     Получить список заказов пользователя
 
     Args:
         user: User объект
+        fields: Tuple полей OrderSchema (sparse fieldset) — выбираются только
+            их колонки, тариф подгружается только если запрошен; None — все поля
 
     Returns:
         QuerySet с заказами пользователя
     """
-    return Order.objects.filter(user=user).select_related('tariff')
+    from apps.core.fields import only_columns
+    from .schemas import ORDER_FIELD_COLUMNS
+
+    orders = Order.objects.filter(user=user)
+    if fields is None or 'tariff' in fields:
+        orders = orders.select_related('tariff')
+    if fields is not None:
+        orders = orders.only(*only_columns(fields, ORDER_FIELD_COLUMNS))
+    return orders
 
 
 def get_order_by_id(order_id: int, user=None) -> Order:
@@ -182,7 +201,30 @@ def get_order_by_id(order_id: int, user=None) -> Order:
     """
     order = Order.objects.select_related('tariff').get(pk=order_id)
 
-    if user and order.user != user:
+    if user and order.user_id != user.pk:
         raise PermissionError("Вы не являетесь владельцем этого заказа")
 
     return order
+
+
+async def aget_order_state(order_id: int, user) -> dict:
+    """
+    Состояние заказа с проверкой владельца (async, для SSE-потока)
+
+    Args:
+        order_id: ID заказа
+        user: User объект для проверки
+
+    Returns:
+        order_state(): статус, ссылка на оплату, ошибка создания платежа
+
+    Raises:
+        Order.DoesNotExist: Если заказ не найден
+        PermissionError: Если пользователь не владелец
+    """
+    order = await Order.objects.only('id', 'user_id', 'status', 'payment_url', 'payment_error').aget(pk=order_id)
+
+    if order.user_id != user.pk:
+        raise PermissionError("Вы не являетесь владельцем этого заказа")
+
+    return order_state(order)
@@ -0,0 +1,43 @@
+"""
+Signals for API cache invalidation, sync tombstones and status events
+on order changes
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .events import publish_order_status
+from .models import Order
+from apps.core.cache import bump_user_cache_version
+from apps.core.models import Tombstone
+from apps.core.sync import record_tombstone
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_order_user_cache(sender, instance, **kwargs):
+    """
+    Invalidate cached API lists of the order owner
+    """
+    bump_user_cache_version(instance.user_id)
+
+
+@receiver(post_delete, sender=Order)
+def record_order_tombstone(sender, instance, **kwargs):
+    """
+    Record order deletion for the owner's /api/sync
+    """
+    record_tombstone(Tombstone.ORDER, instance.pk, instance.user_id)
+
+
+# Поля, изменение которых публикуется в SSE-поток заказа
+ORDER_EVENT_FIELDS = {'status', 'payment_url', 'payment_error'}
+
+
+@receiver(post_save, sender=Order)
+def publish_order_status_event(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Publish status and payment link changes (Order.mark_as_*, Celery tasks)
+    to SSE subscribers
+    """
+    if not created and (update_fields is None or ORDER_EVENT_FIELDS & set(update_fields)):
+        publish_order_status(instance)
@@ -0,0 +1,97 @@
+"""
+Celery tasks for payments
+"""
+import logging
+from celery import shared_task
+from django.core.cache import cache
+
+from .models import Order
+from .yookassa_service import (
+    create_yookassa_payment, process_webhook_batch, reconcile_pending_payments,
+    WEBHOOK_BATCH_SIZE, WEBHOOK_SCHEDULED_KEY, YooKassaConfigError, YooKassaAPIError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, ignore_result=True)
+def create_payment(self, order_id: int):
+    """
+    Создание платежа YooKassa для заказа (режим YOOKASSA_ASYNC_PAYMENTS)
+
+    Сохраняет payment_url заказа; клиент получает его из
+    GET /api/orders/{id} или SSE-потока заказа. Повторы безопасны: ключ
+    идемпотентности платежа зависит только от ID заказа. После исчерпания
+    повторов в заказ пишется payment_error.
+
+    Args:
+        order_id: ID заказа
+    """
+    try:
+        order = Order.objects.select_related('tariff').get(pk=order_id)
+    except Order.DoesNotExist:
+        logger.error(f"Order {order_id} not found")
+        return
+
+    if order.status != 'pending':
+        logger.info(f"Order {order_id} is not pending ({order.status}), skipping payment creation")
+        return
+
+    try:
+        create_yookassa_payment(order)
+    except YooKassaAPIError as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=2 ** self.request.retries)
+        order.payment_error = "Ошибка платёжной системы. Попробуйте позже."
+        order.save(update_fields=['payment_error', 'updated_at'])
+    except YooKassaConfigError as e:
+        logger.error(f"YooKassa configuration error: {e}")
+        order.payment_error = "Сервис оплаты временно недоступен. Обратитесь к администратору."
+        order.save(update_fields=['payment_error', 'updated_at'])
+
+
+@shared_task(ignore_result=True)
+def process_webhook_events():
+    """
+    Обработка входящих уведомлений YooKassa из inbox пачками
+
+    Флаг планирования снимается до чтения очереди: событие, записанное
+    во время обработки, запланирует следующую задачу.
+
+    Returns:
+        Количество обработанных событий
+    """
+    cache.delete(WEBHOOK_SCHEDULED_KEY)
+
+    total = 0
+    while True:
+        processed = process_webhook_batch(WEBHOOK_BATCH_SIZE)
+        total += processed
+        if processed < WEBHOOK_BATCH_SIZE:
+            break
+
+    if total:
+        logger.info(f"Processed {total} webhook events")
+    return total
+
+
+@shared_task(ignore_result=True)
+def reconcile_pending_orders():
+    """
+    Сверка pending заказов со статусами платежей YooKassa (celery beat)
+
+    Закрывает заказы, webhook которых потерян, и обновляет кэш статусов
+    для страницы возврата с оплаты.
+
+    Returns:
+        Количество заказов со сменившимся статусом
+    """
+    try:
+        checked, changed = reconcile_pending_payments()
+    except YooKassaConfigError as e:
+        logger.warning(f"Skipping pending orders reconciliation: {e}")
+        return 0
+
+    if checked:
+        logger.info(f"Reconciled {checked} pending orders, {changed} changed")
+    return changed
@@ -1,18 +1,23 @@
 """
 Views for payment pages
 """
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 
 from .models import Order
 from .yookassa_service import check_payment_status
+from apps.core.threads import in_thread_pool
 
 
 @login_required
-def payment_return(request):
+async def payment_return(request):
     """
     Return page after YooKassa payment.
     Shows payment status and auto-redirects to dashboard.
+
+    Async: the YooKassa status check runs in a thread pool and does not
+    hold the worker.
     """
     order_id = request.GET.get('order_id')
 
@@ -20,19 +25,20 @@ def payment_return(request):
         return redirect('/dashboard/')
 
     try:
-        order = Order.objects.select_related('tariff').get(
-            pk=order_id, user=request.user
+        order = await Order.objects.select_related('tariff').aget(
+            pk=order_id, user=await request.auser()
         )
     except Order.DoesNotExist:
         return redirect('/dashboard/')
 
-    # Check current status from YooKassa if still pending
+    # Payment status if still pending (cached, refreshed by reconcile_pending_orders)
     yookassa_status = None
     if order.status == 'pending' and order.yookassa_payment_id:
-        yookassa_status = check_payment_status(order)
+        yookassa_status = await in_thread_pool(check_payment_status)(order)
 
     context = {
         'order': order,
         'yookassa_status': yookassa_status,
     }
-    return render(request, 'payments/return.html', context)
+    # Templates read request.user lazily (sync ORM)
+    return await sync_to_async(render)(request, 'payments/return.html', context)
@@ -0,0 +1,105 @@
+"""
+Process-wide YooKassa API client with a keep-alive connection pool.
+
+SDK создаёт новую requests.Session (новое HTTPS-соединение с TLS
+handshake) на каждый вызов и не задаёт таймауты. Здесь SDK настраивается
+один раз на процесс, а запросы идут через одну сессию с пулом keep-alive
+соединений и явными таймаутами connect/read.
+"""
+from functools import cache
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+from yookassa import Configuration, Payment
+from yookassa.client import ApiClient
+from yookassa.domain.common import RequestObject
+
+YOOKASSA_CONNECT_TIMEOUT = 3.05  # seconds
+YOOKASSA_READ_TIMEOUT = 15  # seconds
+
+
+class PooledApiClient(ApiClient):
+    """
+    ApiClient SDK на общей сессии с пулом соединений
+
+    Повторы POST при ответе 202 и исключения для кодов ошибок — как в SDK.
+    Сетевые ошибки и таймауты пробрасываются как исключения requests
+    (SDK в этом случае падает с AttributeError на e.response); повтор
+    только один — при ошибке соединения.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Read timeout не повторяется: иначе время ответа растёт в разы
+        retries = Retry(
+            total=self.max_attempts,
+            connect=1,
+            read=0,
+            backoff_factor=self.timeout / 1000,
+            allowed_methods=['POST'],
+            status_forcelist=[202],
+        )
+        # pool_maxsize — не лимит запросов (pool_block=False: лишний запрос
+        # открывает соединение и закрывает его после ответа), а число
+        # keep-alive соединений, которые пул сохраняет. SDK вызывается из
+        # потоков apps/core/threads.py, поэтому пул размером с них сохраняет
+        # соединение каждому одновременному запросу процесса
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=settings.ASYNC_THREAD_POOL_SIZE, max_retries=retries
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method="", path="", query_params=None, headers=None, body=None):
+        if isinstance(body, RequestObject):
+            body.validate()
+            body = dict(body)
+
+        raw_response = self.execute(body, method, path, query_params, self.prepare_request_headers(headers))
+        if raw_response.status_code != 200:
+            self._ApiClient__handle_error(raw_response)
+
+        return raw_response.json()
+
+    def execute(self, body, method, path, query_params, request_headers):
+        self.log_request(body, method, path, query_params, request_headers)
+
+        raw_response = self.session.request(
+            method,
+            self.endpoint + path,
+            params=query_params,
+            headers=request_headers,
+            json=body,
+            verify=self.configuration.verify,
+            timeout=(YOOKASSA_CONNECT_TIMEOUT, YOOKASSA_READ_TIMEOUT),
+        )
+
+        # get_response_info() SDK вызывает raise_for_status(), поэтому только код ответа
+        self.log_response(raw_response.content, {'status_code': raw_response.status_code}, raw_response.headers)
+        return raw_response
+
+
+@cache
+def get_api_client() -> PooledApiClient:
+    """
+    Клиент YooKassa процесса (SDK настраивается при первом вызове)
+
+    Returns:
+        PooledApiClient
+    """
+    Configuration.configure(
+        str(settings.YOOKASSA_SHOP_ID),
+        str(settings.YOOKASSA_SECRET_KEY),
+        api_url=settings.YOOKASSA_API_URL,
+    )
+    return PooledApiClient()
+
+
+class PooledPayment(Payment):
+    """Payment API SDK через клиент процесса (Payment.create, Payment.find_one, ...)"""
+
+    def __init__(self):
+        self.client = get_api_client()
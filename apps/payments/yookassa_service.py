@@ -3,16 +3,49 @@ YooKassa payment integration service
 """
 import json
 import logging
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.utils import timezone
 
-from .models import Order
-from apps.elephants.tasks import generate_elephant_image
+from .models import Order, WebhookEvent
+from apps.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from apps.core.tracing import record_span, trace, trace_span
+from apps.elephants.tasks import start_elephant_generation
 
 logger = logging.getLogger('apps')
 
+# Webhook inbox: события копятся WEBHOOK_BATCH_DELAY секунд и
+# обрабатываются пачками по WEBHOOK_BATCH_SIZE
+WEBHOOK_BATCH_SIZE = 100
+WEBHOOK_BATCH_DELAY = 1  # seconds
+WEBHOOK_SCHEDULE_TTL = 60  # seconds
+WEBHOOK_SCHEDULED_KEY = 'payments:webhook_events:scheduled'
+# Срок хранения обработанных событий (purge_webhook_events). YooKassa
+# повторяет доставку уведомления до 24 часов: пока событие хранится,
+# повтор отбрасывается по event_key
+WEBHOOK_EVENT_RETENTION = timedelta(days=7)
+
+# Сверка pending заказов (reconcile_pending_orders): страницы по
+# RECONCILE_PAGE_SIZE, запросы к YooKassa в RECONCILE_WORKERS потоков
+# (не больше пула соединений клиента)
+RECONCILE_PAGE_SIZE = 100
+RECONCILE_WORKERS = 8
+# Статус платежа в кэше: сверка обновляет его каждую минуту, страница
+# возврата читает из кэша
+PAYMENT_STATUS_CACHE_TTL = 90  # seconds
+
+# Статус платежа YooKassa -> событие webhook с тем же переходом заказа
+PAYMENT_STATUS_EVENTS = {
+    'succeeded': 'payment.succeeded',
+    'canceled': 'payment.canceled',
+}
+
 
 class YooKassaConfigError(Exception):
     """Raised when YooKassa credentials are missing or invalid."""
@@ -27,8 +60,34 @@ class YooKassaAPIError(Exception):
         self.raw_response = raw_response
 
 
-def _configure_yookassa():
-    """Configure YooKassa SDK with shop credentials."""
+class YooKassaUnavailableError(YooKassaAPIError):
+    """Raised when calls are rejected by the open YooKassa circuit breaker."""
+    pass
+
+
+def _is_gateway_failure(exc: Exception) -> bool:
+    """400/404 from YooKassa are errors of the request, not of the gateway."""
+    return getattr(exc, 'HTTP_CODE', None) not in (400, 404)
+
+
+# Общий для всех воркеров breaker вызовов YooKassa: при >= 50% ошибок или
+# вызовов дольше 5 с (из >= 10 за минуту) вызовы 30 с сразу отклоняются
+yookassa_breaker = CircuitBreaker(
+    'yookassa',
+    failure_rate=0.5,
+    min_calls=10,
+    slow_call_seconds=5.0,
+    open_seconds=30,
+    is_failure=_is_gateway_failure,
+)
+
+
+def _payment_api():
+    """
+    YooKassa Payment API on the process-wide pooled client.
+
+    The SDK is configured once per process (see yookassa_client).
+    """
     shop_id = getattr(settings, 'YOOKASSA_SHOP_ID', None)
     secret_key = getattr(settings, 'YOOKASSA_SECRET_KEY', None)
 
@@ -39,12 +98,13 @@ def _configure_yookassa():
         )
 
     try:
-        from yookassa import Configuration
-        Configuration.account_id = str(shop_id)
-        Configuration.secret_key = str(secret_key)
+        from .yookassa_client import PooledPayment, get_api_client
+        get_api_client()
     except Exception as e:
         raise YooKassaConfigError(f"Failed to configure YooKassa SDK: {e}")
 
+    return PooledPayment
+
 
 def create_yookassa_payment(order: Order) -> str:
     """
@@ -64,7 +124,7 @@ def create_yookassa_payment(order: Order) -> str:
     if order.status != 'pending':
         raise ValueError(f"Order #{order.id} is not in pending status")
 
-    _configure_yookassa()
+    payment_api = _payment_api()
 
     # Use uuid5 based on order ID for idempotency
     idempotency_key = str(uuid.uuid5(uuid.NAMESPACE_URL, f"order-{order.id}"))
@@ -83,13 +143,17 @@ def create_yookassa_payment(order: Order) -> str:
         "capture": True,
         "description": f"Слон — тариф «{tariff_display}»"[:128],
         "metadata": {
-            "order_id": order.id
+            "order_id": order.id,
+            "trace_id": order.trace_id
         }
     }
 
     try:
-        from yookassa import Payment
-        payment = Payment.create(payload, idempotency_key)
+        with trace(order.trace_id), trace_span('payment.create', order_id=order.id), yookassa_breaker.call():
+            payment = payment_api.create(payload, idempotency_key)
+    except CircuitOpenError as e:
+        logger.warning(f"YooKassa payment for order #{order.id} rejected: {e}")
+        raise YooKassaUnavailableError("Payment gateway is temporarily unavailable")
     except Exception as e:
         error_name = type(e).__name__
         error_msg = str(e)
@@ -111,9 +175,11 @@ def create_yookassa_payment(order: Order) -> str:
         logger.error(f"YooKassa did not return confirmation_url for order #{order.id}")
         raise YooKassaAPIError("YooKassa did not return confirmation_url")
 
-    # Save YooKassa payment ID to order
+    # Save YooKassa payment ID and link to order
     order.yookassa_payment_id = payment.id
-    order.save(update_fields=['yookassa_payment_id'])
+    order.payment_url = confirmation_url
+    order.payment_error = ""
+    order.save(update_fields=['yookassa_payment_id', 'payment_url', 'payment_error', 'updated_at'])
 
     logger.info(
         f"YooKassa payment {payment.id} created for order #{order.id}, "
@@ -123,16 +189,50 @@ def create_yookassa_payment(order: Order) -> str:
     return confirmation_url
 
 
-def process_yookassa_webhook(body: bytes) -> bool:
+def request_yookassa_payment(order: Order) -> None:
     """
-    Process YooKassa webhook notification.
-    Idempotent — safe to call multiple times for the same event.
+    Enqueue YooKassa payment creation (YOOKASSA_ASYNC_PAYMENTS mode).
+
+    The web worker only checks the order and the configuration; the
+    create_payment task calls YooKassa and saves payment_url (or
+    payment_error), which the client reads from the order.
+
+    Args:
+        order: Order instance (must be in 'pending' status)
+
+    Raises:
+        ValueError: If order is not in pending status
+        YooKassaConfigError: If YooKassa credentials are not configured
+    """
+    from .tasks import create_payment
+
+    if order.status != 'pending':
+        raise ValueError(f"Order #{order.id} is not in pending status")
+
+    _payment_api()
+
+    # Ошибка прошлой попытки, иначе клиент прочитает её до ответа задачи
+    if order.payment_error:
+        order.payment_error = ""
+        order.save(update_fields=['payment_error', 'updated_at'])
+
+    with trace(order.trace_id):
+        create_payment.delay(order.id)
+        logger.info(f"YooKassa payment creation queued for order #{order.id}")
+
+
+def record_webhook_event(body: bytes) -> bool:
+    """
+    Save YooKassa webhook notification to the inbox and schedule processing.
+
+    A single INSERT ... ON CONFLICT DO NOTHING: repeated deliveries of the
+    same event (event type + payment ID) are dropped by the unique key.
 
     Args:
         body: Raw request body bytes
 
     Returns:
-        True if processed successfully
+        True if the notification is valid (new or duplicate)
     """
     try:
         data = json.loads(body)
@@ -144,53 +244,165 @@ def process_yookassa_webhook(body: bytes) -> bool:
     payment_data = data.get('object', {})
     payment_id = payment_data.get('id')
 
-    if not payment_id:
-        logger.warning("Webhook without payment ID")
+    if not event_type or not payment_id:
+        logger.warning("Webhook without event type or payment ID")
         return False
 
     logger.info(f"YooKassa webhook: {event_type} for payment {payment_id}")
 
-    with transaction.atomic():
-        try:
-            order = Order.objects.select_for_update().get(
-                yookassa_payment_id=payment_id
-            )
-        except Order.DoesNotExist:
-            logger.error(f"Order not found for payment {payment_id}")
+    WebhookEvent.objects.bulk_create([
+        WebhookEvent(
+            event_key=f"{event_type}:{payment_id}"[:100],
+            event=event_type[:50],
+            payment_id=payment_id[:50],
+            payload=data,
+        )
+    ], ignore_conflicts=True)
+
+    schedule_webhook_processing()
+    return True
+
+
+def schedule_webhook_processing() -> None:
+    """
+    Enqueue process_webhook_events unless it is already scheduled.
+
+    During a burst one task is queued per WEBHOOK_BATCH_DELAY and drains
+    all pending events. The flag expires after WEBHOOK_SCHEDULE_TTL, so
+    a lost task is re-enqueued by the next webhook.
+    """
+    from .tasks import process_webhook_events
+
+    if not cache.add(WEBHOOK_SCHEDULED_KEY, 1, timeout=WEBHOOK_SCHEDULE_TTL):
+        return
+
+    try:
+        process_webhook_events.apply_async(countdown=WEBHOOK_BATCH_DELAY)
+    except Exception as e:
+        cache.delete(WEBHOOK_SCHEDULED_KEY)
+        logger.error(f"Failed to enqueue webhook processing: {e}")
+
+
+def _apply_payment_event(order: Order, event_type: str) -> bool:
+    """
+    Apply payment event to a locked order. Idempotent.
+
+    Returns:
+        True if elephant generation should be started
+    """
+    if event_type == 'payment.succeeded':
+        if order.status in ('paid', 'processing', 'completed'):
+            logger.info(f"Order #{order.id} already processed, skipping")
             return False
 
-        if event_type == 'payment.succeeded':
-            if order.status in ('paid', 'processing', 'completed'):
-                logger.info(f"Order #{order.id} already processed, skipping")
-                return True
+        order.mark_as_paid()
+        logger.info(f"Order #{order.id} marked as paid")
+        return True
+
+    if event_type == 'payment.canceled':
+        if order.status == 'cancelled':
+            logger.info(f"Order #{order.id} already cancelled, skipping")
+            return False
 
-            order.mark_as_paid()
-            logger.info(f"Order #{order.id} marked as paid")
+        order.mark_as_cancelled()
+        logger.info(f"Order #{order.id} cancelled")
+        return False
 
-        elif event_type == 'payment.canceled':
-            if order.status == 'cancelled':
-                logger.info(f"Order #{order.id} already cancelled, skipping")
-                return True
+    logger.info(f"Ignoring webhook event: {event_type}")
+    return False
 
-            order.mark_as_cancelled()
-            logger.info(f"Order #{order.id} cancelled")
-            return True
 
-        else:
-            logger.info(f"Ignoring webhook event: {event_type}")
-            return True
+def process_webhook_batch(limit: int = WEBHOOK_BATCH_SIZE) -> int:
+    """
+    Process a batch of pending webhook events.
+
+    Events are locked with SKIP LOCKED, so concurrent workers take
+    different batches; orders of the batch are locked with one query.
+    An event that fails is marked processed with the error text and does
+    not block the queue.
+
+    Args:
+        limit: Maximum number of events in the batch
+
+    Returns:
+        Number of events taken from the inbox
+    """
+    paid_orders = []
+
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by('id')[:limit]
+        )
+        if not events:
+            return 0
+
+        # Тариф нужен для очереди генерации; блокируется только строка заказа.
+        # Строки блокируются по возрастанию pk — в том же порядке, что и
+        # в apply_payment_statuses() и параллельных пачках, иначе взаимная
+        # блокировка на пересекающихся заказах
+        orders = {
+            order.yookassa_payment_id: order
+            for order in Order.objects.select_for_update(of=('self',)).select_related('tariff')
+            .filter(yookassa_payment_id__in={event.payment_id for event in events})
+            .order_by('pk')
+        }
+
+        for event in events:
+            order = orders.get(event.payment_id)
+            if order is None:
+                logger.error(f"Order not found for payment {event.payment_id}")
+                event.error = "Order not found"
+                continue
+
+            try:
+                # Спан от получения webhook до применения к заказу
+                with trace(order.trace_id), transaction.atomic():
+                    if _apply_payment_event(order, event.event):
+                        paid_orders.append(order)
+                    record_span('payment.webhook', event.received_at.timestamp(), time.time(), event=event.event)
+            except Exception as e:
+                logger.exception(f"Failed to process webhook event {event.event_key}: {e}")
+                event.error = str(e)
+                order.refresh_from_db()
+
+        processed_at = timezone.now()
+        for event in events:
+            event.processed_at = processed_at
+        WebhookEvent.objects.bulk_update(events, ['processed_at', 'error'])
 
     # Launch elephant generation outside the transaction
-    if event_type == 'payment.succeeded':
-        generate_elephant_image.delay(order.id)
-        logger.info(f"Elephant generation started for order #{order.id}")
+    for order in paid_orders:
+        with trace(order.trace_id):
+            start_elephant_generation(order)
+            logger.info(f"Elephant generation started for order #{order.id}")
+
+    return len(events)
 
-    return True
+
+def payment_status_cache_key(order_id: int) -> str:
+    return f"payments:yookassa_status:{order_id}"
+
+
+def _fetch_payment_status(payment_api, order_id: int, payment_id: str) -> str:
+    """Payment status from YooKassa API or 'unknown' on error."""
+    try:
+        with yookassa_breaker.call():
+            return payment_api.find_one(payment_id).status
+    except CircuitOpenError:
+        return 'unknown'
+    except Exception as e:
+        logger.exception(f"Failed to check payment status for order #{order_id}: {e}")
+        return 'unknown'
 
 
 def check_payment_status(order: Order) -> str:
     """
-    Check payment status via YooKassa API.
+    Check payment status, cached for PAYMENT_STATUS_CACHE_TTL.
+
+    The cache is refreshed by reconcile_pending_orders, so page views
+    normally do not call YooKassa.
 
     Args:
         order: Order instance with yookassa_payment_id
@@ -201,16 +413,111 @@ def check_payment_status(order: Order) -> str:
     if not order.yookassa_payment_id:
         return 'unknown'
 
+    cache_key = payment_status_cache_key(order.id)
+    status = cache.get(cache_key)
+    if status is not None:
+        return status
+
     try:
-        _configure_yookassa()
+        payment_api = _payment_api()
     except YooKassaConfigError:
         logger.error("Cannot check payment status: YooKassa not configured")
         return 'unknown'
 
-    try:
-        from yookassa import Payment
-        payment = Payment.find_one(order.yookassa_payment_id)
-        return payment.status
-    except Exception as e:
-        logger.exception(f"Failed to check payment status for order #{order.id}: {e}")
-        return 'unknown'
+    status = _fetch_payment_status(payment_api, order.id, order.yookassa_payment_id)
+    if status != 'unknown':
+        cache.set(cache_key, status, PAYMENT_STATUS_CACHE_TTL)
+    return status
+
+
+def apply_payment_statuses(statuses: dict) -> int:
+    """
+    Apply YooKassa payment statuses to pending orders in one transaction.
+
+    Only orders still pending are locked and changed; transitions are the
+    same as for webhook events.
+
+    Args:
+        statuses: {yookassa_payment_id: status}
+
+    Returns:
+        Number of orders whose status changed
+    """
+    events = {
+        payment_id: PAYMENT_STATUS_EVENTS[status]
+        for payment_id, status in statuses.items()
+        if status in PAYMENT_STATUS_EVENTS
+    }
+    if not events:
+        return 0
+
+    paid_orders = []
+    with transaction.atomic():
+        # Блокировка по возрастанию pk, как в process_webhook_batch()
+        orders = {
+            order.yookassa_payment_id: order
+            for order in Order.objects.select_for_update(of=('self',)).select_related('tariff')
+            .filter(status='pending', yookassa_payment_id__in=events.keys())
+            .order_by('pk')
+        }
+        for payment_id, order in orders.items():
+            with trace(order.trace_id):
+                if _apply_payment_event(order, events[payment_id]):
+                    paid_orders.append(order)
+
+    # Launch elephant generation outside the transaction
+    for order in paid_orders:
+        with trace(order.trace_id):
+            start_elephant_generation(order)
+            logger.info(f"Elephant generation started for order #{order.id}")
+
+    return len(orders)
+
+
+def reconcile_pending_payments(page_size: int = RECONCILE_PAGE_SIZE, workers: int = RECONCILE_WORKERS) -> tuple:
+    """
+    Check all pending orders with a YooKassa payment against the API.
+
+    Orders are read in keyset pages by ID; statuses of a page are fetched
+    concurrently, cached for the return page and applied in one batch.
+    Fixes orders whose webhook was lost.
+
+    Args:
+        page_size: Orders per page
+        workers: Concurrent YooKassa requests
+
+    Returns:
+        (checked, changed) — number of checked orders and changed statuses
+
+    Raises:
+        YooKassaConfigError: If YooKassa credentials are not configured
+    """
+    payment_api = _payment_api()
+    pending = Order.objects.filter(status='pending', yookassa_payment_id__isnull=False).order_by('pk')
+
+    checked = changed = 0
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            page = list(pending.filter(pk__gt=last_id).values_list('pk', 'yookassa_payment_id')[:page_size])
+            if not page:
+                break
+            last_id = page[-1][0]
+
+            page_statuses = list(executor.map(
+                lambda row: _fetch_payment_status(payment_api, *row), page
+            ))
+            cache.set_many({
+                payment_status_cache_key(order_id): status
+                for (order_id, _), status in zip(page, page_statuses)
+                if status != 'unknown'
+            }, PAYMENT_STATUS_CACHE_TTL)
+
+            changed += apply_payment_statuses({
+                payment_id: status for (_, payment_id), status in zip(page, page_statuses)
+            })
+            checked += len(page)
+            if len(page) < page_size:
+                break
+
+    return checked, changed
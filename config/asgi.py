@@ -0,0 +1,13 @@
+"""
+ASGI config for elephant_shop project.
+
+Production entry point (gunicorn + uvicorn workers): async views such as
+the order status SSE stream do not hold a worker while waiting.
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+application = get_asgi_application()
@@ -2,7 +2,11 @@
 Celery configuration for elephant_shop project.
 """
 import os
+import time
+from datetime import datetime
+
 from celery import Celery
+from celery.signals import before_task_publish, task_postrun, task_prerun
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -16,6 +20,53 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 
+@before_task_publish.connect
+def stamp_ready_at(headers=None, **kwargs):
+    """
+    Момент, с которого задача готова к выполнению (публикация или ETA),
+    в заголовке ready_at — для метрики ожидания в очереди
+    """
+    if headers is None:
+        return
+    ready_at = time.time()
+    if headers.get('eta'):
+        ready_at = max(ready_at, datetime.fromisoformat(headers['eta']).timestamp())
+    headers['ready_at'] = ready_at
+
+
+@before_task_publish.connect
+def stamp_trace_id(headers=None, **kwargs):
+    """Trace id текущего контекста (заказа) в заголовок trace_id задачи"""
+    from apps.core.tracing import TRACE_HEADER, current_trace_id
+
+    trace_id = current_trace_id()
+    if headers is not None and trace_id and not headers.get(TRACE_HEADER):
+        headers[TRACE_HEADER] = trace_id
+
+
+# Токены trace id выполняемых задач (eager-задачи вложены в вызывающую)
+_trace_tokens = {}
+
+
+@task_prerun.connect
+def activate_trace_id(task_id=None, task=None, **kwargs):
+    """Восстановить trace id из заголовка задачи на время её выполнения"""
+    from apps.core.tracing import TRACE_HEADER, activate
+
+    trace_id = task.request.get(TRACE_HEADER) or (task.request.headers or {}).get(TRACE_HEADER)
+    if trace_id:
+        _trace_tokens[task_id] = activate(trace_id)
+
+
+@task_postrun.connect
+def deactivate_trace_id(task_id=None, **kwargs):
+    from apps.core.tracing import deactivate
+
+    token = _trace_tokens.pop(task_id, None)
+    if token is not None:
+        deactivate(token)
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     """Debug task for testing Celery"""
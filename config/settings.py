@@ -24,9 +24,14 @@ DEBUG = env('DEBUG')
 
 ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=['localhost', '127.0.0.1'])
 
-# localhost нужен для Docker health checks (curl изнутри контейнера)
-if 'localhost' not in ALLOWED_HOSTS:
-    ALLOWED_HOSTS.append('localhost')
+# localhost нужен для Docker health checks (curl изнутри контейнера),
+# web — для запросов из docker-сети по имени сервиса (Prometheus: web:8000/metrics/)
+for internal_host in ('localhost', 'web'):
+    if internal_host not in ALLOWED_HOSTS:
+        ALLOWED_HOSTS.append(internal_host)
+
+# Bearer-токен /metrics/ (Authorization: Bearer <token>); пусто — эндпоинт выключен (404)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
 
 # CSRF trusted origins for cross-site requests
 CSRF_TRUSTED_ORIGINS = env.list('CSRF_TRUSTED_ORIGINS', default=[
@@ -54,6 +59,7 @@ INSTALLED_APPS = [
     'allauth.socialaccount.providers.google',
 
     # Local apps
+    'apps.core',
     'apps.accounts',
     'apps.elephants',
     'apps.gifts',
@@ -100,6 +106,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Потоки для синхронного кода (ORM, YooKassa) из async-маршрутов, на процесс.
+# Каждый поток держит не больше одного соединения с БД.
+ASYNC_THREAD_POOL_SIZE = env.int('ASYNC_THREAD_POOL_SIZE', default=32)
 
 # Database
 DATABASES = {
@@ -185,6 +196,47 @@ CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutes (soft limit)
 CELERY_TASK_ACKS_LATE = True  # Acknowledge after task completion
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Fetch one task at a time
 
+# Очереди генерации слона: выделение цвета (БД) и рендер (CPU) обслуживают
+# разные воркеры со своей concurrency, внутри шага — по классу приоритета
+# (apps/elephants/routing.py): allocate[.priority], render[.priority|.bulk].
+# Остальные задачи — очередь celery
+CELERY_TASK_ROUTES = (
+    'apps.elephants.routing.route_elephant_task',
+    {'apps.elephants.tasks.render_paid_orders': {'queue': 'render.bulk'}},
+)
+
+# Пакетная генерация слонов: размер пачки render_paid_orders (0 — задача на заказ)
+ELEPHANT_RENDER_BATCH_SIZE = env.int('ELEPHANT_RENDER_BATCH_SIZE', default=0)
+
+# Замер этапов генерации слона (apps/core/timing.py): лог, результат задачи, метрики
+ELEPHANT_STAGE_TIMINGS = env.bool('ELEPHANT_STAGE_TIMINGS', default=False)
+
+# Спаны трассы заказа строками JSON (apps/core/tracing.py); пусто — экспорт выключен
+TRACE_SPANS_FILE = env('TRACE_SPANS_FILE', default='')
+
+# Periodic tasks (celery beat)
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-pending-orders': {
+        'task': 'apps.payments.tasks.reconcile_pending_orders',
+        'schedule': 60.0,
+        'options': {'expires': 55},
+    },
+    # Страховка webhook inbox, если задача разбора потерялась
+    'process-webhook-events': {
+        'task': 'apps.payments.tasks.process_webhook_events',
+        'schedule': 60.0,
+        'options': {'expires': 55},
+    },
+}
+
+if ELEPHANT_RENDER_BATCH_SIZE:
+    # Страховка пакетной генерации, если задача потерялась
+    CELERY_BEAT_SCHEDULE['render-paid-orders'] = {
+        'task': 'apps.elephants.tasks.render_paid_orders',
+        'schedule': 60.0,
+        'options': {'expires': 55},
+    }
+
 # Redis Cache
 CACHES = {
     'default': {
@@ -242,6 +294,11 @@ SOCIALACCOUNT_ADAPTER = 'apps.accounts.adapters.SocialAccountAdapter'
 YOOKASSA_SHOP_ID = env('YOOKASSA_SHOP_ID', default='')
 YOOKASSA_SECRET_KEY = env('YOOKASSA_SECRET_KEY', default='')
 YOOKASSA_RETURN_URL = env('YOOKASSA_RETURN_URL', default='https://slon.prvms.ru/payment/return/')
+# Базовый URL API (для локальной заглушки в тестах и бенчмарках)
+YOOKASSA_API_URL = env('YOOKASSA_API_URL', default='https://api.yookassa.ru/v3')
+# Платёж создаёт Celery задача: POST /api/orders отвечает 202 без payment_url,
+# ссылка приходит в заказе (GET /api/orders/{id}, SSE-поток заказа)
+YOOKASSA_ASYNC_PAYMENTS = env.bool('YOOKASSA_ASYNC_PAYMENTS', default=False)
 
 # Reverse Proxy Settings (NPM, Traefik, etc)
 # Trust X-Forwarded-Proto header from reverse proxy
@@ -275,11 +332,11 @@ LOGGING = {
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} [{trace_id}] {message}',
             'style': '{',
         },
         'simple': {
-            'format': '{levelname} {message}',
+            'format': '{levelname} [{trace_id}] {message}',
             'style': '{',
         },
     },
@@ -287,12 +344,17 @@ LOGGING = {
         'require_debug_false': {
             '()': 'django.utils.log.RequireDebugFalse',
         },
+        # trace_id заказа в каждой строке лога (apps/core/tracing.py)
+        'trace_id': {
+            '()': 'apps.core.tracing.TraceIdFilter',
+        },
     },
     'handlers': {
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
-            'formatter': 'simple'
+            'formatter': 'simple',
+            'filters': ['trace_id'],
         },
         'file': {
             'level': 'INFO',
@@ -301,6 +363,7 @@ LOGGING = {
             'maxBytes': 1024 * 1024 * 10,  # 10MB
             'backupCount': 10,
             'formatter': 'verbose',
+            'filters': ['trace_id'],
         },
         'error_file': {
             'level': 'ERROR',
@@ -309,6 +372,7 @@ LOGGING = {
             'maxBytes': 1024 * 1024 * 10,  # 10MB
             'backupCount': 10,
             'formatter': 'verbose',
+            'filters': ['trace_id'],
         },
         'celery_file': {
             'level': 'INFO',
@@ -317,6 +381,7 @@ LOGGING = {
             'maxBytes': 1024 * 1024 * 10,  # 10MB
             'backupCount': 5,
             'formatter': 'verbose',
+            'filters': ['trace_id'],
         },
     },
     'loggers': {
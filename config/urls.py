@@ -7,12 +7,14 @@ from django.conf import settings
 from django.conf.urls.static import static
 from ninja import NinjaAPI
 from apps.core import views as core_views
+from apps.core.renderers import ORJSONRenderer
 
 # Initialize Django Ninja API
 api = NinjaAPI(
     title="Elephant Color Shop API",
     version="1.0.0",
     description="API для покупки уникальных цветных слонов",
+    renderer=ORJSONRenderer(),
 )
 
 # Import API routers
@@ -20,18 +22,22 @@ from apps.accounts.api import router as accounts_router
 from apps.elephants.api import router as elephants_router
 from apps.payments.api import router as payments_router
 from apps.gifts.api import router as gifts_router
+from apps.core.api import router as core_router
 
 # Register API routers
 api.add_router("/auth/", accounts_router)
 api.add_router("/elephants/", elephants_router)
 api.add_router("/", payments_router)
 api.add_router("/gifts/", gifts_router)
+api.add_router("/", core_router)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', api.urls),
     # Health check endpoint
     path('health/', core_views.health_check, name='health_check'),
+    # Prometheus metrics (internal network only)
+    path('metrics/', core_views.metrics, name='metrics'),
     # Allauth URLs (must come BEFORE custom accounts URLs)
     path('accounts/', include('allauth.urls')),
     # Django views
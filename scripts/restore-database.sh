@@ -86,7 +86,7 @@ echo -e "${YELLOW}Starting restore process...${NC}"
 # Stop web and celery services to close database connections
 echo -e "${YELLOW}Stopping web and celery services...${NC}"
 if [ -f "$COMPOSE_FILE" ]; then
-    docker-compose -f "$COMPOSE_FILE" stop web celery_worker
+    docker-compose -f "$COMPOSE_FILE" stop web celery_worker celery_render celery_render_bulk celery_beat
     echo -e "${GREEN}✓ Services stopped${NC}"
 else
     echo -e "${RED}WARNING: docker-compose file not found, skipping service stop${NC}"
@@ -122,7 +122,7 @@ fi
 # Restart services
 echo -e "${YELLOW}Starting services...${NC}"
 if [ -f "$COMPOSE_FILE" ]; then
-    docker-compose -f "$COMPOSE_FILE" up -d web celery_worker
+    docker-compose -f "$COMPOSE_FILE" up -d web celery_worker celery_render celery_render_bulk celery_beat
     echo -e "${GREEN}✓ Services started${NC}"
 fi
 
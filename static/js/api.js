@@ -40,6 +40,16 @@ async function apiFetch(url, options = {}) {
     return response.json();
 }
 
+/**
+ * Build list URL with keyset pagination params
+ * @param {string} url - List endpoint URL
+ * @param {string|null} cursor - Cursor from previous page (`next`)
+ * @returns {string} URL with query string
+ */
+function pageUrl(url, cursor = null) {
+    return cursor ? `${url}?cursor=${encodeURIComponent(cursor)}` : url;
+}
+
 /**
  * Orders API
  */
@@ -61,11 +71,12 @@ export const ordersAPI = {
     },
 
     /**
-     * Get list of user's orders
-     * @returns {Promise<Array>} List of orders
+     * Get a page of user's orders
+     * @param {string|null} cursor - Cursor from previous page
+     * @returns {Promise<{items: Array, next: string|null}>} Page of orders
      */
-    async list() {
-        return apiFetch('/api/orders');
+    async list(cursor = null) {
+        return apiFetch(pageUrl('/api/orders', cursor));
     },
 
     /**
@@ -75,6 +86,29 @@ export const ordersAPI = {
      */
     async get(orderId) {
         return apiFetch(`/api/orders/${orderId}`);
+    },
+
+    /**
+     * Wait for the payment link of an order created with status 202
+     * (payment is created in the background)
+     * @param {number} orderId - Order ID
+     * @param {number} timeoutMs - Give up after this time
+     * @returns {Promise<string|null>} payment_url, null on timeout
+     * @throws {Error} With payment_error if payment creation failed
+     */
+    async waitForPaymentUrl(orderId, timeoutMs = 30000) {
+        const deadline = Date.now() + timeoutMs;
+        while (Date.now() < deadline) {
+            const order = await this.get(orderId);
+            if (order.payment_url) {
+                return order.payment_url;
+            }
+            if (order.payment_error) {
+                throw new Error(order.payment_error);
+            }
+            await new Promise(resolve => setTimeout(resolve, 500));
+        }
+        return null;
     }
 };
 
@@ -83,11 +117,12 @@ export const ordersAPI = {
  */
 export const elephantsAPI = {
     /**
-     * Get list of user's elephants
-     * @returns {Promise<Array>} List of elephants
+     * Get a page of user's elephants
+     * @param {string|null} cursor - Cursor from previous page
+     * @returns {Promise<{items: Array, next: string|null}>} Page of elephants
      */
-    async list() {
-        return apiFetch('/api/elephants');
+    async list(cursor = null) {
+        return apiFetch(pageUrl('/api/elephants/', cursor));
     },
 
     /**
@@ -130,11 +165,12 @@ export const giftsAPI = {
     },
 
     /**
-     * Get list of sent gifts
-     * @returns {Promise<Array>} List of sent gifts
+     * Get a page of sent gifts
+     * @param {string|null} cursor - Cursor from previous page
+     * @returns {Promise<{items: Array, next: string|null}>} Page of sent gifts
      */
-    async listSent() {
-        return apiFetch('/api/gifts/sent');
+    async listSent(cursor = null) {
+        return apiFetch(pageUrl('/api/gifts/sent', cursor));
     },
 
     /**
@@ -157,3 +193,25 @@ export const giftsAPI = {
         });
     }
 };
+
+/**
+ * Dashboard API
+ */
+export const dashboardAPI = {
+    /**
+     * Get elephants, orders and sent gifts in one request
+     * @returns {Promise<{elephants: Object, orders: Object, sent_gifts: Object}>} First pages of each list
+     */
+    async get() {
+        return apiFetch('/api/dashboard');
+    },
+
+    /**
+     * Get changes since a sync token (from get() or a previous sync())
+     * @param {string} since - Sync token
+     * @returns {Promise<{token: string, reset: boolean, elephants: Array, orders: Array, sent_gifts: Array, deleted: Object}>} Changed items and deleted IDs
+     */
+    async sync(since) {
+        return apiFetch(`/api/sync?since=${encodeURIComponent(since)}`);
+    }
+};
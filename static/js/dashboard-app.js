@@ -4,7 +4,23 @@
  */
 
 import { getCookie, getHueName, copyToClipboard } from './utils.js';
-import { elephantsAPI, ordersAPI, giftsAPI } from './api.js';
+import { elephantsAPI, ordersAPI, giftsAPI, dashboardAPI } from './api.js';
+
+/**
+ * Apply /api/sync changes to a list sorted by (created_at, id) desc
+ * @param {Array} items - Current items
+ * @param {Array} changed - Changed or new items
+ * @param {Array<number>} deletedIds - IDs of removed items
+ * @param {string|null} next - Pagination cursor (items beyond the loaded page are skipped)
+ * @returns {Array} New list
+ */
+function mergeChanges(items, changed, deletedIds, next) {
+    const byNewest = (a, b) => (b.created_at.localeCompare(a.created_at) || b.id - a.id);
+    const removed = new Set(deletedIds.concat(changed.map(item => item.id)));
+    const last = items[items.length - 1];
+    const visible = next && last ? changed.filter(item => byNewest(item, last) <= 0) : changed;
+    return items.filter(item => !removed.has(item.id)).concat(visible).sort(byNewest);
+}
 
 /**
  * Create dashboard Alpine.js app
@@ -18,6 +34,13 @@ export function dashboard(config = {}) {
         elephants: [],
         orders: [],
         sentGifts: [],
+        // Keyset pagination cursors (null — больше страниц нет)
+        elephantsNext: null,
+        ordersNext: null,
+        sentGiftsNext: null,
+        // Delta sync token (/api/sync)
+        syncToken: null,
+        loadingMore: false,
         showGiftModal: false,
         selectedElephant: null,
         giftForm: {
@@ -38,27 +61,74 @@ export function dashboard(config = {}) {
         async loadData() {
             this.loading = true;
             try {
-                await Promise.all([
-                    this.loadElephants(),
-                    this.loadOrders(),
-                    this.loadSentGifts()
-                ]);
+                // One request instead of three: /api/dashboard returns first pages of all lists
+                const data = await dashboardAPI.get();
+                this.elephants = data.elephants.items;
+                this.elephantsNext = data.elephants.next;
+                this.orders = data.orders.items;
+                this.ordersNext = data.orders.next;
+                this.sentGifts = data.sent_gifts.items;
+                this.sentGiftsNext = data.sent_gifts.next;
+                this.syncToken = data.sync_token;
+            } catch (error) {
+                console.error('Failed to load dashboard:', error);
             } finally {
                 this.loading = false;
             }
         },
 
+        /**
+         * Подтянуть только изменения после последней загрузки/синхронизации
+         */
+        async syncChanges() {
+            if (!this.syncToken) {
+                await this.loadData();
+                return;
+            }
+            try {
+                const delta = await dashboardAPI.sync(this.syncToken);
+                if (delta.reset) {
+                    await this.loadData();
+                    return;
+                }
+                this.elephants = mergeChanges(this.elephants, delta.elephants, delta.deleted.elephants, this.elephantsNext);
+                this.orders = mergeChanges(this.orders, delta.orders, delta.deleted.orders, this.ordersNext);
+                this.sentGifts = mergeChanges(this.sentGifts, delta.sent_gifts, delta.deleted.sent_gifts, this.sentGiftsNext);
+                this.syncToken = delta.token;
+            } catch (error) {
+                console.error('Failed to sync dashboard:', error);
+            }
+        },
+
         async loadElephants() {
             try {
-                this.elephants = await elephantsAPI.list();
+                const page = await elephantsAPI.list();
+                this.elephants = page.items;
+                this.elephantsNext = page.next;
             } catch (error) {
                 console.error('Failed to load elephants:', error);
             }
         },
 
+        async loadMoreElephants() {
+            if (!this.elephantsNext || this.loadingMore) return;
+            this.loadingMore = true;
+            try {
+                const page = await elephantsAPI.list(this.elephantsNext);
+                this.elephants = this.elephants.concat(page.items);
+                this.elephantsNext = page.next;
+            } catch (error) {
+                console.error('Failed to load more elephants:', error);
+            } finally {
+                this.loadingMore = false;
+            }
+        },
+
         async loadOrders() {
             try {
-                this.orders = await ordersAPI.list();
+                const page = await ordersAPI.list();
+                this.orders = page.items;
+                this.ordersNext = page.next;
             } catch (error) {
                 console.error('Failed to load orders:', error);
             }
@@ -66,12 +136,21 @@ export function dashboard(config = {}) {
 
         async loadSentGifts() {
             try {
-                this.sentGifts = await giftsAPI.listSent();
+                const page = await giftsAPI.listSent();
+                this.sentGifts = page.items;
+                this.sentGiftsNext = page.next;
             } catch (error) {
                 console.error('Failed to load sent gifts:', error);
             }
         },
 
+        /**
+         * Счётчик для карточки статистики: "50+" если есть следующие страницы
+         */
+        countLabel(items, next) {
+            return next ? `${items.length}+` : `${items.length}`;
+        },
+
         downloadElephant(elephantId) {
             window.open(elephantsAPI.getDownloadUrl(elephantId), '_blank');
         },
@@ -104,8 +183,7 @@ export function dashboard(config = {}) {
                 });
 
                 this.giftLink = window.location.origin + data.public_url;
-                await this.loadSentGifts();
-                await this.loadElephants();
+                await this.syncChanges();
             } catch (error) {
                 console.error('Error:', error);
                 alert('Произошла ошибка при создании подарка');
@@ -153,12 +231,18 @@ export function dashboard(config = {}) {
 
                 console.log('Order created, payment data:', data);
 
-                if (!data || !data.payment_url) {
+                let paymentUrl = data && data.payment_url;
+                if (data && data.order_id && !paymentUrl) {
+                    // Payment is created in the background (202): wait for the link
+                    paymentUrl = await ordersAPI.waitForPaymentUrl(data.order_id);
+                }
+
+                if (!paymentUrl) {
                     throw new Error('Сервис оплаты вернул пустой адрес. Обратитесь в поддержку.');
                 }
 
                 // Redirect to YooKassa payment page
-                window.location.href = data.payment_url;
+                window.location.href = paymentUrl;
             } catch (error) {
                 console.error('Error:', error);
 
@@ -35,12 +35,18 @@ export function tariffApp() {
 
                 console.log('Order created, payment data:', data);
 
-                if (!data || !data.payment_url) {
+                let paymentUrl = data && data.payment_url;
+                if (data && data.order_id && !paymentUrl) {
+                    // Payment is created in the background (202): wait for the link
+                    paymentUrl = await ordersAPI.waitForPaymentUrl(data.order_id);
+                }
+
+                if (!paymentUrl) {
                     throw new Error('Сервис оплаты вернул пустой адрес. Обратитесь в поддержку.');
                 }
 
                 // Redirect to YooKassa payment page
-                window.location.href = data.payment_url;
+                window.location.href = paymentUrl;
             } catch (error) {
                 console.error('Order creation error:', error);
 